@@ -0,0 +1,82 @@
+"""
+Offline micro-benchmark suite
+
+    python -m benchmarks run [--quick] [--only indicators,db] [--output PATH]
+    python -m benchmarks compare BASELINE.json CANDIDATE.json [--threshold 0.1]
+
+Results are written as JSON to benchmarks/results/<git revision>.json by
+default so runs from different commits can be compared.
+"""
+
+import argparse
+import importlib
+import os
+import sys
+from benchmarks.runner import compare, git_revision, write_results
+
+SUITES = (
+    "indicators",
+    "backtest",
+    "bars",
+    "charts",
+    "db",
+    "news",
+    "portfolio",
+    "rows",
+    "rules",
+    "scheduler",
+    "snapshot",
+    "startup",
+    "stream",
+    "timeframes",
+)
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run benchmarks")
+    run_parser.add_argument("--quick", action="store_true", help="smaller inputs")
+    run_parser.add_argument("--only", help=f"comma separated subset of {SUITES}")
+    run_parser.add_argument("--output", help="result file path")
+
+    compare_parser = commands.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.add_argument("--threshold", type=float, default=0.1)
+
+    args = parser.parse_args()
+    if args.command == "compare":
+        return 0 if compare(args.baseline, args.candidate, args.threshold) else 1
+
+    suites = args.only.split(",") if args.only else SUITES
+    results = {}
+    for suite in suites:
+        module = importlib.import_module(f"benchmarks.bench_{suite}")
+        print(f"running {suite} benchmarks...", file=sys.stderr)
+        for name, result in module.run(quick=args.quick).items():
+            results[name] = result
+            columns = []
+            if "median_s" in result:
+                columns.append(f"{result['median_s'] * 1e3:>10.3f}ms")
+            if "bytes_per_symbol" in result:
+                columns.append(f"{result['bytes_per_symbol']:>10.0f}B/symbol")
+            if "bytes_per_row" in result:
+                columns.append(f"{result['bytes_per_row']:>10.0f}B/row")
+            if not columns:
+                columns.append(f"skipped ({result.get('skipped')})")
+            print(f"  {name:<56} {' '.join(columns)}")
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{git_revision()}.json")
+    write_results(results, output)
+    print(f"results written to {output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
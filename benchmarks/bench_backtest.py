@@ -0,0 +1,21 @@
+"""Backtest throughput: years of daily bars for many tickers at once"""
+
+from typing import Dict
+from benchmarks.fixtures import synthetic_ohlcv
+from benchmarks.runner import measure
+from services.backtest import STRATEGIES, backtest
+
+
+def run(quick: bool = False) -> Dict[str, dict]:
+    cases = ((2, 50), (10, 100)) if quick else ((2, 50), (10, 100), (10, 500))
+    results = {}
+    for years, count in cases:
+        bars = 252 * years
+        frames = {f"SYM{i}": synthetic_ohlcv(bars, seed=i) for i in range(count)}
+        for name, (entry, exit) in STRATEGIES.items():
+            results[f"backtest.{name}[{years}y x {count}]"] = measure(
+                lambda: backtest(frames, entry, exit),
+                repeat=3 if quick else 5,
+                items=bars * count,
+            )
+    return results
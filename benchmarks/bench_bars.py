@@ -0,0 +1,70 @@
+"""
+Bar cache memory: yfinance-shaped frames vs compact Bars
+
+Run standalone with: python -m benchmarks.bench_bars [symbols]
+"""
+
+import sys
+import tracemalloc
+from typing import Callable, Dict, List
+from benchmarks.fixtures import synthetic_ohlcv
+from benchmarks.runner import measure
+from services.bars import Bars, TimeIndexPool
+
+# Bars per symbol: a year of daily bars and the 60 days of 5m bars the bar
+# store keeps
+SHAPES = (("1d", 252, "B"), ("5m", 4680, "5min"))
+
+
+def _bytes_per_symbol(build: Callable[[int], object], symbols: int) -> float:
+    tracemalloc.start()
+    cache = [build(i) for i in range(symbols)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del cache
+    return current / symbols
+
+
+def run(quick: bool = False, symbols: int = 0) -> Dict[str, dict]:
+    symbols = symbols or (50 if quick else 200)
+    repeat = 3 if quick else 7
+    results = {}
+    for interval, bars, freq in SHAPES:
+        frames: List = [synthetic_ohlcv(bars, seed=i, freq=freq) for i in range(4)]
+
+        def frame(i: int):
+            return synthetic_ohlcv(bars, seed=i, freq=freq)
+
+        def compact(dtype: str) -> Callable[[int], Bars]:
+            # One pool per cache, as in BarStore; the synthetic symbols share
+            # their bar times like one exchange's symbols do
+            pool = TimeIndexPool()
+            return lambda i: Bars.from_frame(frames[i % 4], dtype=dtype, pool=pool)
+
+        name = f"bars.{interval}[{bars} bars]"
+        # Memory only: the frames are what the provider returns, no work
+        results[f"{name}.frame"] = {
+            "bytes_per_symbol": _bytes_per_symbol(frame, symbols)
+        }
+        for dtype in ("float64", "float32"):
+            build = compact(dtype)
+            result = measure(lambda: build(0), repeat=repeat, number=10, items=1)
+            result["bytes_per_symbol"] = _bytes_per_symbol(compact(dtype), symbols)
+            results[f"{name}.{dtype}.from_frame"] = result
+
+        cached = Bars.from_frame(frames[0], pool=TimeIndexPool())
+        results[f"{name}.to_frame"] = measure(
+            cached.to_frame, repeat=repeat, number=100, items=1
+        )
+    return results
+
+
+if __name__ == "__main__":
+    symbols = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    for name, result in run(symbols=symbols).items():
+        parts = []
+        if "median_s" in result:
+            parts.append(f"{result['median_s'] * 1e6:.1f} us")
+        if "bytes_per_symbol" in result:
+            parts.append(f"{result['bytes_per_symbol'] / 1024:.1f} KiB/symbol")
+        print(f"{name}: {', '.join(parts)}")
@@ -0,0 +1,39 @@
+"""Chart render time for the PNG charts sent with alerts"""
+
+from typing import Dict
+import matplotlib
+
+matplotlib.use("Agg")
+
+from benchmarks.fixtures import FakeYFinanceProvider, synthetic_ohlcv
+from benchmarks.runner import measure
+from services import chart_service
+from services.stock_service import StockService
+
+
+def run(quick: bool = False) -> Dict[str, dict]:
+    service = StockService(FakeYFinanceProvider())
+    sizes = (63,) if quick else (63, 252)
+    results = {}
+    for bars in sizes:
+        df = synthetic_ohlcv(bars)
+        cases = {
+            "stock_service.generate_price_chart": lambda df=df: service.generate_price_chart(
+                "BENCH", df
+            ),
+            "stock_service.generate_macd_signal_chart": lambda df=df: service.generate_macd_signal_chart(
+                "BENCH", df
+            ),
+            "stock_service.generate_rsi_chart": lambda df=df: service.generate_rsi_chart(
+                "BENCH", df
+            ),
+            "chart_service.generate_price_chart": lambda df=df: chart_service.generate_price_chart(
+                "BENCH", df
+            ),
+            "chart_service.generate_rsi_chart": lambda df=df: chart_service.generate_rsi_chart(
+                "BENCH", df
+            ),
+        }
+        for name, fn in cases.items():
+            results[f"charts.{name}[{bars}]"] = measure(fn, repeat=3 if quick else 7)
+    return results
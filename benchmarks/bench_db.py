@@ -0,0 +1,74 @@
+"""Latency of the db/ operations used by the bot's jobs and commands"""
+
+from datetime import datetime, timedelta
+from itertools import count
+from typing import Dict
+from benchmarks.fixtures import temporary_postgresql, temporary_sqlite
+from benchmarks.runner import measure
+from db.basedb import BaseDB
+from db.rows import AlertRow
+
+
+def _populate(db: BaseDB, alerts: int, keywords: int) -> None:
+    start = datetime.now()
+    db.add_alerts(
+        [
+            AlertRow(
+                None,
+                f"SYM{i % 500}",
+                "BUY" if i % 2 else "SELL",
+                100.0 + i % 50,
+                start - timedelta(minutes=i),
+            )
+            for i in range(alerts)
+        ]
+    )
+    for i in range(keywords):
+        db.add_to_watched_keywords(f"keyword {i}")
+
+
+def _bench_backend(name: str, db: BaseDB, quick: bool) -> Dict[str, dict]:
+    alerts = 2000 if quick else 20000
+    _populate(db, alerts, 200)
+    repeat = 5 if quick else 15
+    ids = count()
+    batch = [
+        AlertRow(None, "BULK", "BUY", 1.0, datetime.now() - timedelta(days=2))
+        for _ in range(500)
+    ]
+
+    cases = {
+        "add_alert": (
+            lambda: db.add_alert(f"NEW{next(ids)}", "BUY", 1.0),
+            dict(number=20),
+        ),
+        "add_alerts[500]": (lambda: db.add_alerts(batch), dict(items=500)),
+        "check_duplicate_alert": (
+            lambda: db.check_duplicate_alert("SYM42"),
+            dict(number=50),
+        ),
+        "get_alert_page[20]": (lambda: db.get_alert_page(limit=20), dict(number=20)),
+        "get_alert_page[symbol,20]": (
+            lambda: db.get_alert_page(limit=20, symbol="SYM42"),
+            dict(number=20),
+        ),
+        "iter_alerts[all]": (
+            lambda: sum(1 for _ in db.iter_alerts()),
+            dict(items=alerts),
+        ),
+        "get_watched_keywords[200]": (db.get_watched_keywords, dict(number=20)),
+    }
+    return {
+        f"db.{name}.{case}": measure(fn, repeat=repeat, **options)
+        for case, (fn, options) in cases.items()
+    }
+
+
+def run(quick: bool = False) -> Dict[str, dict]:
+    results = {}
+    with temporary_sqlite() as db:
+        results.update(_bench_backend("sqlite", db, quick))
+    with temporary_postgresql() as db:
+        if db is not None:
+            results.update(_bench_backend("postgresql", db, quick))
+    return results
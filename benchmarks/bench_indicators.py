@@ -0,0 +1,77 @@
+"""Indicator throughput on synthetic OHLCV frames, kernels vs pandas"""
+
+from typing import Dict
+from benchmarks.fixtures import FakeYFinanceProvider, synthetic_ohlcv
+from benchmarks.runner import measure
+from services import indicators
+from services.stock_service import StockService
+
+
+# The pandas implementations the kernels replaced, kept as the baseline
+def pandas_rsi(df, window=14):
+    delta = df["Close"].diff(1)
+    gain = (delta.where(delta > 0, 0)).rolling(window=window).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=window).mean()
+    return 100 - (100 / (1 + gain / loss))
+
+
+def pandas_macd(df):
+    exp1 = df["Close"].ewm(span=12, adjust=False).mean()
+    exp2 = df["Close"].ewm(span=26, adjust=False).mean()
+    macd = exp1 - exp2
+    return macd, macd.ewm(span=9, adjust=False).mean()
+
+
+def pandas_moving_average(df, window=20):
+    return df["Close"].rolling(window=window).mean()
+
+
+def run(quick: bool = False) -> Dict[str, dict]:
+    service = StockService(FakeYFinanceProvider())
+    sizes = (252, 2520) if quick else (63, 252, 2520, 25200)
+    results = {}
+    for bars in sizes:
+        df = synthetic_ohlcv(bars)
+        close = indicators.as_float64(df["Close"].to_numpy())
+        buffers = {
+            "rsi": close.copy(),
+            "macd": indicators.macd(close),
+            "sma": close.copy(),
+        }
+        cases = {
+            "pandas.rsi": lambda df=df: pandas_rsi(df),
+            "pandas.macd": lambda df=df: pandas_macd(df),
+            "pandas.moving_average": lambda df=df: pandas_moving_average(df),
+            "kernels.rsi": lambda close=close: indicators.rsi(
+                close, out=buffers["rsi"]
+            ),
+            "kernels.macd": lambda close=close: indicators.macd(
+                close, out=buffers["macd"]
+            ),
+            "kernels.sma": lambda close=close: indicators.sma(
+                close, 20, out=buffers["sma"]
+            ),
+            # Including the DataFrame to array and back to Series conversions
+            "stock_service.calculate_rsi": lambda df=df: service.calculate_rsi(df),
+            "stock_service.calculate_macd": lambda df=df: service.calculate_macd(df),
+        }
+        for name, fn in cases.items():
+            results[f"indicators.{name}[{bars}]"] = measure(
+                fn, repeat=5 if quick else 15, number=10, items=bars
+            )
+
+        # Many symbols at once, as the rule engine and backtests use them
+        panel = indicators.as_float64(
+            [synthetic_ohlcv(bars, seed=i)["Close"].to_numpy() for i in range(100)]
+        ).T.copy()
+        results[f"indicators.kernels.rsi[{bars} x 100]"] = measure(
+            lambda panel=panel: indicators.rsi(panel),
+            repeat=3 if quick else 7,
+            items=bars * 100,
+        )
+        results[f"indicators.kernels.macd[{bars} x 100]"] = measure(
+            lambda panel=panel: indicators.macd(panel),
+            repeat=3 if quick else 7,
+            items=bars * 100,
+        )
+    return results
@@ -0,0 +1,51 @@
+"""End-to-end news cycle time against a local RSS/article server"""
+
+import asyncio
+import os
+import tempfile
+from typing import Dict
+import feedparser
+from playwright.async_api import async_playwright
+from benchmarks.fixtures import LocalNewsServer
+from benchmarks.runner import measure
+from services.news_service import NewsService
+
+
+async def _browser_available() -> bool:
+    try:
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=True)
+            await browser.close()
+        return True
+    except Exception:
+        return False
+
+
+def run(quick: bool = False) -> Dict[str, dict]:
+    results = {}
+    with LocalNewsServer(articles=5) as server, tempfile.TemporaryDirectory() as tmp:
+        feed_url = server.feed_url.format(query="bench")
+        results["news.feed_parse[5]"] = measure(
+            lambda: feedparser.parse(feed_url), repeat=5 if quick else 15, number=5
+        )
+
+        if not asyncio.run(_browser_available()):
+            results["news.get_news[5]"] = {"skipped": "playwright chromium unavailable"}
+            return results
+
+        service = NewsService(
+            cache_file=os.path.join(tmp, "returned_news.txt"), feed_url=server.feed_url
+        )
+        # One loop throughout, as in the bot: the service's browser lives on it
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(service.warm_up())
+            results["news.get_news[5]"] = measure(
+                lambda: loop.run_until_complete(service.get_news("bench")),
+                repeat=2 if quick else 5,
+                items=5,
+            )
+        finally:
+            loop.run_until_complete(service.close())
+            loop.close()
+    return results
@@ -0,0 +1,71 @@
+"""Valuing a 200 position portfolio: batched quotes vs one history per symbol"""
+
+import asyncio
+from typing import Dict
+from benchmarks.fixtures import FakeYFinanceProvider
+from benchmarks.runner import measure
+from db.rows import PortfolioRow
+from services.portfolio import value_portfolio
+from services.quotes import QuoteCache
+from services.stock_service import StockService
+from utils.fetch_scheduler import FetchScheduler, HostLimits
+
+
+def run(quick: bool = False) -> Dict[str, dict]:
+    positions = 50 if quick else 200
+    holdings = [PortfolioRow(f"T{i:03d}", 10 + i) for i in range(positions)]
+    symbols = [holding.ticker for holding in holdings]
+    # A round trip to the quote API
+    latency = 0.05
+
+    def value(service):
+        async def once():
+            quotes = await service.fetch_quotes(symbols)
+            return value_portfolio(holdings, quotes)
+
+        return asyncio.run(once())
+
+    def per_symbol():
+        # The old plan: one history download per holding
+        # Unthrottled apart from the concurrent request limit; at the bot's
+        # default FETCH_RATE this would take minutes
+        fetcher = FetchScheduler(HostLimits(rate=1e6, burst=10**6))
+        service = StockService(FakeYFinanceProvider(latency=latency), fetcher)
+
+        async def once():
+            await asyncio.gather(
+                *(service.fetch_stock_data(symbol, "5d") for symbol in symbols)
+            )
+
+        asyncio.run(once())
+
+    def cold():
+        service = StockService(
+            FakeYFinanceProvider(latency=latency), quote_cache=QuoteCache(ttl=60)
+        )
+        return value(service)
+
+    warm_service = StockService(
+        FakeYFinanceProvider(latency=latency), quote_cache=QuoteCache(ttl=3600)
+    )
+    value(warm_service)
+    quotes = warm_service.quote_cache.get(symbols)
+
+    repeat = 3 if quick else 5
+    return {
+        f"portfolio.per_symbol_history[{positions}]": measure(
+            per_symbol, repeat=repeat, warmup=0, items=positions
+        ),
+        f"portfolio.batched_cold[{positions}]": measure(
+            cold, repeat=repeat, items=positions
+        ),
+        f"portfolio.batched_warm[{positions}]": measure(
+            lambda: value(warm_service), repeat=repeat, number=10, items=positions
+        ),
+        f"portfolio.value_portfolio[{positions}]": measure(
+            lambda: value_portfolio(holdings, quotes),
+            repeat=repeat,
+            number=10,
+            items=positions,
+        ),
+    }
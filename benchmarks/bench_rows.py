@@ -0,0 +1,64 @@
+"""
+Row materialization: Pydantic models vs slotted row types
+
+Run with: python -m benchmarks run --only rows
+"""
+
+import sqlite3
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Dict
+from benchmarks.fixtures import temporary_sqlite
+from benchmarks.runner import measure
+from db.models import Alert
+from db.rows import AlertRow
+from db.sqlite import SQLiteDB
+
+
+def _populate(db: SQLiteDB, rows: int) -> None:
+    start = datetime.now()
+    db.add_alerts(
+        [
+            AlertRow(
+                None,
+                f"SYM{i % 500}",
+                "BUY" if i % 2 else "SELL",
+                100.0 + i,
+                start - timedelta(minutes=i),
+            )
+            for i in range(rows)
+        ]
+    )
+
+
+def _pydantic_rows(db: SQLiteDB) -> list:
+    # Materialization as it was done before the row types existed
+    cursor = db.conn.cursor()
+    cursor.row_factory = sqlite3.Row
+    cursor.execute("SELECT * FROM alert_history ORDER BY timestamp DESC")
+    return [Alert(**dict(row)) for row in cursor.fetchall()]
+
+
+def _slotted_rows(db: SQLiteDB) -> list:
+    return db.get_alerts()
+
+
+def _bytes_per_row(fn, db: SQLiteDB, rows: int) -> float:
+    tracemalloc.start()
+    result = fn(db)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current / rows
+
+
+def run(quick: bool = False, rows: int = 0) -> Dict[str, dict]:
+    rows = rows or (2000 if quick else 20000)
+    results = {}
+    with temporary_sqlite() as db:
+        _populate(db, rows)
+        for name, fn in (("pydantic", _pydantic_rows), ("slotted", _slotted_rows)):
+            result = measure(lambda: fn(db), repeat=3 if quick else 7, items=rows)
+            result["bytes_per_row"] = _bytes_per_row(fn, db, rows)
+            results[f"rows.alert.{name}[{rows}]"] = result
+    return results
@@ -0,0 +1,48 @@
+"""Alert rule evaluation: one shared expression DAG vs each rule on its own"""
+
+from typing import Dict
+from benchmarks.fixtures import synthetic_ohlcv
+from benchmarks.runner import measure
+from services.rules import RuleSet, build_panel
+
+# Rules the way users tend to write them: a few indicators, reused often
+RULES = (
+    "RSI(14) < 30",
+    "RSI(14) > 70",
+    "RSI(14) < 25 AND CLOSE > SMA(200)",
+    "CLOSE CROSSES ABOVE SMA(50)",
+    "CLOSE CROSSES BELOW SMA(50)",
+    "SMA(50) CROSSES ABOVE SMA(200)",
+    "MACD CROSSES ABOVE SIGNAL",
+    "MACD CROSSES BELOW SIGNAL",
+    "MACD > 0 AND RSI(14) < 50",
+    "CLOSE > EMA(20) AND VOLUME > SMA(20, VOLUME) * 1.5",
+)
+
+
+def run(quick: bool = False) -> Dict[str, dict]:
+    symbol_counts = (10, 100) if quick else (10, 100, 500)
+    shared = RuleSet(enumerate(RULES))
+    separate = [RuleSet([(rule_id, text)]) for rule_id, text in enumerate(RULES)]
+    results = {}
+    for count in symbol_counts:
+        frames = {f"SYM{i}": synthetic_ohlcv(252, seed=i) for i in range(count)}
+        panel = build_panel(frames, shared.fields)
+
+        def per_rule():
+            for rule_set in separate:
+                rule_set.evaluate(panel)
+
+        items = count * len(RULES)
+        results[f"rules.shared_dag[{len(RULES)} rules x {count}]"] = measure(
+            lambda: shared.evaluate(panel), repeat=3 if quick else 10, items=items
+        )
+        results[f"rules.per_rule[{len(RULES)} rules x {count}]"] = measure(
+            per_rule, repeat=3 if quick else 10, items=items
+        )
+        results[f"rules.build_panel[{count}]"] = measure(
+            lambda: build_panel(frames, shared.fields),
+            repeat=3 if quick else 10,
+            items=count,
+        )
+    return results
@@ -0,0 +1,78 @@
+"""
+Restart cost: the first alert cycle cold, from a snapshot, and in steady state
+
+Run standalone with: python -m benchmarks.bench_snapshot [symbols]
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from typing import Dict
+from benchmarks.fixtures import FakeYFinanceProvider
+from benchmarks.runner import measure
+from services.stock_service import StockService
+from services.timeframes import BarStore
+from utils.fetch_scheduler import FetchScheduler, HostLimits
+from utils.snapshot import read_snapshot, write_snapshot
+
+
+def _service() -> StockService:
+    # Unthrottled, so the cold cycle measures download latency and not the
+    # bot's rate limit; bars stay fresh for the whole run
+    return StockService(
+        FakeYFinanceProvider(latency=0.02),
+        FetchScheduler(HostLimits(rate=1e6, burst=10**6)),
+        BarStore("5m", max_age=3600),
+    )
+
+
+def _cycle(service: StockService, symbols) -> None:
+    async def once():
+        await asyncio.gather(
+            *(service.fetch_bars(symbol, "1d", 21) for symbol in symbols)
+        )
+
+    asyncio.run(once())
+
+
+def run(quick: bool = False, symbols: int = 0) -> Dict[str, dict]:
+    count = symbols or (50 if quick else 500)
+    symbols = [f"T{i:04d}" for i in range(count)]
+    repeat = 3 if quick else 5
+    results = {}
+
+    results[f"snapshot.cold_cycle[{count}]"] = measure(
+        lambda: _cycle(_service(), symbols), repeat=repeat, warmup=0, items=count
+    )
+    warm = _service()
+    _cycle(warm, symbols)
+    results[f"snapshot.steady_cycle[{count}]"] = measure(
+        lambda: _cycle(warm, symbols), repeat=repeat, items=count
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "state.snapshot")
+
+        def save():
+            return write_snapshot(path, {"bars": warm.bar_store.snapshot()})
+
+        results[f"snapshot.save[{count}]"] = measure(save, repeat=repeat, items=count)
+        results[f"snapshot.save[{count}]"]["bytes_per_symbol"] = save() / count
+
+        def load():
+            service = _service()
+            service.bar_store.restore(read_snapshot(path)["bars"])
+            return service
+
+        results[f"snapshot.load[{count}]"] = measure(load, repeat=repeat, items=count)
+        results[f"snapshot.restored_cycle[{count}]"] = measure(
+            lambda: _cycle(load(), symbols), repeat=repeat, items=count
+        )
+    return results
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    for name, result in run(symbols=count).items():
+        print(f"{name}: {result['median_s'] * 1e3:.2f} ms")
@@ -0,0 +1,118 @@
+"""
+Startup: time to import the bot entry point in a fresh interpreter
+
+Run standalone as an import-time budget check with:
+
+    python -m benchmarks.bench_startup [--budget 1.0] [--module main]
+
+It exits non-zero when the import takes longer than the budget or when one
+of the heavy dependencies that should load lazily is imported at startup.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+from benchmarks.runner import measure
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENTRY_MODULE = "main"
+# Loaded on first use or by the warm-up job, never while starting up
+HEAVY_MODULES = (
+    "pandas",
+    "numpy",
+    "matplotlib",
+    "yfinance",
+    "newspaper",
+    "playwright",
+    "feedparser",
+)
+
+
+def _python(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+
+
+def import_seconds(module: str = ENTRY_MODULE) -> float:
+    """Seconds spent importing module, excluding interpreter startup"""
+    result = _python(
+        "-c",
+        "import time; started = time.perf_counter(); "
+        f"import {module}; print(time.perf_counter() - started)",
+    )
+    return float(result.stdout)
+
+
+def eager_heavy_modules(module: str = ENTRY_MODULE) -> List[str]:
+    """Heavy dependencies that importing module loads"""
+    result = _python(
+        "-c",
+        f"import json, sys, {module}; "
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))",
+    )
+    return json.loads(result.stdout)
+
+
+def slowest_packages(
+    module: str = ENTRY_MODULE, top: int = 10
+) -> List[Tuple[str, float]]:
+    """Top-level packages by cumulative import time, from -X importtime"""
+    result = _python("-X", "importtime", "-c", f"import {module}")
+    packages: Dict[str, float] = {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2].strip()
+        if "." not in name and name != module:
+            packages[name] = max(packages.get(name, 0.0), int(parts[1]) / 1e6)
+    return sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+
+
+def run(quick: bool = False) -> Dict[str, dict]:
+    seconds = []
+    result = measure(
+        lambda: seconds.append(import_seconds()), repeat=3 if quick else 7, warmup=1
+    )
+    # Report the import itself rather than import plus interpreter startup
+    result.update(
+        {
+            "import_median_s": sorted(seconds)[len(seconds) // 2],
+            "heavy_modules": eager_heavy_modules(),
+        }
+    )
+    return {f"startup.import[{ENTRY_MODULE}]": result}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_startup")
+    parser.add_argument("--budget", type=float, default=1.0, help="seconds")
+    parser.add_argument("--module", default=ENTRY_MODULE)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    import_seconds(args.module)  # warm the disk cache and the .pyc files
+    seconds = sorted(import_seconds(args.module) for _ in range(args.repeat))
+    median = seconds[len(seconds) // 2]
+    print(f"import {args.module}: {median:.3f}s (budget {args.budget:.3f}s)")
+    for package, cumulative in slowest_packages(args.module):
+        print(f"  {package:<32} {cumulative * 1e3:>8.1f}ms")
+
+    ok = True
+    if median > args.budget:
+        print(f"over budget by {median - args.budget:.3f}s", file=sys.stderr)
+        ok = False
+    heavy = eager_heavy_modules(args.module)
+    if heavy:
+        print(f"imported eagerly: {', '.join(heavy)}", file=sys.stderr)
+        ok = False
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,37 @@
+"""Per-quote cost of the streaming indicators vs recomputing the series"""
+
+from typing import Dict
+from benchmarks.fixtures import synthetic_ohlcv
+from benchmarks.runner import measure
+from services.live_indicators import LiveSignals
+from services.stock_service import StockService
+
+
+def run(quick: bool = False) -> Dict[str, dict]:
+    df = synthetic_ohlcv(21)  # the 1mo history the alert cycle uses
+    closes = df["Close"]
+    bar = closes.index[-1]
+    last = float(closes.iloc[-1])
+    ticks = [last * (1 + (i % 200 - 100) / 10000) for i in range(10000)]
+
+    signals = LiveSignals()
+    signals.seed((timestamp, float(close)) for timestamp, close in closes.items())
+
+    def update_all():
+        for price in ticks:
+            signals.update(bar, price)
+
+    def recompute(price=ticks[0]):
+        frame = df.copy()
+        frame.iloc[-1, frame.columns.get_loc("Close")] = price
+        StockService.calculate_rsi(frame)
+        StockService.calculate_macd(frame)
+
+    return {
+        f"stream.live_signals.update[{len(ticks)} quotes]": measure(
+            update_all, repeat=3 if quick else 10, items=len(ticks)
+        ),
+        "stream.recompute_rsi_macd[1 quote]": measure(
+            recompute, repeat=3 if quick else 10, number=20, items=1
+        ),
+    }
@@ -0,0 +1,79 @@
+"""Building timeframes from 5m bars: full resampling vs incremental refresh"""
+
+from typing import Dict
+from benchmarks.fixtures import synthetic_ohlcv
+from benchmarks.runner import measure
+from services.market_calendar import exchange_for
+from services.timeframes import BarStore, resample
+
+TIMEFRAMES = ("15m", "1h", "1d", "1wk")
+
+
+def session_bars(days: int, seed: int = 0):
+    """5m bars of the regular US session over roughly days trading days"""
+    df = synthetic_ohlcv(days * 7 // 5 * 288, seed=seed, freq="5min")
+    return df[df.index.dayofweek < 5].between_time("09:30", "15:55")
+
+
+def run(quick: bool = False) -> Dict[str, dict]:
+    exchange = exchange_for("AAPL")
+    base = session_bars(60)
+    history, latest = base.iloc[:-78], base.iloc[-78:]
+    results = {}
+    for timeframe in TIMEFRAMES:
+        results[f"timeframes.resample.{timeframe}[{len(base)} bars]"] = measure(
+            lambda timeframe=timeframe: resample(base, timeframe, exchange),
+            repeat=3 if quick else 10,
+            items=len(base),
+        )
+        # pandas' own resample, for reference
+        results[f"timeframes.pandas_resample.{timeframe}[{len(base)} bars]"] = measure(
+            lambda timeframe=timeframe: _pandas_resample(base, timeframe),
+            repeat=3 if quick else 10,
+            items=len(base),
+        )
+
+    # A refresh cycle: the last day of 5m bars arrives, every cached
+    # timeframe is brought up to date
+    def cached_store():
+        store = BarStore("5m")
+        store.merge("AAPL", history)
+        for timeframe in TIMEFRAMES:
+            store.bars("AAPL", timeframe)
+        return store
+
+    store = cached_store()
+    results["timeframes.bar_store.merge[1 day, 4 timeframes]"] = measure(
+        lambda: store.merge("AAPL", latest),
+        repeat=3 if quick else 10,
+        number=10,
+        items=len(latest),
+    )
+    results["timeframes.full_rebuild[4 timeframes]"] = measure(
+        lambda: [resample(base, timeframe, exchange) for timeframe in TIMEFRAMES],
+        repeat=3 if quick else 10,
+        items=len(base),
+    )
+    # The point of the bar store: a refresh costs the new bars, not the history
+    merge = results["timeframes.bar_store.merge[1 day, 4 timeframes]"]["median_s"]
+    rebuild = results["timeframes.full_rebuild[4 timeframes]"]["median_s"]
+    assert merge < rebuild, (
+        f"BarStore.merge ({merge * 1e3:.2f}ms) is not faster than rebuilding "
+        f"every timeframe ({rebuild * 1e3:.2f}ms)"
+    )
+    return results
+
+
+def _pandas_resample(df, timeframe):
+    rule = {"15m": "15min", "1h": "60min", "1d": "1D", "1wk": "W-MON"}[timeframe]
+    options = {"label": "left", "closed": "left"} if timeframe == "1wk" else {}
+    if timeframe in ("15m", "1h"):
+        options["offset"] = "9h30min"
+    aggregation = {
+        "Open": "first",
+        "High": "max",
+        "Low": "min",
+        "Close": "last",
+        "Volume": "sum",
+    }
+    return df.resample(rule, **options).agg(aggregation).dropna()
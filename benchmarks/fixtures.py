@@ -0,0 +1,242 @@
+"""
+Offline stand-ins used by the benchmarks: synthetic OHLCV data, a fake
+yfinance provider, temporary databases and a local RSS/article server
+"""
+
+import os
+import random
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, Optional, Sequence
+from urllib.parse import parse_qs, urlparse
+import numpy as np
+import pandas as pd
+from db.basedb import BaseDB
+from db.postgresql import PostgreSQLDB
+from db.sqlite import SQLiteDB
+from services.market_data import MarketDataProvider
+
+PERIOD_BARS = {"1mo": 21, "3mo": 63, "6mo": 126, "1y": 252, "5y": 1260}
+
+
+def synthetic_ohlcv(
+    bars: int, seed: int = 0, end: Optional[datetime] = None, freq: str = "B"
+) -> pd.DataFrame:
+    """Random-walk OHLCV frame shaped like yfinance's Ticker.history output"""
+    rng = np.random.default_rng(seed)
+    end = end or datetime(2026, 1, 2)
+    index = pd.date_range(end=end, periods=bars, freq=freq, tz="America/New_York")
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, bars)))
+    spread = np.abs(rng.normal(0, 0.01, bars)) * close
+    open_ = close + rng.normal(0, 0.005, bars) * close
+    return pd.DataFrame(
+        {
+            "Open": open_,
+            "High": np.maximum(open_, close) + spread,
+            "Low": np.minimum(open_, close) - spread,
+            "Close": close,
+            "Volume": rng.integers(1_000_000, 10_000_000, bars).astype("int64"),
+            "Dividends": 0.0,
+            "Stock Splits": 0.0,
+        },
+        index=index,
+    )
+
+
+class FakeYFinanceProvider(MarketDataProvider):
+    """
+    Deterministic per-symbol history without network access
+
+    Args:
+        latency: Seconds each history call blocks, like a real download
+        error_rate: Probability that a call raises
+        signal_ratio: Fraction of symbols whose last bars sell off hard
+            enough to push RSI below 30
+    """
+
+    def __init__(
+        self, latency: float = 0.0, error_rate: float = 0.0, signal_ratio: float = 0.0
+    ):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.signal_ratio = signal_ratio
+        self.calls = 0
+        self._random = random.Random(0)
+
+    def history(
+        self, symbol: str, period: str = "3mo", interval: str = "1d"
+    ) -> pd.DataFrame:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self._random.random() < self.error_rate:
+            raise ConnectionError(f"Injected market data failure for {symbol}")
+
+        seed = sum(symbol.encode()) % (2**32)
+        df = synthetic_ohlcv(PERIOD_BARS.get(period, 63), seed=seed)
+        if (seed % 1000) / 1000 < self.signal_ratio:
+            decay = np.linspace(1.0, 0.75, 15)
+            for column in ("Open", "High", "Low", "Close"):
+                df.iloc[-15:, df.columns.get_loc(column)] *= decay
+        return df
+
+    def closes(self, symbols: Sequence[str], period: str = "5d") -> pd.DataFrame:
+        # One request for all symbols, like yfinance.download
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self._random.random() < self.error_rate:
+            raise ConnectionError("Injected market data failure for closes")
+
+        bars = PERIOD_BARS.get(period, 5)
+        return pd.DataFrame(
+            {
+                symbol: synthetic_ohlcv(bars, seed=sum(symbol.encode()) % (2**32))[
+                    "Close"
+                ]
+                for symbol in symbols
+            }
+        )
+
+
+@contextmanager
+def temporary_sqlite() -> Iterator[BaseDB]:
+    with tempfile.TemporaryDirectory() as directory:
+        db = SQLiteDB(os.path.join(directory, "bench.db"))
+        db.setup_database()
+        try:
+            yield db
+        finally:
+            db.close()
+
+
+@contextmanager
+def temporary_postgresql() -> Iterator[Optional[BaseDB]]:
+    """
+    Fresh PostgreSQL schema inside the database given by BENCH_PSQL_* env vars
+
+    Yields None when no benchmark database is configured.
+    """
+    config = {
+        key: os.environ.get(f"BENCH_PSQL_{key.upper()}")
+        for key in ("host", "port", "database", "user", "password")
+    }
+    if not config["database"]:
+        yield None
+        return
+
+    schema = f"bench_{os.getpid()}"
+    db = PostgreSQLDB(
+        {key: value for key, value in config.items() if value is not None}
+    )
+    with db.transaction() as cursor:
+        cursor.execute(f"CREATE SCHEMA {schema}")
+        cursor.execute(f"SET search_path TO {schema}")
+    db.setup_database()
+    try:
+        yield db
+    finally:
+        with db.transaction() as cursor:
+            cursor.execute(f"DROP SCHEMA {schema} CASCADE")
+        db.close()
+
+
+class LocalNewsServer:
+    """
+    Threaded HTTP server serving a Google News style RSS feed and articles
+
+    GET /rss?q=<keyword> returns `articles` items published in the last day,
+    GET /article/<keyword>/<n> returns a small article page.
+    """
+
+    def __init__(
+        self, articles: int = 5, latency: float = 0.0, error_rate: float = 0.0
+    ):
+        self.articles = articles
+        self.latency = latency
+        self.error_rate = error_rate
+        self._random = random.Random(0)
+        self.requests: Dict[str, int] = {"rss": 0, "article": 0}
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def feed_url(self) -> str:
+        return self.base_url + "/rss?q={query}"
+
+    def rss(self, keyword: str) -> str:
+        now = datetime.now(timezone.utc)
+        items = "".join(
+            f"""<item>
+                <title>{keyword} headline {n}</title>
+                <link>{self.base_url}/article/{keyword}/{n}</link>
+                <pubDate>{format_datetime(now - timedelta(hours=n), usegmt=True)}</pubDate>
+            </item>"""
+            for n in range(self.articles)
+        )
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            f'<rss version="2.0"><channel><title>{keyword}</title>{items}</channel></rss>'
+        )
+
+    @staticmethod
+    def article(keyword: str, n: str) -> str:
+        body = " ".join(f"{keyword} paragraph {i} of article {n}." for i in range(40))
+        return (
+            f"<html><head><title>{keyword} headline {n}</title></head>"
+            f"<body><article><h1>{keyword} headline {n}</h1><p>{body}</p></article>"
+            "</body></html>"
+        )
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if server.latency:
+                    time.sleep(server.latency)
+                if server._random.random() < server.error_rate:
+                    self.send_error(503)
+                    return
+                url = urlparse(self.path)
+                if url.path == "/rss":
+                    server.requests["rss"] += 1
+                    keyword = parse_qs(url.query).get("q", [""])[0]
+                    self._reply(server.rss(keyword), "application/rss+xml")
+                elif url.path.startswith("/article/"):
+                    server.requests["article"] += 1
+                    _, _, keyword, n = url.path.split("/", 3)
+                    self._reply(server.article(keyword, n), "text/html")
+                else:
+                    self.send_error(404)
+
+            def _reply(self, body: str, content_type: str):
+                data = body.encode()
+                self.send_response(200)
+                self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self) -> "LocalNewsServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
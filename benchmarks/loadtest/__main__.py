@@ -0,0 +1,254 @@
+"""
+Load test: run the real StockAlertBot cycles against local stand-ins
+
+    python -m benchmarks.loadtest --symbols 10,100,500 --keywords 5,50 --chats 1,20
+
+Each step seeds a temporary SQLite database with the requested number of
+portfolio symbols and watched keywords, subscribes the requested number
+of extra chats to all of them, then times check_alerts and
+check_news against a fake Telegram Bot API server, a fake yfinance
+provider and a local RSS/article server. The report lists cycle duration,
+per-stage latency percentiles, throughput and peak memory, and flags
+cycles that would overrun their job interval.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from itertools import product
+from typing import Dict, List
+import matplotlib
+
+matplotlib.use("Agg")
+
+from telegram.ext import CallbackContext
+from benchmarks.fixtures import FakeYFinanceProvider, LocalNewsServer
+from benchmarks.loadtest.fake_telegram import FakeTelegramServer
+from benchmarks.loadtest.stages import StageRecorder
+from bot.stock_alert_bot import StockAlertBot
+from config.settings import Settings
+from db.rows import SUBSCRIPTION_KEYWORD, SUBSCRIPTION_SYMBOL
+from db.sqlite import SQLiteDB
+from services.news_service import NewsService
+from services.stock_service import StockService
+from utils.fetch_scheduler import FetchScheduler, HostLimits
+
+ALERT_INTERVAL = 600
+NEWS_INTERVAL = 3600
+CHAT_ID = 1000
+
+
+def _settings(db_path: str, telegram_url: str) -> Settings:
+    return Settings(
+        TELEGRAM_TOKEN="123456:LOADTEST",
+        TELEGRAM_CHAT_ID=str(CHAT_ID),
+        TELEGRAM_API_BASE_URL=telegram_url,
+        DB_TYPE="sqlite",
+        SQLITE_DB_NAME=db_path,
+        PSQL_DB_HOST=None,
+        PSQL_DB_PORT=None,
+        PSQL_DB_DATABASE=None,
+        PSQL_DB_USER=None,
+        PSQL_DB_PASSWORD=None,
+        # Every cycle should check every symbol regardless of the clock
+        MARKET_HOURS_ENABLED=False,
+    )
+
+
+def _seed(db: SQLiteDB, symbols: int, keywords: int, chats: int) -> None:
+    tickers = [f"SYM{i:05d}" for i in range(symbols)]
+    terms = [f"keyword{i:05d}" for i in range(keywords)]
+    with db.transaction() as cursor:
+        cursor.executemany(
+            "INSERT INTO portfolio (ticker, quantity) VALUES (?, ?)",
+            [(ticker, 10) for ticker in tickers],
+        )
+    for term in terms:
+        db.add_to_watched_keywords(term)
+    # The default chat gets the portfolio and watchlist; every other chat
+    # subscribes to all symbols and keywords
+    for chat_id in range(CHAT_ID + 1, CHAT_ID + chats):
+        for ticker in tickers:
+            db.add_subscription(chat_id, SUBSCRIPTION_SYMBOL, ticker)
+        for term in terms:
+            db.add_subscription(chat_id, SUBSCRIPTION_KEYWORD, term)
+
+
+def _instrument(recorder: StageRecorder, bot: StockAlertBot, app) -> None:
+    recorder.wrap(bot.stock_service.provider, "history", "fetch")
+    recorder.wrap(bot.stock_service, "calculate_rsi", "indicator")
+    recorder.wrap(bot.stock_service, "generate_rsi_chart", "render")
+    for method in (
+        "get_symbols",
+        "get_watched_keywords",
+        "get_subscriptions",
+        "check_duplicate_alert",
+    ):
+        recorder.wrap(bot.db, method, "db")
+    recorder.wrap(bot.news_service, "get_news", "news")
+    for method in ("send_photo", "send_message", "send_media_group"):
+        recorder.wrap(app.bot, method, "send")
+
+
+async def _timed_cycle(job, context, recorder: StageRecorder) -> dict:
+    recorder.reset()
+    tracemalloc.reset_peak()
+    started = time.perf_counter()
+    await job(context)
+    duration = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    return {
+        "duration_s": duration,
+        "peak_traced_bytes": peak,
+        "stages": recorder.summary(),
+    }
+
+
+async def run_step(args, symbols: int, keywords: int, chats: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp, FakeTelegramServer(
+        args.telegram_latency, args.telegram_flood_rate
+    ) as telegram, LocalNewsServer(
+        args.articles, args.news_latency, args.news_error_rate
+    ) as news_server:
+        db_path = os.path.join(tmp, "loadtest.db")
+        db = SQLiteDB(db_path)
+        db.setup_database()
+        _seed(db, symbols, keywords, chats)
+
+        provider = FakeYFinanceProvider(
+            args.market_latency, args.market_error_rate, args.signal_ratio
+        )
+        # Upstream rate limits are left to --fetch-rate so the default run
+        # measures the bot itself
+        fetcher = FetchScheduler(
+            HostLimits(args.fetch_rate, max(1, int(args.fetch_rate)), 4),
+            backoff_base=0.1,
+        )
+        bot = StockAlertBot(
+            _settings(db_path, telegram.base_url),
+            db,
+            StockService(provider, fetcher),
+            NewsService(
+                cache_file=os.path.join(tmp, "returned_news.txt"),
+                feed_url=news_server.feed_url,
+                fetcher=fetcher,
+            ),
+        )
+        app = bot.build_application()
+        await app.initialize()
+        app.bot_data["chat_id"] = CHAT_ID
+        context = CallbackContext(app)
+
+        recorder = StageRecorder()
+        _instrument(recorder, bot, app)
+
+        tracemalloc.start()
+        cycles = {"check_alerts": [], "check_news": []}
+        for _ in range(args.cycles):
+            cycles["check_alerts"].append(
+                await _timed_cycle(bot.check_alerts, context, recorder)
+            )
+            cycles["check_news"].append(
+                await _timed_cycle(bot.check_news, context, recorder)
+            )
+        tracemalloc.stop()
+
+        bot.alert_buffer.close()
+        await bot.news_service.close()
+        await app.shutdown()
+        db.close()
+
+        first_alerts = cycles["check_alerts"][0]["duration_s"]
+        first_news = cycles["check_news"][0]["duration_s"]
+        return {
+            "symbols": symbols,
+            "keywords": keywords,
+            "chats": chats,
+            "cycles": cycles,
+            "symbols_per_s": symbols / first_alerts if first_alerts else None,
+            "keywords_per_s": keywords / first_news if first_news else None,
+            "alerts_overrun": first_alerts > ALERT_INTERVAL,
+            "news_overrun": first_news > NEWS_INTERVAL,
+            "telegram_calls": dict(telegram.calls),
+            "telegram_chats": len(telegram.chats),
+            "telegram_floods": telegram.floods,
+            "market_calls": provider.calls,
+            "news_requests": dict(news_server.requests),
+            "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        }
+
+
+def _print_step(step: dict) -> None:
+    print(
+        f"symbols={step['symbols']} keywords={step['keywords']} "
+        f"chats={step['chats']} sent={step['telegram_calls']} "
+        f"to {step['telegram_chats']} chats floods={step['telegram_floods']} "
+        f"max_rss={step['max_rss_kb'] / 1024:.0f}MB"
+    )
+    for job, runs in step["cycles"].items():
+        for n, cycle in enumerate(runs):
+            overrun = cycle["duration_s"] > (
+                ALERT_INTERVAL if job == "check_alerts" else NEWS_INTERVAL
+            )
+            print(
+                f"  {job}#{n} {cycle['duration_s']:8.2f}s "
+                f"peak={cycle['peak_traced_bytes'] / 2**20:.1f}MB"
+                f"{'  OVERRUN' if overrun else ''}"
+            )
+            for stage, stats in cycle["stages"].items():
+                print(
+                    f"    {stage:<10} n={stats['count']:<6} "
+                    f"p50={stats['p50_s'] * 1e3:8.2f}ms "
+                    f"p95={stats['p95_s'] * 1e3:8.2f}ms "
+                    f"p99={stats['p99_s'] * 1e3:8.2f}ms"
+                )
+
+
+def _counts(value: str) -> List[int]:
+    return [int(part) for part in value.split(",")]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.loadtest")
+    parser.add_argument("--symbols", type=_counts, default=[10, 100])
+    parser.add_argument("--keywords", type=_counts, default=[5])
+    parser.add_argument("--chats", type=_counts, default=[1])
+    parser.add_argument("--cycles", type=int, default=1)
+    parser.add_argument("--articles", type=int, default=5)
+    parser.add_argument("--signal-ratio", type=float, default=0.2)
+    parser.add_argument("--market-latency", type=float, default=0.0)
+    parser.add_argument("--market-error-rate", type=float, default=0.0)
+    parser.add_argument("--news-latency", type=float, default=0.0)
+    parser.add_argument("--news-error-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--fetch-rate", type=float, default=1000.0, help="upstream requests/s per host"
+    )
+    parser.add_argument("--telegram-latency", type=float, default=0.0)
+    parser.add_argument("--telegram-flood-rate", type=float, default=0.0)
+    parser.add_argument("--output", help="write the JSON report to this path")
+    args = parser.parse_args()
+
+    # Per-symbol INFO logs would dominate the measurements
+    logging.disable(logging.INFO)
+
+    steps: List[Dict] = []
+    for symbols, keywords, chats in product(args.symbols, args.keywords, args.chats):
+        step = asyncio.run(run_step(args, symbols, keywords, chats))
+        _print_step(step)
+        steps.append(step)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"args": vars(args), "steps": steps}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""Minimal stand-in for the Telegram Bot API used by the load tests"""
+
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "Load", "username": "load_bot"}
+PHOTO = [{"file_id": "photo", "file_unique_id": "photo", "width": 1, "height": 1}]
+CHAT_ID_FIELD = re.compile(rb'name="chat_id"\r\n\r\n([^\r]+)')
+
+
+class FakeTelegramServer:
+    """
+    Threaded HTTP server answering Bot API calls at /bot<token>/<method>
+
+    Args:
+        latency: Seconds to wait before answering each call
+        flood_rate: Probability of answering 429 with retry_after
+        retry_after: retry_after seconds reported on 429 answers
+    """
+
+    def __init__(
+        self, latency: float = 0.0, flood_rate: float = 0.0, retry_after: int = 1
+    ):
+        self.latency = latency
+        self.flood_rate = flood_rate
+        self.retry_after = retry_after
+        self.calls: Counter = Counter()
+        self.chats: Counter = Counter()
+        self.floods = 0
+        self._message_id = 0
+        self._lock = threading.Lock()
+        self._random = random.Random(0)
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _message(self, chat_id: str, method: str) -> dict:
+        with self._lock:
+            self._message_id += 1
+            message_id = self._message_id
+        message = {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": int(chat_id or 0), "type": "private"},
+        }
+        if method in ("sendPhoto", "sendMediaGroup"):
+            message["photo"] = PHOTO
+        else:
+            message["text"] = "ok"
+        return message
+
+    def _result(self, method: str, chat_id: str, body: bytes):
+        if method == "getMe":
+            return BOT_USER
+        if method == "sendMediaGroup":
+            items = max(
+                1, body.count(b'"type": "photo"') + body.count(b'"type":"photo"')
+            )
+            return [self._message(chat_id, method) for _ in range(items)]
+        if method.startswith("send"):
+            return self._message(chat_id, method)
+        return True
+
+    @staticmethod
+    def _chat_id(headers, body: bytes) -> str:
+        content_type = headers.get("Content-Type", "")
+        if content_type.startswith("multipart/"):
+            match = CHAT_ID_FIELD.search(body)
+            return match.group(1).decode() if match else ""
+        if content_type.startswith("application/json"):
+            return str(json.loads(body or b"{}").get("chat_id", ""))
+        return parse_qs(body.decode()).get("chat_id", [""])[0]
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                method = self.path.rsplit("/", 1)[-1]
+                chat_id = server._chat_id(self.headers, body)
+                if server.latency:
+                    time.sleep(server.latency)
+
+                with server._lock:
+                    server.calls[method] += 1
+                    flood = (
+                        method.startswith("send")
+                        and server._random.random() < server.flood_rate
+                    )
+                    if flood:
+                        server.floods += 1
+                    elif chat_id:
+                        server.chats[chat_id] += 1
+
+                if flood:
+                    self._reply(
+                        429,
+                        {
+                            "ok": False,
+                            "error_code": 429,
+                            "description": f"Too Many Requests: retry after {server.retry_after}",
+                            "parameters": {"retry_after": server.retry_after},
+                        },
+                    )
+                    return
+                self._reply(
+                    200, {"ok": True, "result": server._result(method, chat_id, body)}
+                )
+
+            do_GET = do_POST
+
+            def _reply(self, status: int, payload: dict):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self) -> "FakeTelegramServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
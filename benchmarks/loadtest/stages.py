@@ -0,0 +1,63 @@
+import asyncio
+import functools
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+
+def percentile(samples: List[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+class StageRecorder:
+    """Collect wall-clock latencies of wrapped calls grouped by stage"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+
+    def wrap(self, obj, attr: str, stage: str) -> None:
+        original = getattr(obj, attr)
+        samples = self.samples[stage]
+
+        if asyncio.iscoroutinefunction(original):
+
+            @functools.wraps(original)
+            async def timed(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await original(*args, **kwargs)
+                finally:
+                    samples.append(time.perf_counter() - started)
+
+        else:
+
+            @functools.wraps(original)
+            def timed(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return original(*args, **kwargs)
+                finally:
+                    samples.append(time.perf_counter() - started)
+
+        object.__setattr__(obj, attr, timed)
+
+    def reset(self) -> None:
+        for samples in self.samples.values():
+            samples.clear()
+
+    def summary(self) -> Dict[str, dict]:
+        return {
+            stage: {
+                "count": len(samples),
+                "total_s": sum(samples),
+                "p50_s": percentile(samples, 0.50),
+                "p95_s": percentile(samples, 0.95),
+                "p99_s": percentile(samples, 0.99),
+                "max_s": max(samples, default=0.0),
+            }
+            for stage, samples in self.samples.items()
+            if samples
+        }
@@ -0,0 +1,127 @@
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+
+def measure(
+    fn: Callable[[], object],
+    repeat: int = 5,
+    number: int = 1,
+    warmup: int = 1,
+    items: Optional[int] = None,
+) -> dict:
+    """
+    Time fn and summarize seconds per call
+
+    Args:
+        fn: Zero-argument callable to benchmark
+        repeat: Number of timed samples
+        number: Calls per sample
+        warmup: Untimed calls before sampling
+        items: Work items per call, used to report throughput
+
+    Returns:
+        Dict with min/median/mean/p95 seconds per call and optional items/s
+    """
+    for _ in range(warmup):
+        fn()
+
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - started) / number)
+
+    samples.sort()
+    result = {
+        "min_s": samples[0],
+        "median_s": statistics.median(samples),
+        "mean_s": statistics.fmean(samples),
+        "p95_s": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "repeat": repeat,
+        "number": number,
+    }
+    if items:
+        result["items_per_s"] = items / result["median_s"]
+    return result
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def write_results(results: Dict[str, dict], path: str) -> None:
+    payload = {
+        "meta": {
+            "revision": git_revision(),
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=2, sort_keys=True)
+
+
+# Metrics compared between runs, lower is better, with how to print them
+COMPARED = (
+    ("median_s", lambda value: f"{value * 1e3:>10.3f}ms"),
+    ("bytes_per_symbol", lambda value: f"{value:>10.0f}B "),
+    ("bytes_per_row", lambda value: f"{value:>10.0f}B "),
+)
+
+
+def compare(baseline_path: str, candidate_path: str, threshold: float) -> bool:
+    """
+    Print median-time and memory ratios between two result files
+
+    Returns:
+        True if no benchmark regressed by more than threshold (0.1 = 10%)
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    with open(candidate_path) as f:
+        candidate = json.load(f)
+
+    print(
+        f"baseline {baseline['meta']['revision']} -> "
+        f"candidate {candidate['meta']['revision']}"
+    )
+    ok = True
+    for name in sorted(set(baseline["results"]) | set(candidate["results"])):
+        old_result = baseline["results"].get(name, {})
+        new_result = candidate["results"].get(name, {})
+        rows = 0
+        for metric, fmt in COMPARED:
+            old = old_result.get(metric)
+            new = new_result.get(metric)
+            if old is None or new is None:
+                continue
+            ratio = new / old if old else 1.0
+            flag = ""
+            if ratio > 1 + threshold:
+                flag = "  REGRESSION"
+                ok = False
+            elif ratio < 1 - threshold:
+                flag = "  faster" if metric == "median_s" else "  smaller"
+            label = name if metric == "median_s" else f"{name} memory"
+            print(f"  {label:<48} {fmt(old)} {fmt(new)} x{ratio:.2f}{flag}")
+            rows += 1
+        if not rows:
+            print(f"  {name:<48} {'only in one run':>24}")
+    return ok
@@ -0,0 +1,316 @@
+import asyncio
+import io
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Dict, List, Optional, Union
+from telegram import Bot, InputMediaPhoto
+from telegram.error import BadRequest, Forbidden, RetryAfter
+from utils.logger import setup_logger
+from utils.metrics import ALERTS_SENT, QUEUE_DEPTH, TELEGRAM_REQUESTS
+from utils.rate_limit import TokenBucket
+
+# Telegram limits: 10 photos per media group, 1024 characters per media
+# caption and 4096 characters per text message
+MEDIA_GROUP_SIZE = 10
+CAPTION_LIMIT = 1024
+MESSAGE_LIMIT = 4096
+DIGEST_SEPARATOR = "\n\n"
+
+
+@dataclass
+class OutboxPhoto:
+    photo: bytes
+    caption: str
+    alert_type: Optional[str] = None
+    # Flushes whose call for this item failed
+    failures: int = 0
+
+
+@dataclass
+class OutboxMessage:
+    text: str
+    alert_type: Optional[str] = None
+    failures: int = 0
+
+
+@dataclass
+class _ChatQueue:
+    photos: List[OutboxPhoto] = field(default_factory=list)
+    messages: List[OutboxMessage] = field(default_factory=list)
+    since: Optional[float] = None
+
+
+class TelegramOutbox:
+    """
+    Outbound message queue for job notifications
+
+    Jobs enqueue photos and messages during a cycle and flush at the end.
+    Per chat, queued photos go out as media groups of up to 10 and queued
+    messages are joined into digests of up to 4096 characters, longer
+    messages being split. Every API call waits for the global and the
+    per-chat token bucket, and a 429 RetryAfter is waited out and retried.
+    The items of a call that still fails go back to the front of the chat's
+    queue for the next flush, unless Telegram rejected the request.
+
+    Args:
+        global_rate: API calls per second across all chats
+        chat_rate: API calls per second to one chat
+        chat_burst: Calls a chat may receive back to back
+        max_delay: Age after which flush_if_due sends a chat's queue
+        max_retries: RetryAfter retries per API call
+        max_resends: Flushes that may send an item again after a failed call
+    """
+
+    def __init__(
+        self,
+        global_rate: float = 25.0,
+        chat_rate: float = 1.0,
+        chat_burst: int = 3,
+        max_delay: float = 10.0,
+        max_retries: int = 3,
+        max_resends: int = 3,
+    ):
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_delay = max_delay
+        self.max_retries = max_retries
+        self.max_resends = max_resends
+        self._queues: Dict[Union[int, str], _ChatQueue] = defaultdict(_ChatQueue)
+        self._chat_buckets: Dict[Union[int, str], TokenBucket] = {}
+        self._chat_locks: Dict[Union[int, str], asyncio.Lock] = defaultdict(
+            asyncio.Lock
+        )
+        self.logger = setup_logger("bot.outbox")
+
+    def pending(self) -> int:
+        return sum(
+            len(queue.photos) + len(queue.messages) for queue in self._queues.values()
+        )
+
+    def _queue(self, chat_id: Union[int, str]) -> _ChatQueue:
+        queue = self._queues[chat_id]
+        if queue.since is None:
+            queue.since = time.monotonic()
+        return queue
+
+    def add_photo(
+        self,
+        chat_id: Union[int, str],
+        photo: Union[bytes, io.BytesIO],
+        caption: str,
+        alert_type: Optional[str] = None,
+    ) -> None:
+        if isinstance(photo, io.BytesIO):
+            # Keep bytes so a retried request can send the photo again
+            photo = photo.getvalue()
+        self._queue(chat_id).photos.append(OutboxPhoto(photo, caption, alert_type))
+        QUEUE_DEPTH.set(self.pending(), queue="telegram_outbox")
+
+    def add_message(
+        self, chat_id: Union[int, str], text: str, alert_type: Optional[str] = None
+    ) -> None:
+        self._queue(chat_id).messages.append(OutboxMessage(text, alert_type))
+        QUEUE_DEPTH.set(self.pending(), queue="telegram_outbox")
+
+    async def flush_if_due(self, bot: Bot) -> int:
+        """Send the queues of chats whose oldest item has waited max_delay"""
+        now = time.monotonic()
+        due = [
+            chat_id
+            for chat_id, queue in self._queues.items()
+            if queue.since is not None and now - queue.since >= self.max_delay
+        ]
+        return await self._flush_chats(bot, due)
+
+    async def flush(self, bot: Bot) -> int:
+        """
+        Send everything queued
+
+        Returns:
+            Number of API calls made
+        """
+        return await self._flush_chats(bot, list(self._queues))
+
+    async def _flush_chats(self, bot: Bot, chat_ids: List[Union[int, str]]) -> int:
+        # Chats are independent, so send to them concurrently
+        calls = await asyncio.gather(
+            *(self._flush_chat(bot, chat_id) for chat_id in chat_ids)
+        )
+        QUEUE_DEPTH.set(self.pending(), queue="telegram_outbox")
+        return sum(calls)
+
+    async def _flush_chat(self, bot: Bot, chat_id: Union[int, str]) -> int:
+        async with self._chat_locks[chat_id]:
+            queue = self._queues.pop(chat_id, None)
+            if queue is None:
+                return 0
+
+            calls = 0
+            failed = _ChatQueue()
+            for start in range(0, len(queue.photos), MEDIA_GROUP_SIZE):
+                group = queue.photos[start : start + MEDIA_GROUP_SIZE]
+                sent = await self._send_photos(bot, chat_id, group)
+                if sent:
+                    self._count_alerts(group)
+                elif sent is None:
+                    failed.photos.extend(group)
+                calls += 1
+            for digest in self._digests(queue.messages):
+                sent = await self._send_digest(bot, chat_id, digest)
+                if sent:
+                    self._count_alerts(digest)
+                elif sent is None:
+                    failed.messages.extend(digest)
+                calls += 1
+            self._requeue(chat_id, failed)
+            return calls
+
+    def _requeue(self, chat_id: Union[int, str], failed: _ChatQueue) -> None:
+        """
+        Put the items of failed calls back in front of those queued since,
+        dropping items that failed max_resends times already
+        """
+        photos = [item for item in failed.photos if self._resendable(item)]
+        messages = [item for item in failed.messages if self._resendable(item)]
+        dropped = (
+            len(failed.photos) + len(failed.messages) - len(photos) - len(messages)
+        )
+        if dropped:
+            self.logger.error(
+                f"❌ Dropping {dropped} items to {chat_id} "
+                f"after {self.max_resends} failed resends"
+            )
+        if photos or messages:
+            queue = self._queue(chat_id)
+            queue.photos[:0] = photos
+            queue.messages[:0] = messages
+
+    def _resendable(self, item: Union[OutboxPhoto, OutboxMessage]) -> bool:
+        item.failures += 1
+        return item.failures <= self.max_resends
+
+    async def _send_photos(
+        self, bot: Bot, chat_id: Union[int, str], group: List[OutboxPhoto]
+    ) -> Optional[bool]:
+        if len(group) == 1:
+            return await self._call(
+                "send_photo",
+                bot.send_photo,
+                chat_id=chat_id,
+                photo=group[0].photo,
+                caption=group[0].caption[:CAPTION_LIMIT],
+            )
+        return await self._call(
+            "send_media_group",
+            bot.send_media_group,
+            chat_id=chat_id,
+            media=[
+                InputMediaPhoto(item.photo, caption=item.caption[:CAPTION_LIMIT])
+                for item in group
+            ],
+        )
+
+    async def _send_digest(
+        self, bot: Bot, chat_id: Union[int, str], digest: List[OutboxMessage]
+    ) -> Optional[bool]:
+        return await self._call(
+            "send_message",
+            bot.send_message,
+            chat_id=chat_id,
+            text=DIGEST_SEPARATOR.join(item.text for item in digest),
+            disable_web_page_preview=False,
+        )
+
+    @classmethod
+    def _digests(cls, messages: List[OutboxMessage]) -> List[List[OutboxMessage]]:
+        """Group messages into digests that fit one Telegram message"""
+        digests: List[List[OutboxMessage]] = []
+        length = 0
+        for message in messages:
+            for part in cls._split(message):
+                added = len(part.text) + (len(DIGEST_SEPARATOR) if length else 0)
+                if not digests or length + added > MESSAGE_LIMIT:
+                    digests.append([])
+                    length, added = 0, len(part.text)
+                digests[-1].append(part)
+                length += added
+        return digests
+
+    @staticmethod
+    def _split(message: OutboxMessage) -> List[OutboxMessage]:
+        """
+        message in parts that fit one Telegram message, cut at line breaks
+        where possible; the alert is counted with the first part
+        """
+        text = message.text
+        if len(text) <= MESSAGE_LIMIT:
+            return [message]
+        parts = []
+        while len(text) > MESSAGE_LIMIT:
+            cut = text.rfind("\n", 0, MESSAGE_LIMIT + 1)
+            if cut <= 0:
+                cut = MESSAGE_LIMIT
+            parts.append(text[:cut])
+            text = text[cut:].lstrip("\n")
+        if text:
+            parts.append(text)
+        return [
+            OutboxMessage(part, message.alert_type if not index else None)
+            for index, part in enumerate(parts)
+        ]
+
+    def _chat_bucket(self, chat_id: Union[int, str]) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = TokenBucket(
+                self.chat_rate, self.chat_burst
+            )
+        return bucket
+
+    async def _call(self, method: str, send, **kwargs) -> Optional[bool]:
+        """
+        Make one API call, waiting out RetryAfter
+
+        Returns:
+            True once sent, False if Telegram rejected the request (sending
+            it again would fail the same way), None if a later flush may
+            succeed
+        """
+        chat_id = kwargs["chat_id"]
+        for attempt in range(self.max_retries + 1):
+            await self._chat_bucket(chat_id).acquire()
+            await self.global_bucket.acquire()
+            try:
+                await send(**kwargs)
+                TELEGRAM_REQUESTS.inc(method=method, result="success")
+                return True
+            except RetryAfter as e:
+                TELEGRAM_REQUESTS.inc(method=method, result="retry_after")
+                retry_after = e.retry_after
+                if isinstance(retry_after, timedelta):
+                    retry_after = retry_after.total_seconds()
+                if attempt == self.max_retries:
+                    break
+                self.logger.warning(
+                    f"Flood limit on {method} to {chat_id}, retrying in {retry_after}s"
+                )
+                await asyncio.sleep(retry_after)
+            except (BadRequest, Forbidden) as e:
+                TELEGRAM_REQUESTS.inc(method=method, result="failure")
+                self.logger.error(f"❌ {method} to {chat_id} rejected: {str(e)}")
+                return False
+            except Exception as e:
+                TELEGRAM_REQUESTS.inc(method=method, result="failure")
+                self.logger.error(f"❌ {method} to {chat_id} failed: {str(e)}")
+                return None
+        self.logger.error(f"❌ {method} to {chat_id} still flood limited")
+        return None
+
+    @staticmethod
+    def _count_alerts(items) -> None:
+        for item in items:
+            if item.alert_type:
+                ALERTS_SENT.inc(alert_type=item.alert_type)
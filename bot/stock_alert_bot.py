@@ -1,21 +1,184 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import re
+import signal
+import time
 import traceback
-from telegram.ext import ApplicationBuilder, CommandHandler, ContextTypes
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Set, Tuple, Union
+from telegram.ext import Application, ApplicationBuilder, CommandHandler, ContextTypes
 from telegram import Update
 from services.stock_service import StockService
-from services.news_service import NewsService
+from services.news_service import BROWSER_HOST, NewsService
+from services.alert_scheduler import MarketHoursScheduler
+from services.backtest import STRATEGIES, BacktestReport, backtest
+from services.live_indicators import LiveSignals
+from services.market_calendar import add_holidays, exchange_for
+from services.quote_stream import (
+    QuoteStream,
+    StreamUnavailableError,
+    create_quote_stream,
+)
+from services.portfolio import PortfolioValuation, value_portfolio
+from services.quotes import QuoteCache
+from services.timeframes import BarStore, bucket_start, validate_timeframe
+from services.rules import (
+    RESERVED,
+    ExpressionPool,
+    RuleSet,
+    RuleSyntaxError,
+    build_panel,
+)
 from db.basedb import BaseDB
-from utils.logger import setup_logger
+from db import psql_config
+from db.buffer import AlertWriteBuffer
+from db.coordination import WorkerCoordinator
+from db.models import AlertCursor
+from db.rows import (
+    SUBSCRIPTION_KEYWORD,
+    SUBSCRIPTION_SYMBOL,
+    AlertRuleRow,
+    SubscriptionRow,
+)
+from bot.outbox import TelegramOutbox
+from utils.fetch_scheduler import CircuitOpenError, FetchScheduler, HostLimits, Priority
+from utils.job_runner import JobRunner
+from utils.logger import log_context, setup_logger
+from utils.metrics import CACHE_HITS, STAGE_DURATION, start_metrics_server
+from utils.singleflight import SingleFlight, TTLCache
+from utils.snapshot import Section, read_snapshot, write_snapshot
 from config.settings import Settings
-import pandas as pd
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 class StockAlertBot:
-    def __init__(self, settings: Settings, db: BaseDB):
+    HISTORY_PAGE_SIZE = 10
+    BACKTEST_MAX_SYMBOLS = 20
+    # Bars a position is held for when backtesting a rule without an exit
+    BACKTEST_HOLD_BARS = 5
+    QUOTE_MAX_SYMBOLS = 20
+    # Positions listed in /portfolio, largest first; the totals cover all
+    PORTFOLIO_MAX_LINES = 30
+    CHART_KINDS = ("price", "rsi", "macd")
+    # Bars of the alert timeframe for RSI and for alert charts
+    ALERT_BARS = 21
+    CHART_BARS = 63
+
+    def __init__(
+        self,
+        settings: Settings,
+        db: BaseDB,
+        stock_service: Optional[StockService] = None,
+        news_service: Optional[NewsService] = None,
+        quote_stream: Optional[QuoteStream] = None,
+    ):
         self.settings = settings
         self.db = db
-        self.stock_service = StockService()
-        self.news_service = NewsService()
-        self.logger = setup_logger()
+        self.alert_buffer = AlertWriteBuffer(
+            db,
+            settings.WRITE_BUFFER_MAX_ITEMS,
+            settings.WRITE_BUFFER_MAX_DELAY,
+            shared=settings.WORKER_MODE,
+        )
+        # Set up by run() in worker mode
+        self.coordinator: Optional[WorkerCoordinator] = None
+        self.fetcher = FetchScheduler(
+            HostLimits(
+                settings.FETCH_RATE, settings.FETCH_BURST, settings.FETCH_CONCURRENCY
+            ),
+            {
+                BROWSER_HOST: HostLimits(
+                    settings.FETCH_RATE,
+                    settings.FETCH_BURST,
+                    settings.BROWSER_CONCURRENCY,
+                )
+            },
+            max_attempts=settings.FETCH_MAX_ATTEMPTS,
+            backoff_base=settings.FETCH_BACKOFF_BASE,
+            backoff_max=settings.FETCH_BACKOFF_MAX,
+            failure_threshold=settings.FETCH_BREAKER_THRESHOLD,
+            cool_off=settings.FETCH_BREAKER_COOL_OFF,
+        )
+        # Alerts, rules and charts use bars of one timeframe, aggregated
+        # from the downloaded base interval
+        validate_timeframe(settings.ALERT_TIMEFRAME, settings.BAR_BASE_INTERVAL)
+        self.timeframe = settings.ALERT_TIMEFRAME
+        self.stock_service = stock_service or StockService(
+            fetcher=self.fetcher,
+            bar_store=BarStore(
+                settings.BAR_BASE_INTERVAL,
+                settings.BAR_REFRESH_INTERVAL,
+                settings.BAR_CACHE_DTYPE,
+            ),
+            quote_cache=QuoteCache(settings.QUOTE_CACHE_TTL),
+        )
+        self.news_service = news_service or NewsService(
+            settings.WRITE_BUFFER_MAX_ITEMS,
+            settings.WRITE_BUFFER_MAX_DELAY,
+            fetcher=self.fetcher,
+        )
+        # /chart fetches and renders once per symbol and parameters, however
+        # many chats ask at the same time, and reuses the result for
+        # COMMAND_CACHE_TTL seconds
+        self._history_flight = SingleFlight(
+            "history", TTLCache(settings.COMMAND_CACHE_TTL)
+        )
+        self._chart_flight = SingleFlight("chart", TTLCache(settings.COMMAND_CACHE_TTL))
+        if settings.MARKET_HOLIDAYS_EXTRA:
+            add_holidays(settings.MARKET_HOLIDAYS_EXTRA)
+        self.scheduler = MarketHoursScheduler(
+            enabled=settings.MARKET_HOURS_ENABLED,
+            open_interval=settings.ALERT_OPEN_INTERVAL,
+            edge_interval=settings.ALERT_EDGE_INTERVAL,
+            edge_window=settings.ALERT_EDGE_WINDOW,
+            closed_interval=settings.ALERT_CLOSED_INTERVAL,
+        )
+        self.alert_runner = JobRunner(
+            "check_alerts",
+            settings.ALERT_CYCLE_BUDGET or 0.8 * self.alert_interval,
+        )
+        self.news_runner = JobRunner(
+            "check_news", settings.NEWS_CYCLE_BUDGET or 0.8 * settings.NEWS_INTERVAL
+        )
+        self.outbox = TelegramOutbox(
+            settings.TELEGRAM_GLOBAL_RATE,
+            settings.TELEGRAM_CHAT_RATE,
+            settings.TELEGRAM_CHAT_BURST,
+            settings.OUTBOX_MAX_DELAY,
+        )
+        # Last RSI seen per symbol, used to check likely signals first
+        self._last_rsi: Dict[str, float] = {}
+        if quote_stream is None and settings.STREAM_ENABLED:
+            quote_stream = create_quote_stream(
+                settings.STREAM_PROVIDER,
+                settings.STREAM_REPLAY_FILE,
+                settings.STREAM_REPLAY_SPEED,
+            )
+        self.quote_stream = quote_stream
+        self._stream_task: Optional[asyncio.Task] = None
+        # Streaming state: indicators per symbol, the signal each symbol is
+        # currently in, and the symbols the stream delivers (not polled)
+        self._live: Dict[str, LiveSignals] = {}
+        self._live_action: Dict[str, Optional[str]] = {}
+        self._streamed: Set[str] = set()
+        # Alert rules, compiled again only when the stored rules change, and
+        # whether each (rule id, symbol) held on its last evaluation
+        self._rules: List[AlertRuleRow] = []
+        self._rule_set: Optional[RuleSet] = None
+        self._rule_state: Dict[Tuple[int, str], bool] = {}
+        self.logger = setup_logger("bot")
+
+    @property
+    def alert_interval(self) -> float:
+        # With market hours enabled check_alerts ticks often and the scheduler
+        # picks the symbols that are due
+        if self.settings.MARKET_HOURS_ENABLED:
+            return self.settings.ALERT_TICK_INTERVAL
+        return self.settings.ALERT_OPEN_INTERVAL
 
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         chat_id = update.effective_chat.id
@@ -28,6 +191,19 @@ class StockAlertBot:
             "/remove <keyword> - Remove keyword from watchlist\n"
             "/keywords - View keywords\n"
             "/portfolio - View your portfolio\n"
+            "/history [symbol] [BUY|SELL] [days] - View alert history\n"
+            "/history next - Show the next page of alert history\n"
+            "/subscribe <symbol> - Get alerts for a symbol in this chat\n"
+            "/subscribe news <keyword> - Get news for a keyword in this chat\n"
+            "/unsubscribe <symbol> | news <keyword> - Stop a subscription\n"
+            "/subscriptions - View this chat's subscriptions\n"
+            "/rule add [symbol] <rule> - Alert when a rule holds, e.g. "
+            "RSI(14) < 25 AND CLOSE > SMA(200)\n"
+            "/rule del <id> - Remove a rule\n"
+            "/rules - View this chat's rules\n"
+            "/backtest <symbols> [rsi|macd|#rule] [period] - Backtest a signal\n"
+            "/chart <symbol> [price|rsi|macd] [period] - Chart a symbol\n"
+            "/quote <symbols> - Latest prices\n"
         )
 
     async def add_keyword(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -42,15 +218,133 @@ class StockAlertBot:
                 return
 
             self.db.add_to_watched_keywords(keyword)
-            chart = self.stock_service.generate_chart(
-                keyword, self.stock_service.get_stock_data(keyword)
+        except Exception as e:
+            self.logger.error(f"Failed to add keyword: {str(e)}")
+            await update.message.reply_text(f"Failed to add keyword: {str(e)}")
+            return
+
+        caption = f"📈 Added {keyword} to watchlist."
+        try:
+            chart = await self._chart(keyword)
+        except Exception as e:
+            # News keywords have no price chart
+            self.logger.info(f"No chart for {keyword}: {str(e)}")
+            await update.message.reply_text(caption)
+            return
+        await update.message.reply_photo(photo=chart, caption=caption)
+
+    async def chart_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """
+        Send a price, RSI or MACD chart of a symbol (/chart AAPL rsi 6mo)
+        """
+        parsed = self._parse_chart_args(context.args)
+        if parsed is None:
+            await update.message.reply_text(
+                "Usage: /chart <symbol> [price|rsi|macd] [period]\n"
+                "period like 5d, 6mo, 1y or max (default 3mo)"
             )
+            return
+
+        symbol, kind, period = parsed
+        try:
+            chart = await self._chart(symbol, kind, period)
             await update.message.reply_photo(
-                photo=chart, caption=f"📈 Added {keyword} to watchlist."
+                photo=chart, caption=f"📈 {symbol} {kind} ({period})"
             )
         except Exception as e:
-            self.logger.error(f"Failed to add keyword: {str(e)}")
-            await update.message.reply_text(f"Failed to add keyword: {str(e)}")
+            self.logger.error(f"Failed to chart {symbol}: {str(e)}")
+            await update.message.reply_text(f"Failed to chart {symbol}: {str(e)}")
+
+    async def quote_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """
+        Latest price and day change of one or more symbols (/quote AAPL MSFT)
+        """
+        symbols = list(
+            dict.fromkeys(
+                symbol.upper()
+                for arg in context.args or []
+                for symbol in arg.split(",")
+                if symbol
+            )
+        )
+        if not symbols or len(symbols) > self.QUOTE_MAX_SYMBOLS:
+            await update.message.reply_text(
+                "Usage: /quote <symbol>[,<symbol>...]\n"
+                f"Up to {self.QUOTE_MAX_SYMBOLS} symbols"
+            )
+            return
+
+        try:
+            quotes = await self.stock_service.fetch_quotes(
+                symbols, priority=Priority.INTERACTIVE
+            )
+        except Exception as e:
+            self.logger.error(f"Failed to get quotes: {str(e)}")
+            await update.message.reply_text(f"Failed to get quotes: {str(e)}")
+            return
+        lines = [
+            self._format_quote(symbol, row.price, row.previous_close)
+            for symbol, row in quotes.iterrows()
+        ]
+        await update.message.reply_text("💹 Quotes\n\n" + "\n".join(lines))
+
+    async def _history(self, symbol: str, period: str) -> pd.DataFrame:
+        """
+        Daily bars for a command; concurrent and recent requests for the same
+        symbol and period share one download. The frame is shared, so callers
+        must not modify it.
+        """
+        return await self._history_flight.do(
+            (symbol, period),
+            lambda: self.stock_service.fetch_stock_data(
+                symbol, period, priority=Priority.INTERACTIVE
+            ),
+        )
+
+    async def _chart(
+        self, symbol: str, kind: str = "price", period: str = "3mo"
+    ) -> bytes:
+        """PNG chart of a symbol, rendered once for concurrent and recent requests"""
+
+        async def render() -> bytes:
+            df = await self._history(symbol, period)
+            if df.empty:
+                raise ValueError(f"No price data for {symbol}")
+            generate = {
+                "price": self.stock_service.generate_price_chart,
+                "rsi": self.stock_service.generate_rsi_chart,
+                "macd": self.stock_service.generate_macd_signal_chart,
+            }[kind]
+            chart = generate(symbol, df)
+            if chart is None:
+                raise ValueError(f"Could not render the {kind} chart")
+            return chart.getvalue()
+
+        return await self._chart_flight.do((symbol, kind, period), render)
+
+    def _parse_chart_args(self, args) -> Optional[Tuple[str, str, str]]:
+        """Parse /chart arguments into (symbol, kind, period)"""
+        if not args:
+            return None
+        symbol, kind, period = args[0].upper(), "price", "3mo"
+        for arg in args[1:]:
+            if arg.lower() in self.CHART_KINDS:
+                kind = arg.lower()
+            elif re.fullmatch(r"\d+(d|mo|y)|ytd|max", arg.lower()):
+                period = arg.lower()
+            else:
+                return None
+        return symbol, kind, period
+
+    @staticmethod
+    def _format_quote(symbol: str, price: float, previous_close: float) -> str:
+        """One quote line: last price and change from the previous close"""
+        if math.isnan(price):
+            return f"{symbol}: no data"
+        if math.isnan(previous_close):
+            return f"{symbol}: ${price:.2f}"
+        change = price - previous_close
+        return f"{symbol}: ${price:.2f} ({change:+.2f}, {change / previous_close:+.2%})"
 
     async def remove_keyword(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """
@@ -132,59 +426,673 @@ class StockAlertBot:
             await update.message.reply_text(f"Failed to retrieve watchlist: {str(e)}")
 
     async def get_portfolio(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Get the current portfolio"""
+        """
+        Get the current portfolio, valued at the latest prices; the quotes
+        of all holdings are fetched in one request
+        """
         try:
             portfolio_list = self.db.get_symbols()
-            # Create a formatted message with stock data for each keyword
-            message = "📊 Your Portfolio:\n\n"
-            # show the symbols in the portfolio with /chart <symbol> command
-            for portfolio in portfolio_list:
-                message += f"- {portfolio.ticker} ({portfolio.quantity} shares)\n"
-            message += f"\nTotal: {len(portfolio_list)} items"
-            await update.message.reply_text(message.strip())
+            if not portfolio_list:
+                await update.message.reply_text("Your portfolio is empty.")
+                return
+
+            quotes = await self.stock_service.fetch_quotes(
+                [portfolio.ticker for portfolio in portfolio_list],
+                priority=Priority.INTERACTIVE,
+            )
+            valuation = value_portfolio(portfolio_list, quotes)
+            await update.message.reply_text(
+                self._format_portfolio(valuation, len(portfolio_list))
+            )
             self.logger.info("Portfolio displayed successfully")
         except Exception as e:
             self.logger.error(f"Failed to get portfolio: {str(e)}")
             await update.message.reply_text(f"Failed to retrieve portfolio: {str(e)}")
 
-    async def check_alerts(self, context: ContextTypes.DEFAULT_TYPE):
-        chat_id = context.application.bot_data.get("chat_id", 140283060)
-        if not chat_id:
-            self.logger.error("No chat ID configured")
+    def _format_portfolio(self, valuation: PortfolioValuation, items: int) -> str:
+        """Positions by value with their day change and weight, then totals"""
+        positions = valuation.positions
+        message = "📊 Your Portfolio:\n\n"
+        for ticker, row in positions.head(self.PORTFOLIO_MAX_LINES).iterrows():
+            message += (
+                f"- {ticker} {row.quantity:,.0f} × ${row.price:,.2f} = "
+                f"${row.value:,.2f} ({row.day_change_pct:+.2%}, {row.weight:.1%})\n"
+            )
+        if len(positions) > self.PORTFOLIO_MAX_LINES:
+            message += f"… and {len(positions) - self.PORTFOLIO_MAX_LINES} more\n"
+        message += (
+            f"\nTotal: ${valuation.total_value:,.2f} "
+            f"({valuation.day_change:+,.2f}, {valuation.day_change_pct:+.2%} today), "
+            f"{items} items"
+        )
+        if valuation.missing:
+            message += f"\nNo quote: {', '.join(valuation.missing)}"
+        return message
+
+    async def alert_history(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """
+        Page through alert history, newest first
+
+        /history [symbol] [BUY|SELL] [days] starts a new query,
+        /history next continues from where the previous page stopped. The
+        hint under each page repeats the filters and the cursor, so the next
+        page can be served by any bot instance behind a load balancer.
+        """
+        try:
+            args = context.args or []
+            if "next" in args:
+                position = args.index("next")
+                if position + 1 < len(args):
+                    filters = args[:position]
+                    token = args[position + 1]
+                else:
+                    filters = context.user_data.get("history_filters", [])
+                    token = context.user_data.get("history_cursor")
+                if token is None:
+                    await update.message.reply_text("No more alert history.")
+                    return
+                cursor = AlertCursor.decode(token)
+            else:
+                filters = list(args)
+                cursor = None
+
+            page = self.db.get_alert_page(
+                limit=self.HISTORY_PAGE_SIZE,
+                cursor=cursor,
+                **self._parse_history_args(filters),
+            )
+            next_token = page.next_cursor.encode() if page.next_cursor else None
+            context.user_data["history_filters"] = filters
+            context.user_data["history_cursor"] = next_token
+
+            if not page.alerts:
+                await update.message.reply_text("No alert history found.")
+                return
+
+            message = "🗂 Alert History:\n\n"
+            for alert in page.alerts:
+                message += (
+                    f"{alert.timestamp:%Y-%m-%d %H:%M} "
+                    f"{alert.symbol} {alert.alert_type} ${alert.price:.2f}\n"
+                )
+            if next_token:
+                message += f"\n/history {' '.join(filters + ['next', next_token])}"
+            await update.message.reply_text(message.strip())
+        except Exception as e:
+            self.logger.error(f"Failed to get alert history: {str(e)}")
+            await update.message.reply_text(f"Failed to retrieve history: {str(e)}")
+
+    @staticmethod
+    def _parse_history_args(args) -> dict:
+        """Parse /history arguments into get_alert_page filters"""
+        query = {"symbol": None, "alert_type": None, "since": None}
+        for arg in args:
+            if arg.upper() in ("BUY", "SELL"):
+                query["alert_type"] = arg.upper()
+            elif arg.isdigit():
+                query["since"] = datetime.now() - timedelta(days=int(arg))
+            else:
+                query["symbol"] = arg.upper()
+        return query
+
+    async def subscribe(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Subscribe this chat to a symbol (/subscribe AAPL) or news keyword"""
+        parsed = self._parse_subscription_args(context.args)
+        if parsed is None:
+            await update.message.reply_text(
+                "Usage: /subscribe <symbol> or /subscribe news <keyword>"
+            )
             return
 
+        kind, value = parsed
         try:
-            portfolio_list = self.db.get_symbols()
-            for portfolio in portfolio_list:
-                await self._process_stock_alert(context, portfolio.ticker, chat_id)
+            if self.db.add_subscription(update.effective_chat.id, kind, value):
+                await update.message.reply_text(f"✅ Subscribed to {kind} {value}.")
+            else:
+                await update.message.reply_text(
+                    f"This chat is already subscribed to {kind} {value}."
+                )
+        except Exception as e:
+            self.logger.error(f"Failed to subscribe: {str(e)}")
+            await update.message.reply_text(f"Failed to subscribe: {str(e)}")
+
+    async def unsubscribe(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Remove one of this chat's subscriptions"""
+        parsed = self._parse_subscription_args(context.args)
+        if parsed is None:
+            await update.message.reply_text(
+                "Usage: /unsubscribe <symbol> or /unsubscribe news <keyword>"
+            )
+            return
+
+        kind, value = parsed
+        try:
+            if self.db.remove_subscription(update.effective_chat.id, kind, value):
+                await update.message.reply_text(f"Unsubscribed from {kind} {value}.")
+            else:
+                await update.message.reply_text(
+                    f"This chat is not subscribed to {kind} {value}."
+                )
+        except Exception as e:
+            self.logger.error(f"Failed to unsubscribe: {str(e)}")
+            await update.message.reply_text(f"Failed to unsubscribe: {str(e)}")
+
+    async def list_subscriptions(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE
+    ):
+        """Show this chat's subscriptions"""
+        try:
+            subscriptions = self.db.get_subscriptions(chat_id=update.effective_chat.id)
+            if not subscriptions:
+                await update.message.reply_text("This chat has no subscriptions.")
+                return
+
+            symbols = [s.value for s in subscriptions if s.kind == SUBSCRIPTION_SYMBOL]
+            keywords = [
+                s.value for s in subscriptions if s.kind == SUBSCRIPTION_KEYWORD
+            ]
+            message = "🔔 Subscriptions:\n"
+            if symbols:
+                message += f"\nSymbols: {', '.join(symbols)}"
+            if keywords:
+                message += f"\nNews: {', '.join(keywords)}"
+            await update.message.reply_text(message)
+        except Exception as e:
+            self.logger.error(f"Failed to list subscriptions: {str(e)}")
+            await update.message.reply_text(
+                f"Failed to retrieve subscriptions: {str(e)}"
+            )
+
+    @staticmethod
+    def _parse_subscription_args(args) -> Optional[Tuple[str, str]]:
+        """Parse /subscribe arguments into (kind, value)"""
+        args = args or []
+        if len(args) >= 2 and args[0].lower() == "news":
+            return SUBSCRIPTION_KEYWORD, " ".join(args[1:])
+        if len(args) == 1 and args[0].lower() != "news":
+            return SUBSCRIPTION_SYMBOL, args[0].upper()
+        return None
+
+    async def rule_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """
+        Add or remove one of this chat's alert rules
+
+        /rule add [SYMBOL] <rule> checks the rule for one symbol, or without
+        a symbol for every symbol this chat receives alerts for;
+        /rule del <id> removes it.
+        """
+        args = context.args or []
+        action = args[0].lower() if args else None
+        chat_id = update.effective_chat.id
+        try:
+            if action == "add" and len(args) >= 2:
+                symbol, expression = self._parse_rule_args(args[1:])
+                try:
+                    ExpressionPool().parse(expression)
+                except RuleSyntaxError as e:
+                    await update.message.reply_text(f"Invalid rule: {str(e)}")
+                    return
+                rule_id = self.db.add_alert_rule(chat_id, symbol, expression)
+                await update.message.reply_text(
+                    f"✅ Added rule #{rule_id} for {symbol or 'all symbols'}: "
+                    f"{expression}"
+                )
+            elif action == "del" and len(args) == 2 and args[1].isdigit():
+                rule_id = int(args[1])
+                if self.db.remove_alert_rule(chat_id, rule_id):
+                    await update.message.reply_text(f"Removed rule #{rule_id}.")
+                else:
+                    await update.message.reply_text(
+                        f"This chat has no rule #{rule_id}."
+                    )
+            else:
+                await update.message.reply_text(
+                    "Usage: /rule add [symbol] <rule> or /rule del <id>"
+                )
+        except Exception as e:
+            self.logger.error(f"Failed to update rules: {str(e)}")
+            await update.message.reply_text(f"Failed to update rules: {str(e)}")
+
+    async def list_rules(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Show this chat's alert rules"""
+        try:
+            rules = self.db.get_alert_rules(chat_id=update.effective_chat.id)
+            if not rules:
+                await update.message.reply_text("This chat has no rules.")
+                return
+
+            message = "📐 Rules:\n\n"
+            for rule in rules:
+                message += f"#{rule.id} {rule.symbol or 'all'}: {rule.expression}\n"
+            await update.message.reply_text(message.strip())
+        except Exception as e:
+            self.logger.error(f"Failed to list rules: {str(e)}")
+            await update.message.reply_text(f"Failed to retrieve rules: {str(e)}")
+
+    async def backtest_command(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE
+    ):
+        """
+        Backtest the RSI or MACD alert signal, or one of this chat's rules,
+        on the given symbols (/backtest AAPL,MSFT macd 5y)
+        """
+        parsed = self._parse_backtest_args(context.args)
+        if parsed is None:
+            await update.message.reply_text(
+                "Usage: /backtest <symbol>[,<symbol>...] [rsi|macd|#rule] [period]\n"
+                f"Up to {self.BACKTEST_MAX_SYMBOLS} symbols, period like 1y, 10y "
+                "or max (default 10y)"
+            )
+            return
+
+        symbols, strategy, period = parsed
+        try:
+            if strategy.startswith("#"):
+                rules = self.db.get_alert_rules(chat_id=update.effective_chat.id)
+                rule = next((r for r in rules if r.id == int(strategy[1:])), None)
+                if rule is None:
+                    await update.message.reply_text(
+                        f"This chat has no rule {strategy}."
+                    )
+                    return
+                entry, exit = rule.expression, None
+            else:
+                entry, exit = STRATEGIES[strategy]
+
+            results = await asyncio.gather(
+                *(
+                    self.stock_service.fetch_stock_data(
+                        symbol, period, priority=Priority.INTERACTIVE
+                    )
+                    for symbol in symbols
+                ),
+                return_exceptions=True,
+            )
+            frames = {
+                symbol: df
+                for symbol, df in zip(symbols, results)
+                if not isinstance(df, BaseException) and not df.empty
+            }
+            if not frames:
+                await update.message.reply_text("No price history found.")
+                return
+
+            report = await asyncio.to_thread(
+                backtest, frames, entry, exit, hold=self.BACKTEST_HOLD_BARS
+            )
+            message = self._format_backtest(report, entry, exit)
+            missing = [symbol for symbol in symbols if symbol not in frames]
+            if missing:
+                message += f"\n\nNo data: {', '.join(missing)}"
+            await update.message.reply_text(message)
+        except Exception as e:
+            self.logger.error(f"Failed to run backtest: {str(e)}")
+            await update.message.reply_text(f"Failed to run backtest: {str(e)}")
+
+    def _parse_backtest_args(self, args) -> Optional[Tuple[List[str], str, str]]:
+        """Parse /backtest arguments into (symbols, strategy, period)"""
+        symbols: List[str] = []
+        strategy, period = "rsi", "10y"
+        for arg in args or []:
+            if arg.lower() in STRATEGIES:
+                strategy = arg.lower()
+            elif re.fullmatch(r"#\d+", arg):
+                strategy = arg
+            elif re.fullmatch(r"\d+(mo|y)|ytd|max", arg.lower()):
+                period = arg.lower()
+            else:
+                symbols += [s.upper() for s in arg.split(",") if s]
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols or len(symbols) > self.BACKTEST_MAX_SYMBOLS:
+            return None
+        return symbols, strategy, period
+
+    def _format_backtest(
+        self, report: BacktestReport, entry: str, exit: Optional[str]
+    ) -> str:
+        """Summarize a backtest, with one line per symbol for short lists"""
+        by_symbol = report.by_symbol
+        message = (
+            f"📊 Backtest: {entry} → {exit or f'hold {self.BACKTEST_HOLD_BARS} bars'}\n"
+            f"{len(by_symbol)} symbols, {report.years:.1f} years\n\n"
+            f"Trades: {report.trades}"
+        )
+        if report.trades:
+            message += f" (hit rate {report.hit_rate:.0%})"
+        message += (
+            f"\nReturn: mean {report.mean_return:+.1%}, "
+            f"median {report.median_return:+.1%}\n"
+            f"Max drawdown: mean {report.mean_drawdown:.1%}, "
+            f"worst {report.worst_drawdown:.1%}\n"
+            f"Alerts: {report.alerts_per_year:.1f} per symbol per year"
+        )
+        if len(by_symbol) <= 10:
+            message += "\n"
+            for symbol, row in by_symbol.iterrows():
+                message += (
+                    f"\n{symbol}: {row.trades:.0f} trades, "
+                    f"{row.total_return:+.1%} (buy & hold "
+                    f"{row.buy_hold_return:+.1%}), drawdown {row.max_drawdown:.1%}"
+                )
+        return message
+
+    @staticmethod
+    def _parse_rule_args(args) -> Tuple[Optional[str], str]:
+        """Split /rule add arguments into an optional symbol and the rule"""
+        first = args[0]
+        if (
+            len(args) > 1
+            and first.upper() not in RESERVED
+            and re.fullmatch(r"[A-Za-z0-9.^=-]*[A-Za-z][A-Za-z0-9.^=-]*", first)
+        ):
+            return first.upper(), " ".join(args[1:])
+        return None, " ".join(args)
+
+    def _default_chat_id(self, context) -> Optional[Union[int, str]]:
+        """Chat that receives alerts for the global portfolio and watchlist"""
+        chat_id = context.application.bot_data.get("chat_id")
+        if not chat_id:
+            chat_id = self.settings.TELEGRAM_CHAT_ID
+        if isinstance(chat_id, str) and chat_id.lstrip("-").isdigit():
+            # Match the integer chat IDs stored with subscriptions
+            chat_id = int(chat_id)
+        return chat_id or None
+
+    def _owns(self, key: str) -> bool:
+        """Whether this process handles a symbol or keyword"""
+        return self.coordinator is None or self.coordinator.owns(key)
+
+    @staticmethod
+    def _audience(
+        shared: List[str],
+        subscriptions: List[SubscriptionRow],
+        default_chat_id: Optional[Union[int, str]],
+    ) -> Dict[str, List[Union[int, str]]]:
+        """
+        Map each distinct symbol or keyword to the chats that receive it
+
+        Shared values (portfolio, watchlist) go to the default chat, and
+        subscribed values to their subscribers; values nobody receives are
+        left out.
+        """
+        audience: Dict[str, List[Union[int, str]]] = {}
+        if default_chat_id is not None:
+            for value in shared:
+                audience.setdefault(value, []).append(default_chat_id)
+        for subscription in subscriptions:
+            chats = audience.setdefault(subscription.value, [])
+            if subscription.chat_id not in chats:
+                chats.append(subscription.chat_id)
+        return audience
+
+    async def check_alerts(self, context: ContextTypes.DEFAULT_TYPE):
+        default_chat_id = self._default_chat_id(context)
+        now = datetime.now(timezone.utc)
+        audience: Dict[str, List[Union[int, str]]] = {}
+        targets: Dict[str, List[AlertRuleRow]] = {}
+        frames: Dict[str, pd.DataFrame] = {}
+
+        def due_symbols():
+            audience.update(self._symbol_audience(default_chat_id))
+            with STAGE_DURATION.time(job="check_alerts", stage="db"):
+                self._load_rules()
+            targets.update(self._rule_targets(audience))
+            if not audience and not targets:
+                self.logger.info("No symbols with a chat to alert")
+            # Symbols the quote stream is delivering are evaluated per tick,
+            # but their rules are still checked on the polled bars
+            polled = [symbol for symbol in audience if symbol not in self._streamed]
+            polled += [
+                symbol
+                for symbol in targets
+                if symbol in self._streamed or symbol not in audience
+            ]
+            return self.scheduler.due_symbols(polled, now)
+
+        async def process(symbol: str):
+            chat_ids = [] if symbol in self._streamed else audience.get(symbol, [])
+            rules = targets.get(symbol, [])
+            df = await self._process_stock_alert(context, symbol, chat_ids, rules)
+            if df is not None and rules:
+                frames[symbol] = df
+            self.scheduler.mark_polled(symbol, now)
+
+        try:
+            with log_context("check_alerts"):
+                await self.alert_runner.run(
+                    due_symbols, process, priority=self._rsi_priority
+                )
+                if frames:
+                    await self._process_rule_alerts(context, targets, frames)
+                with STAGE_DURATION.time(job="check_alerts", stage="send"):
+                    await self.outbox.flush(context.bot)
         except Exception as e:
             self.logger.error(f"Error checking alerts: {str(e)}")
 
-    async def _process_stock_alert(self, context, symbol: str, chat_id: str):
+    def _symbol_audience(
+        self, default_chat_id: Optional[Union[int, str]]
+    ) -> Dict[str, List[Union[int, str]]]:
+        """Symbols this process alerts on, with the chats that receive them"""
+        with STAGE_DURATION.time(job="check_alerts", stage="db"):
+            portfolio_list = self.db.get_symbols()
+            subscriptions = self.db.get_subscriptions(kind=SUBSCRIPTION_SYMBOL)
+        audience = self._audience(
+            [portfolio.ticker for portfolio in portfolio_list],
+            subscriptions,
+            default_chat_id,
+        )
+        return {
+            symbol: chats for symbol, chats in audience.items() if self._owns(symbol)
+        }
+
+    def _load_rules(self) -> None:
+        """Read the stored rules, compiling them again only when they changed"""
+        rules = self.db.get_alert_rules()
+        compiled = [(rule.id, rule.expression) for rule in rules]
+        if self._rule_set is None or self._rule_set.rules != compiled:
+            self._rule_set = RuleSet(compiled)
+            for rule_id, error in self._rule_set.invalid.items():
+                self.logger.warning(f"Skipping invalid rule #{rule_id}: {error}")
+            self._rule_state = {
+                key: holds
+                for key, holds in self._rule_state.items()
+                if key[0] in self._rule_set.roots
+            }
+        self._rules = [rule for rule in rules if rule.id in self._rule_set.roots]
+
+    def _rule_targets(
+        self, audience: Dict[str, List[Union[int, str]]]
+    ) -> Dict[str, List[AlertRuleRow]]:
+        """
+        Map each symbol to the rules checked for it: rules naming the symbol,
+        and chat-wide rules of every chat that receives the symbol's alerts
+        """
+        targets: Dict[str, List[AlertRuleRow]] = {}
+        for rule in self._rules:
+            if rule.symbol is not None:
+                if self._owns(rule.symbol):
+                    targets.setdefault(rule.symbol, []).append(rule)
+                continue
+            for symbol, chats in audience.items():
+                if rule.chat_id in chats:
+                    targets.setdefault(symbol, []).append(rule)
+        return targets
+
+    def _history_bars(self, rules: Sequence[AlertRuleRow]) -> int:
+        """Bars of history RSI and the rules need"""
+        return max(
+            [self.ALERT_BARS] + [self._rule_set.lookbacks[rule.id] for rule in rules]
+        )
+
+    def _timeframe_label(self) -> str:
+        """Timeframe suffix for alert messages; daily bars go unlabelled"""
+        return "" if self.timeframe == "1d" else f" [{self.timeframe}]"
+
+    async def start_stream(self, context: ContextTypes.DEFAULT_TYPE):
+        """
+        Start the streaming alert loop in the background; it is cancelled
+        when the application stops
+        """
+        self._stream_task = asyncio.create_task(self._stream_loop(context))
+
+    async def _stream_loop(self, context):
+        """
+        Evaluate alerts on every quote from the stream. While the stream is
+        down its symbols go back to the polling cycle, and it is retried
+        every STREAM_RETRY_INTERVAL seconds.
+        """
+        while True:
+            try:
+                audience = self._symbol_audience(self._default_chat_id(context))
+                if audience and await self._stream(context, audience):
+                    continue
+            except StreamUnavailableError as e:
+                self.logger.warning(f"Quote stream unavailable, polling: {str(e)}")
+            except Exception as e:
+                self.logger.error(f"Quote stream failed, polling: {str(e)}")
+            finally:
+                self._streamed.clear()
+            # Quotes were missed while the stream was down; reseed next time
+            self._live.clear()
+            await asyncio.sleep(self.settings.STREAM_RETRY_INTERVAL)
+
+    async def _stream(self, context, audience: Dict[str, List[Union[int, str]]]):
+        """
+        Consume the stream for the given symbols
+
+        Returns:
+            True when the symbol set changed and the stream should be
+            resubscribed, False when the stream ended
+        """
+        symbols = sorted(audience)
+        for symbol in set(self._live) - set(symbols):
+            del self._live[symbol]
+            self._live_action.pop(symbol, None)
+        self.logger.info(f"Streaming quotes for {len(symbols)} symbols")
+        refresh_at = time.monotonic() + self.settings.STREAM_REFRESH_INTERVAL
+        async for quote in self.quote_stream.stream(symbols):
+            chat_ids = audience.get(quote.symbol)
+            if chat_ids:
+                self._streamed.add(quote.symbol)
+                await self._process_quote(context, quote, chat_ids)
+
+            if time.monotonic() >= refresh_at:
+                refreshed = self._symbol_audience(self._default_chat_id(context))
+                if sorted(refreshed) != symbols:
+                    self.logger.info("Streamed symbols changed, resubscribing")
+                    return True
+                audience = refreshed
+                refresh_at = time.monotonic() + self.settings.STREAM_REFRESH_INTERVAL
+        self.logger.warning("Quote stream ended")
+        return False
+
+    async def _process_quote(self, context, quote, chat_ids: List[Union[int, str]]):
+        """Update the symbol's indicators and alert as soon as RSI crosses"""
+        symbol = quote.symbol
         try:
-            # 오늘 알림 발송 내역이 있으면 무시
-            if self.db.check_duplicate_alert(symbol):
-                self.logger.info(f"Duplicate alert for {symbol}")
+            signals = self._live.get(symbol)
+            if signals is None:
+                signals = await self._seed_live_signals(symbol)
+            bar = bucket_start(quote.timestamp, self.timeframe, exchange_for(symbol))
+            reading = signals.update(bar, quote.price)
+            if reading is None or reading.rsi is None:
                 return
+            self._last_rsi[symbol] = reading.rsi
+
+            if reading.rsi < 30:
+                action = "BUY"
+            elif reading.rsi > 70:
+                action = "SELL"
+            else:
+                action = None
+            # Alert on entering a zone; staying in it is not a new signal
+            previous = self._live_action.get(symbol)
+            self._live_action[symbol] = action
+            if action and action != previous:
+                with log_context("stream"):
+                    await self._send_alert(
+                        context, symbol, action, quote.price, chat_ids
+                    )
+                    await self.outbox.flush(context.bot)
+        except CircuitOpenError as e:
+            self.logger.warning(f"Skipping quote for {symbol}: {str(e)}")
+        except Exception as e:
+            self.logger.error(f"Error processing quote for {symbol}: {str(e)}")
+
+    async def _seed_live_signals(self, symbol: str) -> LiveSignals:
+        """Load the bars the polling cycle would use into fresh indicators"""
+        df = await self.stock_service.fetch_bars(
+            symbol, self.timeframe, self.ALERT_BARS
+        )
+        signals = LiveSignals()
+        # Bars are indexed by their start, the same key quotes are bucketed by
+        signals.seed(
+            (timestamp, float(close))
+            for timestamp, close in df["Close"].dropna().items()
+        )
+        self._live[symbol] = signals
+        return signals
+
+    def _rsi_priority(self, symbol: str) -> float:
+        """
+        Distance of the last RSI to the nearest threshold; symbols already
+        past a threshold and unseen symbols first
+        """
+        rsi = self._last_rsi.get(symbol)
+        if rsi is None or rsi <= 30 or rsi >= 70:
+            return 0.0
+        return min(rsi - 30, 70 - rsi)
+
+    async def _process_stock_alert(
+        self,
+        context,
+        symbol: str,
+        chat_ids: List[Union[int, str]],
+        rules: Sequence[AlertRuleRow] = (),
+    ) -> Optional[pd.DataFrame]:
+        """
+        Send the RSI alert for a symbol to chat_ids and fetch the bars its
+        rules need; the bars are returned so that the rules of all symbols
+        can be evaluated together at the end of the cycle
+        """
+        try:
+            # 오늘 알림 발송 내역이 있으면 무시
+            if chat_ids:
+                with STAGE_DURATION.time(job="check_alerts", stage="db"):
+                    duplicate = self.alert_buffer.check_duplicate_alert(symbol)
+                if duplicate:
+                    CACHE_HITS.inc(cache="alert_cooldown")
+                    self.logger.info(f"Duplicate alert for {symbol}")
+                    chat_ids = []
+            if not chat_ids and not rules:
+                return None
 
-            df = self.stock_service.get_stock_data(symbol, "1mo")
+            with STAGE_DURATION.time(job="check_alerts", stage="fetch"):
+                df = await self.stock_service.fetch_bars(
+                    symbol, self.timeframe, self._history_bars(rules)
+                )
             if df.empty:
-                return
+                return None
 
             # RSI를 이용해서 매수/매도 신호 표시
-            await self._process_rsi_alert(context, symbol, df, chat_id)
-
-            # MACD 시그널를 이용한 매수/매도 신호 표시
-            # self._process_macd_alert(context, symbol, df, chat_id)
+            if chat_ids:
+                await self._process_rsi_alert(context, symbol, df, chat_ids)
+            return df
+        except CircuitOpenError as e:
+            self.logger.warning(f"Skipping {symbol}: {str(e)}")
         except Exception as e:
             traceback.print_exc()
             self.logger.error(f"Error processing {symbol}: {str(e)}")
+        return None
 
     # RSI 시그널을 이용해서 매수/매도 판단
     async def _process_rsi_alert(
-        self, context, symbol: str, df: pd.DataFrame, chat_id: str
+        self, context, symbol: str, df: pd.DataFrame, chat_ids: List[Union[int, str]]
     ):
-        rsi = self.stock_service.calculate_rsi(df)
+        with STAGE_DURATION.time(job="check_alerts", stage="indicator"):
+            rsi = self.stock_service.calculate_rsi(df)
+        if rsi.notna().iloc[-1]:
+            self._last_rsi[symbol] = float(rsi.iloc[-1])
 
         # Buy/Sell signals based on RSI thresholds
         buy_signals = rsi < 30
@@ -193,93 +1101,182 @@ class StockAlertBot:
         # 가장 최근 buy_signal이 True일 때만 alert 발송
         if buy_signals.iloc[-1]:
             await self._send_alert(
-                context, symbol, "BUY", df["Close"].iloc[-1], chat_id
+                context, symbol, "BUY", df["Close"].iloc[-1], chat_ids
             )
         elif sell_signals.iloc[-1]:
             await self._send_alert(
-                context, symbol, "SELL", df["Close"].iloc[-1], chat_id
+                context, symbol, "SELL", df["Close"].iloc[-1], chat_ids
             )
 
-    # MACD 시그널을 이용해서 매수/매도 판단
-    async def _process_macd_alert(
-        self, context, symbol: str, df: pd.DataFrame, chat_id: str
+    async def _process_rule_alerts(
+        self,
+        context,
+        targets: Dict[str, List[AlertRuleRow]],
+        frames: Dict[str, pd.DataFrame],
     ):
-        macd, signal = self.stock_service.calculate_macd(df)
-        current_price = df["Adj Close"].iloc[-1]
+        """
+        Evaluate every rule on the cycle's bars in one pass over the shared
+        expression DAG, and alert when a rule starts to hold for a symbol
+        """
+        try:
+            with STAGE_DURATION.time(job="check_alerts", stage="indicator"):
+                panel = build_panel(frames, self._rule_set.fields)
+                results = self._rule_set.evaluate(panel)
+        except Exception as e:
+            self.logger.error(f"Error evaluating rules: {str(e)}")
+            return
+
+        for symbol, df in frames.items():
+            for rule in targets[symbol]:
+                holds = bool(results[rule.id].get(symbol, False))
+                previous = self._rule_state.get((rule.id, symbol), False)
+                self._rule_state[(rule.id, symbol)] = holds
+                # Alert when the rule starts to hold, not on every bar it holds
+                if holds and not previous:
+                    try:
+                        await self._send_rule_alert(rule, symbol, df)
+                    except Exception as e:
+                        self.logger.error(
+                            f"Error sending rule #{rule.id} for {symbol}: {str(e)}"
+                        )
 
-        if self._is_buy_signal(macd, signal):
-            await self._send_alert(context, symbol, "BUY", current_price, chat_id)
-        elif self._is_sell_signal(macd, signal):
-            await self._send_alert(context, symbol, "SELL", current_price, chat_id)
+    async def _send_rule_alert(self, rule: AlertRuleRow, symbol: str, df: pd.DataFrame):
+        """Queue a rule alert with a price chart for the rule's chat"""
+        price = float(df["Close"].iloc[-1])
+        alert_type = f"RULE#{rule.id}"
+        # Each rule has its own cooldown, separate from the symbol's RSI alert
+        with STAGE_DURATION.time(job="check_alerts", stage="db"):
+            claimed = self.alert_buffer.claim_alert(
+                symbol, alert_type, price, by_type=True
+            )
+        if not claimed:
+            CACHE_HITS.inc(cache="alert_cooldown")
+            self.logger.info(f"Duplicate rule #{rule.id} alert for {symbol}")
+            return
+
+        with STAGE_DURATION.time(job="check_alerts", stage="render"):
+            chart = self.stock_service.generate_price_chart(symbol, df)
+        message = (
+            f"🚨 {symbol} rule #{rule.id} triggered{self._timeframe_label()}\n"
+            f"{rule.expression}\n현재가: ${price:.2f}"
+        )
+        self.outbox.add_photo(rule.chat_id, chart, message, alert_type="RULE")
+        self.logger.info(f"📤 {symbol} rule #{rule.id} 알림 발송 대기")
 
     async def _send_alert(
-        self, context, symbol: str, action: str, price: float, chat_id: str
+        self,
+        context,
+        symbol: str,
+        action: str,
+        price: float,
+        chat_ids: List[Union[int, str]],
     ):
         """
         알림 메시지 발송
 
         Parameters:
         - context: ContextTypes.DEFAULT_TYPE
-            - context에서 bot과 chat_id를 가져옵니다.
+            - context에서 bot을 가져옵니다.
         - symbol: 심볼
         - alert_type: 알림 타입
         - price: 현재가격
-        - chart: 차트 URL
+        - chat_ids: 알림을 받을 채팅 목록 (차트는 한 번만 생성)
         """
         self.logger.info(f"🔔 {symbol} 종목 {action} 알림 발송 시작")
 
         # 메시지 생성
-        message = f"🚨 {symbol} {action} 신호 발생!\n현재가: ${price:.2f}"
+        message = (
+            f"🚨 {symbol} {action} 신호 발생!{self._timeframe_label()}\n"
+            f"현재가: ${price:.2f}"
+        )
 
-        # 알림 기록 저장
-        self.db.add_alert(symbol, action, price)
+        # 알림 기록 저장 (쿨다운 내 다른 워커가 이미 보냈으면 중단)
+        with STAGE_DURATION.time(job="check_alerts", stage="db"):
+            claimed = self.alert_buffer.claim_alert(symbol, action, price)
+        if not claimed:
+            CACHE_HITS.inc(cache="alert_cooldown")
+            self.logger.info(f"Duplicate alert for {symbol}")
+            return
         self.logger.info(f"💾 {symbol} 종목 알림 기록 저장 완료")
 
         # 차트 생성
-        chart = self.stock_service.generate_rsi_chart(
-            symbol, self.stock_service.get_stock_data(symbol)
-        )
+        with STAGE_DURATION.time(job="check_alerts", stage="fetch"):
+            chart_data = await self.stock_service.fetch_bars(
+                symbol, self.timeframe, self.CHART_BARS
+            )
+        with STAGE_DURATION.time(job="check_alerts", stage="render"):
+            chart = self.stock_service.generate_rsi_chart(symbol, chart_data)
+
+        # 차트와 함께 메시지 발송 (사이클 종료 시 묶어서 발송)
+        for chat_id in chat_ids:
+            self.outbox.add_photo(chat_id, chart, message, alert_type=action)
+        self.logger.info(f"📤 {symbol} 종목 {action} 알림 발송 대기")
+
+    async def apply_retention(self, context: ContextTypes.DEFAULT_TYPE):
+        """
+        Periodically compact old alert history into daily rollups
+        """
+        if self.coordinator and not self.coordinator.is_leader:
+            return
 
-        # 차트와 함께 메시지 발송
         try:
-            await context.bot.send_photo(chat_id=chat_id, photo=chart, caption=message)
-            self.logger.info(f"✅ {symbol} 종목 {action} 알림 발송 완료")
+            report = self.db.apply_retention(
+                self.settings.ALERT_HOT_DAYS, self.settings.ALERT_RETENTION_DAYS
+            )
+            self.logger.info(
+                f"Alert retention: archived {report.archived_rows} rows, "
+                f"wrote {report.rolled_up_rows} rollup rows, "
+                f"dropped {len(report.dropped_tables)} tables"
+            )
         except Exception as e:
-            self.logger.error(f"❌ {symbol} 종목 알림 발송 실패: {str(e)}")
+            self.logger.error(f"Error applying alert retention: {str(e)}")
 
     async def check_news(self, context: ContextTypes.DEFAULT_TYPE):
         """
-        Periodically check news for watched keywords and send alerts
+        Periodically check news for watched and subscribed keywords and send
+        alerts; each keyword is fetched once for all of its chats
         """
-        chat_id = context.application.bot_data.get("chat_id", 140283060)
-        if not chat_id:
-            self.logger.error("No chat ID configured")
-            return
+        default_chat_id = self._default_chat_id(context)
+        audience: Dict[str, List[Union[int, str]]] = {}
 
-        try:
-            keywords = [keyword.keyword for keyword in self.db.get_watched_keywords()]
-            if not keywords:
+        def watched_keywords():
+            with STAGE_DURATION.time(job="check_news", stage="db"):
+                keywords = [
+                    keyword.keyword for keyword in self.db.get_watched_keywords()
+                ]
+                subscriptions = self.db.get_subscriptions(kind=SUBSCRIPTION_KEYWORD)
+            audience.update(self._audience(keywords, subscriptions, default_chat_id))
+            if not audience:
                 self.logger.info("No keywords in watchlist")
-                return
+            return [keyword for keyword in audience if self._owns(keyword)]
 
-            for keyword in keywords:
-                await self._process_news_alert(context, keyword, chat_id)
+        async def process(keyword: str):
+            await self._process_news_alert(context, keyword, audience[keyword])
+
+        try:
+            with log_context("check_news"):
+                await self.news_runner.run(watched_keywords, process)
+                with STAGE_DURATION.time(job="check_news", stage="send"):
+                    await self.outbox.flush(context.bot)
 
         except Exception as e:
             self.logger.error(f"Error checking news: {str(e)}")
 
-    async def _process_news_alert(self, context, keyword: str, chat_id: str):
+    async def _process_news_alert(
+        self, context, keyword: str, chat_ids: List[Union[int, str]]
+    ):
         """
         Process news alerts for a specific keyword
 
         Args:
             context: Telegram context
             keyword: Stock symbol or company name to check
-            chat_id: Telegram chat ID for sending alerts
+            chat_ids: Telegram chat IDs for sending alerts
         """
         try:
             self.logger.info(f"Checking news for {keyword}")
-            news_items = await self.news_service.get_news(keyword)
+            with STAGE_DURATION.time(job="check_news", stage="fetch"):
+                news_items = await self.news_service.get_news(keyword)
 
             if not news_items:
                 self.logger.info(f"No news found for {keyword}")
@@ -287,19 +1284,167 @@ class StockAlertBot:
 
             # Get only the latest 3 news items
             latest_news = news_items[:3]
-            self.logger.info(f"Sending {len(latest_news)} news items for {keyword}")
+            self.logger.info(f"Queueing {len(latest_news)} news items for {keyword}")
 
             for item in latest_news:
                 news_message = self._format_news_message(keyword, item)
-                await context.bot.send_message(
-                    chat_id=chat_id, text=news_message, disable_web_page_preview=False
-                )
-
-            self.logger.info(f"Successfully sent news alerts for {keyword}")
+                for chat_id in chat_ids:
+                    self.outbox.add_message(chat_id, news_message)
 
         except Exception as e:
             self.logger.error(f"Error processing news for {keyword}: {str(e)}")
 
+    async def warm_up(self, context: ContextTypes.DEFAULT_TYPE):
+        """
+        Load the heavy dependencies once the bot is already answering
+        commands: pandas, yfinance and matplotlib (with its font cache) in a
+        worker thread, then the news parsers and the headless browser
+        """
+        started = time.monotonic()
+        try:
+            await asyncio.to_thread(self.stock_service.warm_up)
+        except Exception as e:
+            self.logger.warning(f"Stock service warm-up failed: {str(e)}")
+        try:
+            await self.news_service.warm_up()
+        except Exception as e:
+            self.logger.warning(f"News service warm-up failed: {str(e)}")
+        self.logger.info(f"Warm-up finished in {time.monotonic() - started:.1f}s")
+
+    async def flush_write_buffers(self, context: ContextTypes.DEFAULT_TYPE):
+        """
+        Flush write-behind buffers and outbound messages whose oldest entry
+        has waited long enough
+        """
+        self.alert_buffer.flush_if_due()
+        self.news_service.flush_if_due()
+        await self.outbox.flush_if_due(context.bot)
+
+    async def coordinate_workers(self, context: ContextTypes.DEFAULT_TYPE):
+        """
+        Worker mode heartbeat: renew the lease, rebalance shards and start or
+        stop Telegram polling as leadership moves. With webhooks every worker
+        serves updates, so only the jobs follow leadership.
+        """
+        await asyncio.to_thread(self.coordinator.heartbeat)
+        if self.settings.WEBHOOK_ENABLED:
+            return
+        updater = context.application.updater
+        if self.coordinator.is_leader and not updater.running:
+            self.logger.info("Elected leader, starting Telegram polling")
+            await updater.start_polling(allowed_updates=Update.ALL_TYPES)
+        elif not self.coordinator.is_leader and updater.running:
+            self.logger.warning("Lost leadership, stopping Telegram polling")
+            await updater.stop()
+
+    async def _run_worker(self, app: Application):
+        """
+        Run the application until SIGINT/SIGTERM. Polling is started by
+        coordinate_workers on the leader only; a webhook is served by every
+        worker.
+        """
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+
+        await app.initialize()
+        try:
+            if self.settings.WEBHOOK_ENABLED:
+                await app.updater.start_webhook(**self._webhook_options())
+            await app.start()
+            await stop.wait()
+        finally:
+            if app.updater.running:
+                await app.updater.stop()
+            if app.running:
+                await app.stop()
+                await self._on_stop(app)
+            await app.shutdown()
+            await self._on_shutdown(app)
+            await asyncio.to_thread(self.coordinator.close)
+
+    async def _on_stop(self, application):
+        """Send queued notifications while the bot can still reach Telegram"""
+        if self._stream_task is not None:
+            self._stream_task.cancel()
+            await asyncio.gather(self._stream_task, return_exceptions=True)
+            self._stream_task = None
+        if self.outbox.pending():
+            await self.outbox.flush(application.bot)
+
+    async def _on_shutdown(self, application):
+        """Drain buffered writes and snapshot state before the process exits"""
+        self.alert_buffer.close()
+        await self.news_service.close()
+        self.logger.info("Flushed pending writes on shutdown")
+        if self.settings.SNAPSHOT_FILE:
+            try:
+                write_snapshot(self.settings.SNAPSHOT_FILE, self._snapshot_sections())
+            except Exception as e:
+                self.logger.error(f"Failed to save snapshot: {str(e)}")
+
+    async def save_snapshot(self, context: ContextTypes.DEFAULT_TYPE):
+        """
+        Snapshot in-process state; the arrays are collected here and written
+        in a worker thread (cached bars are replaced on refresh, never
+        modified, so the thread sees a consistent state)
+        """
+        started = time.monotonic()
+        try:
+            sections = self._snapshot_sections()
+            size = await asyncio.to_thread(
+                write_snapshot, self.settings.SNAPSHOT_FILE, sections
+            )
+        except Exception as e:
+            self.logger.error(f"Failed to save snapshot: {str(e)}")
+            return
+        self.logger.info(
+            f"Saved {size / 1e6:.1f}MB snapshot in "
+            f"{time.monotonic() - started:.2f}s"
+        )
+
+    def load_snapshot(self) -> None:
+        """
+        Restore the state of the last snapshot: bars are mapped from the
+        file and only refreshed once stale, like before the restart
+        """
+        path = self.settings.SNAPSHOT_FILE
+        started = time.monotonic()
+        try:
+            sections = read_snapshot(path)
+            symbols = self.stock_service.bar_store.restore(sections["bars"])
+            self.news_service.restore(sections["news"])
+            alerts = sections["alerts"].state
+            self._rule_state = {
+                (rule_id, symbol): True for rule_id, symbol in alerts["rule_state"]
+            }
+            self._last_rsi.update(alerts["last_rsi"])
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            self.logger.warning(f"Ignoring snapshot {path}: {str(e)}")
+            return
+        self.logger.info(
+            f"Restored bars of {symbols} symbols from {path} in "
+            f"{time.monotonic() - started:.2f}s"
+        )
+
+    def _snapshot_sections(self) -> Dict[str, Section]:
+        # Rules that do not hold are simply absent from _rule_state
+        return {
+            "bars": self.stock_service.bar_store.snapshot(),
+            "news": self.news_service.snapshot(),
+            "alerts": Section(
+                {
+                    "rule_state": [
+                        list(key) for key, holds in self._rule_state.items() if holds
+                    ],
+                    "last_rsi": dict(self._last_rsi),
+                }
+            ),
+        }
+
     def _format_news_message(self, keyword: str, news_item) -> str:
         """
         Format news item into a readable message
@@ -324,16 +1469,22 @@ class StockAlertBot:
             f"🔗 {news_item.link}"
         )
 
-    @staticmethod
-    def _is_buy_signal(macd: pd.Series, signal: pd.Series) -> bool:
-        return macd.iloc[-2] < signal.iloc[-2] and macd.iloc[-1] > signal.iloc[-1]
-
-    @staticmethod
-    def _is_sell_signal(macd: pd.Series, signal: pd.Series) -> bool:
-        return macd.iloc[-2] > signal.iloc[-2] and macd.iloc[-1] < signal.iloc[-1]
-
-    def run(self):
-        app = ApplicationBuilder().token(self.settings.TELEGRAM_TOKEN).build()
+    def build_application(self) -> Application:
+        """Build the Telegram application with all command handlers registered"""
+        builder = (
+            ApplicationBuilder()
+            .token(self.settings.TELEGRAM_TOKEN)
+            .concurrent_updates(self.settings.UPDATE_CONCURRENCY)
+            .post_stop(self._on_stop)
+            .post_shutdown(self._on_shutdown)
+        )
+        if self.settings.TELEGRAM_API_BASE_URL:
+            # Self-hosted Bot API server or a local stand-in
+            base_url = self.settings.TELEGRAM_API_BASE_URL.rstrip("/")
+            builder = builder.base_url(f"{base_url}/bot").base_file_url(
+                f"{base_url}/file/bot"
+            )
+        app = builder.build()
 
         # Register handlers
         app.add_handler(CommandHandler("start", self.start_command))
@@ -341,10 +1492,102 @@ class StockAlertBot:
         app.add_handler(CommandHandler("remove", self.remove_keyword))
         app.add_handler(CommandHandler("keywords", self.list_keywords))
         app.add_handler(CommandHandler("portfolio", self.get_portfolio))
+        app.add_handler(CommandHandler("history", self.alert_history))
+        app.add_handler(CommandHandler("subscribe", self.subscribe))
+        app.add_handler(CommandHandler("unsubscribe", self.unsubscribe))
+        app.add_handler(CommandHandler("subscriptions", self.list_subscriptions))
+        app.add_handler(CommandHandler("rule", self.rule_command))
+        app.add_handler(CommandHandler("rules", self.list_rules))
+        app.add_handler(CommandHandler("backtest", self.backtest_command))
+        app.add_handler(CommandHandler("chart", self.chart_command))
+        app.add_handler(CommandHandler("quote", self.quote_command))
+        return app
+
+    def _webhook_options(self) -> dict:
+        """
+        Arguments for run_webhook/start_webhook
+
+        Every instance registers the same URL and secret, so any number of
+        them can sit behind one load balancer; requests without the secret
+        token header are rejected by the webhook server.
+        """
+        settings = self.settings
+        if not settings.WEBHOOK_URL:
+            raise ValueError("WEBHOOK_ENABLED requires WEBHOOK_URL")
+        # Telegram accepts 1-256 characters from A-Z, a-z, 0-9, _ and -
+        if not settings.WEBHOOK_SECRET or not re.fullmatch(
+            r"[A-Za-z0-9_-]{1,256}", settings.WEBHOOK_SECRET
+        ):
+            raise ValueError(
+                "WEBHOOK_ENABLED requires a WEBHOOK_SECRET of 1-256 characters "
+                "from A-Z, a-z, 0-9, _ and -"
+            )
+        return {
+            "listen": settings.WEBHOOK_LISTEN,
+            "port": settings.WEBHOOK_PORT,
+            "url_path": settings.WEBHOOK_PATH,
+            "webhook_url": settings.WEBHOOK_URL,
+            "secret_token": settings.WEBHOOK_SECRET,
+            "max_connections": settings.WEBHOOK_MAX_CONNECTIONS,
+            "allowed_updates": Update.ALL_TYPES,
+        }
+
+    def run(self):
+        app = self.build_application()
+
+        if self.settings.METRICS_PORT:
+            start_metrics_server(self.settings.METRICS_PORT, self.settings.METRICS_HOST)
+            self.logger.info(
+                f"Serving metrics on {self.settings.METRICS_HOST}:"
+                f"{self.settings.METRICS_PORT}/metrics"
+            )
 
         # Register jobs
         job_queue = app.job_queue
-        job_queue.run_repeating(self.check_alerts, interval=600, first=3)  # 10 minutes
-        job_queue.run_repeating(self.check_news, interval=3600, first=3)  # 1 hour
+        job_queue.run_repeating(
+            self.check_alerts, interval=self.alert_interval, first=3
+        )
+        job_queue.run_repeating(
+            self.check_news, interval=self.settings.NEWS_INTERVAL, first=3
+        )
+        job_queue.run_repeating(
+            self.flush_write_buffers,
+            interval=self.settings.WRITE_BUFFER_MAX_DELAY,
+            first=self.settings.WRITE_BUFFER_MAX_DELAY,
+        )
+        job_queue.run_repeating(self.apply_retention, interval=86400, first=60)  # 1 day
+        if self.settings.SNAPSHOT_FILE:
+            # Before the first cycle, so it runs on the restored state
+            self.load_snapshot()
+            job_queue.run_repeating(
+                self.save_snapshot,
+                interval=self.settings.SNAPSHOT_INTERVAL,
+                first=self.settings.SNAPSHOT_INTERVAL,
+            )
+        if self.settings.WARM_UP_ENABLED:
+            job_queue.run_once(self.warm_up, when=0)
+        if self.quote_stream is not None:
+            job_queue.run_once(self.start_stream, when=0)
 
-        app.run_polling(allowed_updates=Update.ALL_TYPES)
+        if not self.settings.WORKER_MODE:
+            if self.settings.WEBHOOK_ENABLED:
+                app.run_webhook(**self._webhook_options())
+            else:
+                app.run_polling(allowed_updates=Update.ALL_TYPES)
+            return
+
+        if self.settings.DB_TYPE.lower() != "postgresql":
+            raise ValueError("WORKER_MODE requires DB_TYPE=postgresql")
+        self.coordinator = WorkerCoordinator(
+            psql_config(self.settings),
+            self.settings.WORKER_ID,
+            self.settings.WORKER_SHARDS,
+            self.settings.WORKER_LEASE_TIMEOUT,
+        )
+        job_queue.run_repeating(
+            self.coordinate_workers,
+            interval=self.settings.WORKER_HEARTBEAT_INTERVAL,
+            first=0,
+        )
+        self.logger.info(f"Starting worker {self.coordinator.worker_id}")
+        asyncio.run(self._run_worker(app))
@@ -5,6 +5,27 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     TELEGRAM_TOKEN: str
     TELEGRAM_CHAT_ID: str
+    TELEGRAM_API_BASE_URL: Optional[str] = None
+    # Outbound message limits (Telegram allows ~30 msg/s, ~1 msg/s per chat)
+    TELEGRAM_GLOBAL_RATE: float = 25.0
+    TELEGRAM_CHAT_RATE: float = 1.0
+    TELEGRAM_CHAT_BURST: int = 3
+    OUTBOX_MAX_DELAY: float = 10.0
+    # Receive updates on a webhook instead of long polling. WEBHOOK_URL is
+    # the public URL Telegram posts to (e.g. a load balancer in front of
+    # several bots), the local server listens on WEBHOOK_LISTEN:WEBHOOK_PORT
+    WEBHOOK_ENABLED: bool = False
+    WEBHOOK_URL: Optional[str] = None
+    WEBHOOK_LISTEN: str = "127.0.0.1"
+    WEBHOOK_PORT: int = 8443
+    WEBHOOK_PATH: str = "telegram"
+    WEBHOOK_SECRET: Optional[str] = None
+    WEBHOOK_MAX_CONNECTIONS: int = 40
+    # Updates handled concurrently; further updates wait in the queue
+    UPDATE_CONCURRENCY: int = 8
+    # Load pandas, matplotlib and the headless browser in the background
+    # right after startup instead of on the first alert or command
+    WARM_UP_ENABLED: bool = True
     DB_TYPE: str
     SQLITE_DB_NAME: Optional[str]
     PSQL_DB_HOST: Optional[str]
@@ -12,6 +33,76 @@ class Settings(BaseSettings):
     PSQL_DB_DATABASE: Optional[str]
     PSQL_DB_USER: Optional[str]
     PSQL_DB_PASSWORD: Optional[str]
+    ALERT_HOT_DAYS: int = 7
+    ALERT_RETENTION_DAYS: int = 90
+    WRITE_BUFFER_MAX_ITEMS: int = 100
+    WRITE_BUFFER_MAX_DELAY: float = 5.0
+    METRICS_PORT: Optional[int] = None
+    METRICS_HOST: str = "127.0.0.1"
+    LOG_DIR: str = "logs"
+    LOG_LEVEL: str = "INFO"
+    LOG_JSON: bool = False
+    LOG_MAX_BYTES: int = 10 * 1024 * 1024
+    LOG_BACKUP_COUNT: int = 5
+    LOG_DEBUG_SAMPLE_RATE: float = 1.0
+    # Several processes sharing one PostgreSQL database split the symbols
+    # and keywords between them; one of them polls Telegram
+    WORKER_MODE: bool = False
+    WORKER_ID: Optional[str] = None
+    WORKER_SHARDS: int = 64
+    WORKER_HEARTBEAT_INTERVAL: float = 10.0
+    WORKER_LEASE_TIMEOUT: float = 30.0
+    MARKET_HOURS_ENABLED: bool = True
+    ALERT_TICK_INTERVAL: float = 60
+    ALERT_OPEN_INTERVAL: float = 600
+    ALERT_EDGE_INTERVAL: float = 120
+    ALERT_EDGE_WINDOW: float = 1800
+    ALERT_CLOSED_INTERVAL: float = 6 * 3600
+    # Comma separated CODE:YYYY-MM-DD entries, e.g. "KRX:2026-09-28"
+    MARKET_HOLIDAYS_EXTRA: str = ""
+    # Evaluate RSI alerts on every quote from a real-time stream; symbols
+    # the stream delivers are left out of the polling cycle while it is up.
+    # STREAM_PROVIDER is "yfinance" or "replay" (a symbol,timestamp,price CSV)
+    STREAM_ENABLED: bool = False
+    STREAM_PROVIDER: str = "yfinance"
+    STREAM_REPLAY_FILE: Optional[str] = None
+    STREAM_REPLAY_SPEED: float = 1.0
+    STREAM_RETRY_INTERVAL: float = 60.0
+    STREAM_REFRESH_INTERVAL: float = 60.0
+    # Only BAR_BASE_INTERVAL bars are downloaded (at most every
+    # BAR_REFRESH_INTERVAL seconds per symbol); alerts, rules and charts use
+    # ALERT_TIMEFRAME bars aggregated from them (5m, 15m, 30m, 1h, 1d, 1wk)
+    BAR_BASE_INTERVAL: str = "5m"
+    BAR_REFRESH_INTERVAL: float = 60.0
+    ALERT_TIMEFRAME: str = "1d"
+    # Cached bars are float64; float32 halves their memory at about seven
+    # significant digits
+    BAR_CACHE_DTYPE: str = "float64"
+    # Seconds /chart reuses a fetched history or rendered chart
+    COMMAND_CACHE_TTL: float = 60.0
+    # Seconds a quote is reused by /quote and /portfolio before refetching
+    QUOTE_CACHE_TTL: float = 60.0
+    # Cached bars, rule states, the news dedup index and feed validators are
+    # saved to SNAPSHOT_FILE every SNAPSHOT_INTERVAL seconds and on shutdown
+    # and loaded at startup, so a restart resumes instead of starting cold.
+    # Off by default; in worker mode give every worker its own file
+    SNAPSHOT_FILE: Optional[str] = None
+    SNAPSHOT_INTERVAL: float = 300.0
+    NEWS_INTERVAL: float = 3600
+    # Seconds a cycle may spend before deferring the rest to the next one;
+    # defaults to 80% of the job interval
+    ALERT_CYCLE_BUDGET: Optional[float] = None
+    NEWS_CYCLE_BUDGET: Optional[float] = None
+    # Per upstream host: requests per second, burst and concurrent requests
+    FETCH_RATE: float = 2.0
+    FETCH_BURST: int = 5
+    FETCH_CONCURRENCY: int = 4
+    BROWSER_CONCURRENCY: int = 2
+    FETCH_MAX_ATTEMPTS: int = 3
+    FETCH_BACKOFF_BASE: float = 1.0
+    FETCH_BACKOFF_MAX: float = 30.0
+    FETCH_BREAKER_THRESHOLD: int = 5
+    FETCH_BREAKER_COOL_OFF: float = 300.0
 
     class Config:
         env_file = ".env"
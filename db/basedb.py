@@ -1,6 +1,18 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
-from .models import Alert, WatchedKeyword, Portfolio
+from datetime import date, datetime, timedelta
+from itertools import islice
+from typing import Iterator, List, Optional, Sequence, Tuple
+from .models import AlertCursor, AlertRollup, RetentionReport
+from .rows import (
+    AlertPage,
+    AlertRow,
+    AlertRuleRow,
+    PortfolioRow,
+    SubscriptionRow,
+    WatchedKeywordRow,
+)
+
+ALERT_COLUMNS = "id, symbol, alert_type, price, timestamp"
 
 
 class BaseDB(ABC):
@@ -17,17 +29,91 @@ class BaseDB(ABC):
         pass
 
     @abstractmethod
-    def get_alerts(self) -> List[Alert]:
-        """Retrieve all alerts"""
+    def add_alerts(self, alerts: List[AlertRow]) -> None:
+        """Add several alerts in a single transaction"""
+        pass
+
+    def get_alerts(self, limit: Optional[int] = None) -> List[AlertRow]:
+        """Retrieve alerts newest first (prefer iter_alerts for large histories)"""
+        return list(islice(self.iter_alerts(), limit))
+
+    @abstractmethod
+    def iter_alerts(
+        self,
+        symbol: Optional[str] = None,
+        alert_type: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        batch_size: int = 500,
+    ) -> Iterator[AlertRow]:
+        """Stream alerts newest first, fetching batch_size rows at a time"""
+        pass
+
+    @abstractmethod
+    def get_alert_page(
+        self,
+        limit: int = 20,
+        cursor: Optional[AlertCursor] = None,
+        symbol: Optional[str] = None,
+        alert_type: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> AlertPage:
+        """Fetch one keyset-paginated page of alerts, newest first"""
+        pass
+
+    @abstractmethod
+    def check_duplicate_alert(
+        self, symbol: str, alert_type: Optional[str] = None
+    ) -> bool:
+        """
+        Find duplicate alerts within the last 24 hours: of alert_type if
+        given, otherwise of any SIGNAL_ALERT_TYPES
+        """
         pass
 
     @abstractmethod
-    def check_duplicate_alert(self, symbol: str) -> Optional[Alert]:
-        """Find duplicate alerts within the last 24 hours"""
+    def claim_alert(
+        self,
+        symbol: str,
+        alert_type: str,
+        price: float,
+        cooldown: timedelta,
+        by_type: bool = False,
+    ) -> bool:
+        """
+        Record an alert unless the symbol already alerted within cooldown
+
+        The check and the insert are atomic, also across processes sharing
+        the database, so exactly one caller wins a given alert. Earlier
+        alerts of SIGNAL_ALERT_TYPES count, or with by_type only those of
+        the same alert_type.
+
+        Returns:
+            True if the alert was recorded and should be sent
+        """
+        pass
+
+    @abstractmethod
+    def apply_retention(
+        self, hot_days: int, retention_days: int, now: Optional[datetime] = None
+    ) -> RetentionReport:
+        """
+        Keep alert_history small: move alerts older than hot_days out of the
+        hot table, and compact raw alerts older than retention_days into
+        daily per-symbol rollups before dropping them
+        """
         pass
 
     @abstractmethod
-    def get_watched_keywords(self) -> List[WatchedKeyword]:
+    def get_alert_rollups(
+        self, symbol: Optional[str] = None, since: Optional[date] = None
+    ) -> List[AlertRollup]:
+        """Get daily alert rollups, newest first"""
+        pass
+
+    @abstractmethod
+    def get_watched_keywords(self) -> List[WatchedKeywordRow]:
         """Get all watched keywords"""
         pass
 
@@ -47,11 +133,126 @@ class BaseDB(ABC):
         pass
 
     @abstractmethod
-    def get_symbols(self) -> List[Portfolio]:
+    def get_symbols(self) -> List[PortfolioRow]:
         """Get all symbols"""
         pass
 
+    @abstractmethod
+    def add_subscription(self, chat_id: int, kind: str, value: str) -> bool:
+        """Subscribe a chat to a symbol or keyword; False if already subscribed"""
+        pass
+
+    @abstractmethod
+    def remove_subscription(self, chat_id: int, kind: str, value: str) -> bool:
+        """Unsubscribe a chat; False if it was not subscribed"""
+        pass
+
+    @abstractmethod
+    def get_subscriptions(
+        self, chat_id: Optional[int] = None, kind: Optional[str] = None
+    ) -> List[SubscriptionRow]:
+        """Get subscriptions, optionally for one chat and/or kind"""
+        pass
+
+    @abstractmethod
+    def add_alert_rule(
+        self, chat_id: int, symbol: Optional[str], expression: str
+    ) -> int:
+        """Store a chat's alert rule, for one symbol or all; returns its id"""
+        pass
+
+    @abstractmethod
+    def remove_alert_rule(self, chat_id: int, rule_id: int) -> bool:
+        """Delete a chat's rule; False if the chat has no such rule"""
+        pass
+
+    @abstractmethod
+    def get_alert_rules(self, chat_id: Optional[int] = None) -> List[AlertRuleRow]:
+        """Get alert rules, optionally of one chat, in id order"""
+        pass
+
     @abstractmethod
     def close(self) -> None:
         """Close database connection"""
         pass
+
+    @staticmethod
+    def _alert_query(
+        placeholder: str,
+        symbol: Optional[str] = None,
+        alert_type: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        cursor: Optional[AlertCursor] = None,
+        limit: Optional[int] = None,
+        tables: Sequence[str] = ("alert_history",),
+    ) -> Tuple[str, tuple]:
+        """
+        Build a filtered alert history query ordered for keyset pagination
+
+        Args:
+            placeholder: Parameter marker of the driver ("?" or "%s")
+            symbol: Only alerts for this symbol
+            alert_type: Only alerts of this type (BUY/SELL)
+            since: Only alerts at or after this time
+            until: Only alerts before this time
+            cursor: Only alerts strictly after this position in the ordering
+            limit: Maximum number of rows
+            tables: Tables holding alerts, read as one UNION ALL
+
+        Returns:
+            Tuple of SQL string and its parameters
+        """
+        conditions, params = [], []
+        if symbol is not None:
+            conditions.append(f"symbol = {placeholder}")
+            params.append(symbol)
+        if alert_type is not None:
+            conditions.append(f"alert_type = {placeholder}")
+            params.append(alert_type)
+        if since is not None:
+            conditions.append(f"timestamp >= {placeholder}")
+            params.append(since)
+        if until is not None:
+            conditions.append(f"timestamp < {placeholder}")
+            params.append(until)
+        if cursor is not None:
+            conditions.append(f"(timestamp, id) < ({placeholder}, {placeholder})")
+            params.extend([cursor.timestamp, cursor.id])
+
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        query = " UNION ALL ".join(
+            f"SELECT {ALERT_COLUMNS} FROM {table}{where}" for table in tables
+        )
+        query += " ORDER BY timestamp DESC, id DESC"
+        if limit is not None:
+            query += f" LIMIT {int(limit)}"
+        return query, tuple(params) * len(tables)
+
+    @staticmethod
+    def _subscription_query(
+        placeholder: str, chat_id: Optional[int] = None, kind: Optional[str] = None
+    ) -> Tuple[str, tuple]:
+        """Build a subscriptions query for get_subscriptions"""
+        conditions, params = [], []
+        if chat_id is not None:
+            conditions.append(f"chat_id = {placeholder}")
+            params.append(chat_id)
+        if kind is not None:
+            conditions.append(f"kind = {placeholder}")
+            params.append(kind)
+
+        query = "SELECT chat_id, kind, value FROM subscriptions"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY kind, value, chat_id"
+        return query, tuple(params)
+
+    @staticmethod
+    def _build_alert_page(alerts: List[AlertRow], limit: int) -> AlertPage:
+        """Trim a limit + 1 row fetch into a page and its continuation cursor"""
+        if len(alerts) <= limit:
+            return AlertPage(alerts)
+        page = alerts[:limit]
+        last = page[-1]
+        return AlertPage(page, AlertCursor(timestamp=last.timestamp, id=last.id))
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+from typing import List, Optional
+from utils.write_buffer import WriteBehindBuffer
+from .basedb import BaseDB
+from .rows import SIGNAL_ALERT_TYPES, AlertRow
+
+
+class AlertWriteBuffer:
+    """
+    Write-behind buffer for alert history
+
+    Alerts are committed in bulk through BaseDB.add_alerts. The cooldown
+    check consults pending alerts before the database, so a buffered alert
+    suppresses duplicates exactly like a committed one.
+
+    With shared=True (several workers on one database) claim_alert writes
+    through with BaseDB.claim_alert instead, because a buffered alert is
+    invisible to the other workers.
+    """
+
+    COOLDOWN = timedelta(hours=24)
+
+    def __init__(
+        self,
+        db: BaseDB,
+        max_items: int = 100,
+        max_delay: float = 5.0,
+        shared: bool = False,
+    ):
+        self.db = db
+        self.shared = shared
+        self._buffer = WriteBehindBuffer(
+            db.add_alerts, max_items, max_delay, name="alert_history"
+        )
+
+    def add_alert(self, symbol: str, alert_type: str, price: float) -> None:
+        self._buffer.add(AlertRow(None, symbol, alert_type, price, datetime.now()))
+
+    def claim_alert(
+        self, symbol: str, alert_type: str, price: float, by_type: bool = False
+    ) -> bool:
+        """
+        Record an alert unless one is within the cooldown; True if recorded
+
+        The cooldown is per symbol, or per symbol and alert type with by_type.
+        """
+        if self.shared:
+            return self.db.claim_alert(
+                symbol, alert_type, price, self.COOLDOWN, by_type=by_type
+            )
+        if self.check_duplicate_alert(symbol, alert_type if by_type else None):
+            return False
+        self.add_alert(symbol, alert_type, price)
+        return True
+
+    def check_duplicate_alert(
+        self, symbol: str, alert_type: Optional[str] = None
+    ) -> bool:
+        cutoff = datetime.now() - self.COOLDOWN
+        for alert in self._buffer.pending():
+            if (
+                alert.symbol == symbol
+                and alert.timestamp > cutoff
+                and alert.alert_type
+                in ((alert_type,) if alert_type else SIGNAL_ALERT_TYPES)
+            ):
+                return True
+        return self.db.check_duplicate_alert(symbol, alert_type)
+
+    def pending(self) -> List[AlertRow]:
+        return self._buffer.pending()
+
+    def flush_if_due(self) -> int:
+        return self._buffer.flush_if_due()
+
+    def flush(self) -> int:
+        return self._buffer.flush()
+
+    def close(self) -> None:
+        self._buffer.close()
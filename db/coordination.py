@@ -0,0 +1,169 @@
+import os
+import socket
+from dataclasses import dataclass, field
+from typing import FrozenSet, List, Optional
+import psycopg2
+from utils.hash_ring import HashRing, shard_for
+from utils.logger import setup_logger
+
+# Advisory lock classes (first key of the two-key form) used by workers
+SHARD_LOCK_CLASS = 0x53544B31  # "STK1"
+LEADER_LOCK_CLASS = 0x53544B32  # "STK2"
+
+
+@dataclass(frozen=True)
+class ClusterState:
+    live_workers: List[str] = field(default_factory=list)
+    owned_shards: FrozenSet[int] = frozenset()
+    is_leader: bool = False
+
+
+class WorkerCoordinator:
+    """
+    Share the symbol/keyword universe between worker processes
+
+    Keys hash into a fixed number of shards, and shards are assigned to the
+    live workers with a consistent hash ring, so a worker joining or leaving
+    only moves its own share. Liveness is a lease: every worker refreshes
+    its row in the workers table on each heartbeat, and rows older than
+    lease_timeout are reaped (their database session is terminated, which
+    releases any advisory locks the dead worker still held).
+
+    A worker only processes a shard while it holds that shard's session
+    advisory lock, so two workers never own the same shard even while the
+    ring is converging after a change. One more advisory lock elects the
+    leader, which owns Telegram polling and the maintenance jobs.
+
+    The coordinator uses its own autocommit connection so its session locks
+    are independent of the main database connection's transactions.
+    """
+
+    def __init__(
+        self,
+        connection_config: dict,
+        worker_id: Optional[str] = None,
+        shards: int = 64,
+        lease_timeout: float = 30.0,
+    ):
+        self.connection_config = connection_config
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.shards = shards
+        self.lease_timeout = lease_timeout
+        self.state = ClusterState()
+        self.conn = None
+        self.logger = setup_logger("db.coordination")
+
+    @property
+    def is_leader(self) -> bool:
+        return self.state.is_leader
+
+    def owns(self, key: str) -> bool:
+        return shard_for(key, self.shards) in self.state.owned_shards
+
+    def _connect(self) -> None:
+        self.conn = psycopg2.connect(**self.connection_config)
+        self.conn.autocommit = True
+        with self.conn.cursor() as cursor:
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS workers (
+                    worker_id TEXT PRIMARY KEY,
+                    backend_pid INTEGER NOT NULL,
+                    started_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                    heartbeat_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+                )
+            """
+            )
+
+    def heartbeat(self) -> ClusterState:
+        """
+        Renew the lease, reap expired workers and rebalance shard ownership
+
+        Runs blocking database calls; call it from a worker thread. On a
+        database error the worker gives up all shards and leadership and
+        reconnects on the next heartbeat.
+        """
+        try:
+            if self.conn is None or self.conn.closed:
+                self._connect()
+            with self.conn.cursor() as cursor:
+                live_workers = self._renew_lease(cursor)
+                owned = self._rebalance(cursor, live_workers)
+                is_leader = self._elect(cursor)
+        except psycopg2.Error as e:
+            self.logger.error(f"Worker heartbeat failed, releasing shards: {e}")
+            self.state = ClusterState()
+            if self.conn is not None:
+                self.conn.close()
+            return self.state
+
+        if owned != self.state.owned_shards or is_leader != self.state.is_leader:
+            self.logger.info(
+                f"Worker {self.worker_id}: {len(owned)}/{self.shards} shards, "
+                f"{len(live_workers)} live workers"
+                f"{', leader' if is_leader else ''}"
+            )
+        self.state = ClusterState(live_workers, owned, is_leader)
+        return self.state
+
+    def _renew_lease(self, cursor) -> List[str]:
+        cursor.execute(
+            """INSERT INTO workers (worker_id, backend_pid)
+               VALUES (%s, pg_backend_pid())
+               ON CONFLICT (worker_id) DO UPDATE
+               SET heartbeat_at = NOW(), backend_pid = EXCLUDED.backend_pid""",
+            (self.worker_id,),
+        )
+        # Reap expired leases; terminating the session frees its locks
+        cursor.execute(
+            """DELETE FROM workers
+               WHERE heartbeat_at < NOW() - make_interval(secs => %s)
+               RETURNING worker_id, backend_pid""",
+            (self.lease_timeout,),
+        )
+        for worker_id, backend_pid in cursor.fetchall():
+            self.logger.warning(f"Worker {worker_id} lease expired, reaping")
+            cursor.execute("SELECT pg_terminate_backend(%s)", (backend_pid,))
+        cursor.execute("SELECT worker_id FROM workers ORDER BY worker_id")
+        return [row[0] for row in cursor.fetchall()]
+
+    def _rebalance(self, cursor, live_workers: List[str]) -> FrozenSet[int]:
+        ring = HashRing(live_workers)
+        wanted = {
+            shard
+            for shard in range(self.shards)
+            if ring.node_for(f"shard-{shard}") == self.worker_id
+        }
+        owned = set(self.state.owned_shards)
+
+        for shard in owned - wanted:
+            cursor.execute(
+                "SELECT pg_advisory_unlock(%s, %s)", (SHARD_LOCK_CLASS, shard)
+            )
+            owned.discard(shard)
+        for shard in wanted - owned:
+            # Fails while the previous owner still holds it; retried next beat
+            cursor.execute(
+                "SELECT pg_try_advisory_lock(%s, %s)", (SHARD_LOCK_CLASS, shard)
+            )
+            if cursor.fetchone()[0]:
+                owned.add(shard)
+        return frozenset(owned)
+
+    def _elect(self, cursor) -> bool:
+        if self.state.is_leader:
+            return True
+        cursor.execute("SELECT pg_try_advisory_lock(%s, 0)", (LEADER_LOCK_CLASS,))
+        return cursor.fetchone()[0]
+
+    def close(self) -> None:
+        """Leave the cluster; closing the session releases every lock"""
+        if self.conn is not None and not self.conn.closed:
+            try:
+                with self.conn.cursor() as cursor:
+                    cursor.execute(
+                        "DELETE FROM workers WHERE worker_id = %s", (self.worker_id,)
+                    )
+            finally:
+                self.conn.close()
+        self.state = ClusterState()
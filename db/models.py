@@ -1,15 +1,47 @@
-from datetime import datetime
+from datetime import date, datetime
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 
 class Alert(BaseModel):
+    id: Optional[int] = None
     symbol: str
     alert_type: str
     price: float
     timestamp: datetime
 
 
+class AlertCursor(BaseModel):
+    """Keyset position in alert history, ordered by (timestamp, id) descending"""
+
+    timestamp: datetime
+    id: int
+
+    def encode(self) -> str:
+        return f"{self.timestamp.isoformat()}|{self.id}"
+
+    @classmethod
+    def decode(cls, token: str) -> "AlertCursor":
+        timestamp, alert_id = token.rsplit("|", 1)
+        return cls(timestamp=datetime.fromisoformat(timestamp), id=int(alert_id))
+
+
+class AlertRollup(BaseModel):
+    day: date
+    symbol: str
+    alert_type: str
+    alert_count: int
+    min_price: float
+    max_price: float
+    avg_price: float
+
+
+class RetentionReport(BaseModel):
+    archived_rows: int = 0
+    rolled_up_rows: int = 0
+    dropped_tables: List[str] = []
+
+
 class WatchedKeyword(BaseModel):
     keyword: str
     last_check: datetime
@@ -18,3 +50,16 @@ class WatchedKeyword(BaseModel):
 class Portfolio(BaseModel):
     ticker: str
     quantity: int
+
+
+class Subscription(BaseModel):
+    chat_id: int
+    kind: str
+    value: str
+
+
+class AlertRule(BaseModel):
+    id: int
+    chat_id: int
+    symbol: Optional[str]
+    expression: str
@@ -1,12 +1,42 @@
 import traceback
-from typing import List, Optional
+import uuid
+from typing import Iterator, List, Optional
 import psycopg2
-from psycopg2.extras import RealDictCursor
-from datetime import datetime
+import psycopg2.extensions
+from psycopg2.extras import RealDictCursor, execute_values
+from datetime import date, datetime, timedelta
 from contextlib import contextmanager
 from .basedb import BaseDB
-from .models import Alert, WatchedKeyword, Portfolio
+from .models import AlertCursor, AlertRollup, RetentionReport
+from .rows import (
+    AlertPage,
+    AlertRow,
+    AlertRuleRow,
+    PortfolioRow,
+    SIGNAL_ALERT_TYPES,
+    SubscriptionRow,
+    WatchedKeywordRow,
+)
 from .exceptions import DatabaseError, DuplicateKeywordError
+from .retention import (
+    PARTITION_PREFIX,
+    add_months,
+    expired_tables,
+    hot_cutoff,
+    month_start,
+    month_table,
+    rollup_sql,
+)
+
+# The cooldown check without an alert type, one placeholder per
+# SIGNAL_ALERT_TYPES
+_SIGNAL_FILTER = " AND alert_type IN (%s, %s)"
+
+ALERT_HISTORY_INDEXES = (
+    "idx_alert_history_symbol_type",
+    "idx_alert_history_timestamp_id",
+    "idx_alert_history_symbol_timestamp",
+)
 
 
 class PostgreSQLDB(BaseDB):
@@ -20,9 +50,9 @@ class PostgreSQLDB(BaseDB):
             raise ConnectionError(f"Failed to connect to PostgreSQL: {e}")
 
     @contextmanager
-    def transaction(self):
+    def transaction(self, cursor_factory=None):
         """Context manager for database transactions"""
-        cursor = self.conn.cursor()
+        cursor = self.conn.cursor(cursor_factory=cursor_factory)
         try:
             yield cursor
             self.conn.commit()
@@ -45,25 +75,205 @@ class PostgreSQLDB(BaseDB):
             """
             )
 
-            # Create alert history table
+            # Create alert history table, range-partitioned by month
+            self._setup_alert_history(cursor)
+
+            # Create portfolio table
             cursor.execute(
                 """
-                CREATE TABLE IF NOT EXISTS alert_history (
-                    id SERIAL PRIMARY KEY,
+                CREATE TABLE IF NOT EXISTS portfolio (
+                    ticker TEXT NOT NULL,
+                    quantity INTEGER NOT NULL
+                )
+            """
+            )
+
+            # Create daily rollup table for compacted alert history
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS alert_daily_rollup (
+                    day DATE NOT NULL,
                     symbol TEXT NOT NULL,
                     alert_type TEXT NOT NULL,
-                    price REAL NOT NULL,
-                    timestamp TIMESTAMP NOT NULL
+                    alert_count INTEGER NOT NULL,
+                    min_price REAL NOT NULL,
+                    max_price REAL NOT NULL,
+                    avg_price REAL NOT NULL,
+                    PRIMARY KEY (day, symbol, alert_type)
                 )
             """
             )
 
-            # Create index for alert history
+            # Create per-chat subscriptions to symbols and keywords
             cursor.execute(
                 """
-                CREATE INDEX IF NOT EXISTS idx_alert_history_symbol_type
-                ON alert_history (symbol, alert_type)
+                CREATE TABLE IF NOT EXISTS subscriptions (
+                    chat_id BIGINT NOT NULL,
+                    kind TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    created_at TIMESTAMP NOT NULL,
+                    PRIMARY KEY (chat_id, kind, value)
+                )
+            """
+            )
+            cursor.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_subscriptions_kind_value
+                ON subscriptions (kind, value)
+            """
+            )
+
+            # Create user-defined alert rules, per chat and optionally symbol
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS alert_rules (
+                    id BIGSERIAL PRIMARY KEY,
+                    chat_id BIGINT NOT NULL,
+                    symbol TEXT,
+                    expression TEXT NOT NULL,
+                    created_at TIMESTAMP NOT NULL
+                )
+            """
+            )
+            cursor.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_alert_rules_chat_id
+                ON alert_rules (chat_id)
+            """
+            )
+
+    def _setup_alert_history(self, cursor) -> None:
+        """Create the partitioned alert_history, migrating a plain table if found"""
+        cursor.execute(
+            """SELECT c.relkind FROM pg_class c
+               JOIN pg_namespace n ON n.oid = c.relnamespace
+               WHERE c.relname = 'alert_history' AND n.nspname = current_schema()"""
+        )
+        row = cursor.fetchone()
+        legacy = row is not None and row["relkind"] == "r"
+        if legacy:
+            # Tables created before partitioning are moved aside and copied over
+            for index in ALERT_HISTORY_INDEXES:
+                cursor.execute(f"DROP INDEX IF EXISTS {index}")
+            cursor.execute("ALTER TABLE alert_history RENAME TO alert_history_legacy")
+            cursor.execute(
+                "ALTER SEQUENCE IF EXISTS alert_history_id_seq "
+                "RENAME TO alert_history_legacy_id_seq"
+            )
+
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS alert_history (
+                id BIGSERIAL,
+                symbol TEXT NOT NULL,
+                alert_type TEXT NOT NULL,
+                price REAL NOT NULL,
+                timestamp TIMESTAMP NOT NULL,
+                PRIMARY KEY (id, timestamp)
+            ) PARTITION BY RANGE (timestamp)
+        """
+        )
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS alert_history_default
+               PARTITION OF alert_history DEFAULT"""
+        )
+
+        # Create index for alert history
+        cursor.execute(
             """
+            CREATE INDEX IF NOT EXISTS idx_alert_history_symbol_type
+            ON alert_history (symbol, alert_type)
+        """
+        )
+
+        # Create indexes for keyset pagination over alert history
+        cursor.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_alert_history_timestamp_id
+            ON alert_history (timestamp DESC, id DESC)
+        """
+        )
+        cursor.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_alert_history_symbol_timestamp
+            ON alert_history (symbol, timestamp DESC, id DESC)
+        """
+        )
+
+        current = month_start(datetime.now())
+        first = current
+        if legacy:
+            cursor.execute("SELECT MIN(timestamp) AS oldest FROM alert_history_legacy")
+            oldest = cursor.fetchone()["oldest"]
+            if oldest is not None:
+                first = min(first, month_start(oldest))
+        self._ensure_partitions(cursor, first, add_months(current, 1))
+
+        if legacy:
+            cursor.execute(
+                """INSERT INTO alert_history (id, symbol, alert_type, price, timestamp)
+                   SELECT id, symbol, alert_type, price, timestamp
+                   FROM alert_history_legacy"""
+            )
+            cursor.execute(
+                """SELECT setval(
+                       pg_get_serial_sequence('alert_history', 'id'),
+                       COALESCE((SELECT MAX(id) FROM alert_history), 0) + 1,
+                       false
+                   )"""
+            )
+            cursor.execute("DROP TABLE alert_history_legacy")
+
+    @staticmethod
+    def _ensure_partitions(cursor, first: date, last: date) -> None:
+        """
+        Create monthly alert_history partitions from first to last inclusive
+
+        Rows of a month without a partition land in alert_history_default,
+        and PostgreSQL refuses to create a partition for a range the default
+        partition has rows in. Such a month's partition is created as a
+        plain table, the rows are moved into it and it is then attached,
+        all in the caller's transaction.
+        """
+        month = first
+        while month <= last:
+            table = month_table(PARTITION_PREFIX, month)
+            bounds = (month, add_months(month, 1))
+            month = bounds[1]
+            cursor.execute("SELECT to_regclass(%s) IS NOT NULL AS found", (table,))
+            if cursor.fetchone()["found"]:
+                continue
+            cursor.execute(
+                """SELECT 1 FROM alert_history_default
+                   WHERE timestamp >= %s AND timestamp < %s LIMIT 1""",
+                bounds,
+            )
+            if cursor.fetchone() is None:
+                cursor.execute(
+                    f"""CREATE TABLE {table} PARTITION OF alert_history
+                        FOR VALUES FROM (%s) TO (%s)""",
+                    bounds,
+                )
+                continue
+            cursor.execute(
+                f"""CREATE TABLE {table}
+                    (LIKE alert_history INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"""
+            )
+            cursor.execute(
+                f"""WITH moved AS (
+                        DELETE FROM alert_history_default
+                        WHERE timestamp >= %s AND timestamp < %s
+                        RETURNING id, symbol, alert_type, price, timestamp
+                    )
+                    INSERT INTO {table} (id, symbol, alert_type, price, timestamp)
+                    SELECT id, symbol, alert_type, price, timestamp FROM moved""",
+                bounds,
+            )
+            # Attaching builds the partition's copies of the indexes
+            cursor.execute(
+                f"""ALTER TABLE alert_history ATTACH PARTITION {table}
+                    FOR VALUES FROM (%s) TO (%s)""",
+                bounds,
             )
 
     # PostgreSQL specific implementations follow the same pattern as SQLite
@@ -76,26 +286,179 @@ class PostgreSQLDB(BaseDB):
                 (symbol, alert_type, price, datetime.now()),
             )
 
-    def get_alerts(self) -> List[Alert]:
+    def add_alerts(self, alerts: List[AlertRow]) -> None:
         with self.transaction() as cursor:
-            cursor.execute("SELECT * FROM alert_history ORDER BY timestamp DESC")
-            return [Alert(**row) for row in cursor.fetchall()]
+            execute_values(
+                cursor,
+                """INSERT INTO alert_history (symbol, alert_type, price, timestamp)
+                   VALUES %s""",
+                [(a.symbol, a.alert_type, a.price, a.timestamp) for a in alerts],
+                page_size=500,
+            )
+
+    def iter_alerts(
+        self,
+        symbol: Optional[str] = None,
+        alert_type: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        batch_size: int = 500,
+    ) -> Iterator[AlertRow]:
+        """
+        Stream alerts through a server-side named cursor
 
-    def check_duplicate_alert(self, symbol: str) -> Optional[Alert]:
+        The cursor lives inside the connection's current transaction, so
+        other writes on this connection must not commit while iterating.
+        """
+        query, params = self._alert_query("%s", symbol, alert_type, since, until)
+        cursor = self.conn.cursor(
+            name=f"alert_stream_{uuid.uuid4().hex}",
+            cursor_factory=psycopg2.extensions.cursor,
+        )
+        cursor.itersize = batch_size
+        try:
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield AlertRow.from_tuple(row)
+        except psycopg2.Error as e:
+            self.conn.rollback()
+            raise DatabaseError(f"Failed to stream alerts: {e}")
+        finally:
+            if not cursor.closed:
+                cursor.close()
+            self.conn.commit()
+
+    def get_alert_page(
+        self,
+        limit: int = 20,
+        cursor: Optional[AlertCursor] = None,
+        symbol: Optional[str] = None,
+        alert_type: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> AlertPage:
+        query, params = self._alert_query(
+            "%s", symbol, alert_type, since, until, cursor, limit + 1
+        )
+        with self.transaction(psycopg2.extensions.cursor) as db_cursor:
+            db_cursor.execute(query, params)
+            alerts = [AlertRow.from_tuple(row) for row in db_cursor.fetchall()]
+        return self._build_alert_page(alerts, limit)
+
+    def check_duplicate_alert(
+        self, symbol: str, alert_type: Optional[str] = None
+    ) -> bool:
+        # Timestamps are written as local datetime.now(), so the cutoff is
+        # computed the same way rather than by the database
+        query = """SELECT * FROM alert_history
+                   WHERE symbol = %s
+                   AND timestamp > %s"""
+        params = (symbol, datetime.now() - timedelta(hours=24))
+        if alert_type is not None:
+            query += " AND alert_type = %s"
+            params += (alert_type,)
+        else:
+            query += _SIGNAL_FILTER
+            params += SIGNAL_ALERT_TYPES
         with self.transaction() as cursor:
+            cursor.execute(query + " LIMIT 1", params)
+            return bool(cursor.fetchone())
+
+    def claim_alert(
+        self,
+        symbol: str,
+        alert_type: str,
+        price: float,
+        cooldown: timedelta,
+        by_type: bool = False,
+    ) -> bool:
+        now = datetime.now()
+        type_filter = " AND alert_type = %s" if by_type else _SIGNAL_FILTER
+        params = (symbol, alert_type, price, now, symbol, now - cooldown)
+        with self.transaction() as cursor:
+            # Serialize claims for the symbol across connections; the lock is
+            # released at commit, after the insert is visible to others
             cursor.execute(
-                """SELECT * FROM alert_history 
-                   WHERE symbol = %s
-                   AND timestamp > NOW() - INTERVAL '24 hours'
-                   LIMIT 1""",
-                (symbol,),
+                "SELECT pg_advisory_xact_lock(hashtext(%s))", (f"alert:{symbol}",)
             )
-            return bool(cursor.fetchone())
+            cursor.execute(
+                f"""INSERT INTO alert_history (symbol, alert_type, price, timestamp)
+                   SELECT %s, %s, %s, %s
+                   WHERE NOT EXISTS (
+                       SELECT 1 FROM alert_history
+                       WHERE symbol = %s AND timestamp > %s{type_filter}
+                   )""",
+                params + ((alert_type,) if by_type else SIGNAL_ALERT_TYPES),
+            )
+            return cursor.rowcount > 0
+
+    def apply_retention(
+        self, hot_days: int, retention_days: int, now: Optional[datetime] = None
+    ) -> RetentionReport:
+        """
+        Roll up and drop monthly partitions older than retention_days
+
+        Partition pruning already keeps cooldown and recent-history queries on
+        the newest partitions, so hot_days needs no data movement here.
+        Upcoming partitions are created on every run.
+        """
+        now = now or datetime.now()
+        report = RetentionReport()
+        with self.transaction() as cursor:
+            current = month_start(now)
+            self._ensure_partitions(cursor, current, add_months(current, 1))
+
+            cursor.execute(
+                """SELECT child.relname AS name FROM pg_inherits i
+                   JOIN pg_class parent ON parent.oid = i.inhparent
+                   JOIN pg_class child ON child.oid = i.inhrelid
+                   WHERE parent.relname = 'alert_history'"""
+            )
+            partitions = [row["name"] for row in cursor.fetchall()]
+            cutoff = hot_cutoff(now, retention_days)
+            for partition in expired_tables(PARTITION_PREFIX, partitions, cutoff):
+                cursor.execute(rollup_sql(partition, "timestamp::date"))
+                report.rolled_up_rows += cursor.rowcount
+                cursor.execute(f"DROP TABLE {partition}")
+                report.dropped_tables.append(partition)
 
-    def get_watched_keywords(self) -> List[WatchedKeyword]:
+            # Rows that landed in the default partition expire row by row
+            cursor.execute(
+                rollup_sql(
+                    "alert_history_default", "timestamp::date", "timestamp < %s"
+                ),
+                (cutoff,),
+            )
+            report.rolled_up_rows += cursor.rowcount
+            cursor.execute(
+                "DELETE FROM alert_history_default WHERE timestamp < %s", (cutoff,)
+            )
+        return report
+
+    def get_alert_rollups(
+        self, symbol: Optional[str] = None, since: Optional[date] = None
+    ) -> List[AlertRollup]:
+        query = "SELECT * FROM alert_daily_rollup WHERE 1 = 1"
+        params = []
+        if symbol is not None:
+            query += " AND symbol = %s"
+            params.append(symbol)
+        if since is not None:
+            query += " AND day >= %s"
+            params.append(since)
+        query += " ORDER BY day DESC, symbol, alert_type"
         with self.transaction() as cursor:
-            cursor.execute("SELECT * FROM watched_keywords")
-            return [WatchedKeyword(**row) for row in cursor.fetchall()]
+            cursor.execute(query, params)
+            return [AlertRollup(**row) for row in cursor.fetchall()]
+
+    def get_watched_keywords(self) -> List[WatchedKeywordRow]:
+        with self.transaction(psycopg2.extensions.cursor) as cursor:
+            cursor.execute("SELECT keyword, last_check FROM watched_keywords")
+            return [WatchedKeywordRow.from_tuple(row) for row in cursor.fetchall()]
 
     def exists_in_watched_keywords(self, keyword: str) -> bool:
         with self.transaction() as cursor:
@@ -121,12 +484,69 @@ class PostgreSQLDB(BaseDB):
                 "DELETE FROM watched_keywords WHERE keyword = %s", (keyword,)
             )
 
-    def get_symbols(self) -> List[Portfolio]:
-        with self.transaction() as cursor:
+    def get_symbols(self) -> List[PortfolioRow]:
+        with self.transaction(psycopg2.extensions.cursor) as cursor:
             cursor.execute(
                 "SELECT ticker, SUM(quantity) AS quantity FROM portfolio GROUP BY ticker ORDER BY ticker"
             )
-            return [Portfolio(**row) for row in cursor.fetchall()]
+            return [PortfolioRow.from_tuple(row) for row in cursor.fetchall()]
+
+    def add_subscription(self, chat_id: int, kind: str, value: str) -> bool:
+        with self.transaction() as cursor:
+            cursor.execute(
+                """INSERT INTO subscriptions (chat_id, kind, value, created_at)
+                   VALUES (%s, %s, %s, %s)
+                   ON CONFLICT (chat_id, kind, value) DO NOTHING""",
+                (chat_id, kind, value, datetime.now()),
+            )
+            return cursor.rowcount > 0
+
+    def remove_subscription(self, chat_id: int, kind: str, value: str) -> bool:
+        with self.transaction() as cursor:
+            cursor.execute(
+                """DELETE FROM subscriptions
+                   WHERE chat_id = %s AND kind = %s AND value = %s""",
+                (chat_id, kind, value),
+            )
+            return cursor.rowcount > 0
+
+    def get_subscriptions(
+        self, chat_id: Optional[int] = None, kind: Optional[str] = None
+    ) -> List[SubscriptionRow]:
+        query, params = self._subscription_query("%s", chat_id, kind)
+        with self.transaction(psycopg2.extensions.cursor) as cursor:
+            cursor.execute(query, params)
+            return [SubscriptionRow.from_tuple(row) for row in cursor.fetchall()]
+
+    def add_alert_rule(
+        self, chat_id: int, symbol: Optional[str], expression: str
+    ) -> int:
+        with self.transaction() as cursor:
+            cursor.execute(
+                """INSERT INTO alert_rules (chat_id, symbol, expression, created_at)
+                   VALUES (%s, %s, %s, %s)
+                   RETURNING id""",
+                (chat_id, symbol, expression, datetime.now()),
+            )
+            return cursor.fetchone()["id"]
+
+    def remove_alert_rule(self, chat_id: int, rule_id: int) -> bool:
+        with self.transaction() as cursor:
+            cursor.execute(
+                "DELETE FROM alert_rules WHERE id = %s AND chat_id = %s",
+                (rule_id, chat_id),
+            )
+            return cursor.rowcount > 0
+
+    def get_alert_rules(self, chat_id: Optional[int] = None) -> List[AlertRuleRow]:
+        query = "SELECT id, chat_id, symbol, expression FROM alert_rules"
+        params: tuple = ()
+        if chat_id is not None:
+            query += " WHERE chat_id = %s"
+            params = (chat_id,)
+        with self.transaction(psycopg2.extensions.cursor) as cursor:
+            cursor.execute(query + " ORDER BY id", params)
+            return [AlertRuleRow.from_tuple(row) for row in cursor.fetchall()]
 
     def close(self) -> None:
         if hasattr(self, "conn") and self.conn:
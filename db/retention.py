@@ -0,0 +1,68 @@
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+
+PARTITION_PREFIX = "alert_history_p"
+ARCHIVE_PREFIX = "alert_history_archive_"
+
+
+def month_start(value: datetime) -> date:
+    """First day of the month containing value"""
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    """Shift a first-of-month date by a number of months"""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_table(prefix: str, month: date) -> str:
+    """Table name for a monthly partition or archive table"""
+    return f"{prefix}{month:%Y%m}"
+
+
+def table_month(prefix: str, name: str) -> Optional[date]:
+    """Parse the month back out of a monthly table name"""
+    suffix = name[len(prefix) :]
+    if not name.startswith(prefix) or len(suffix) != 6 or not suffix.isdigit():
+        return None
+    return date(int(suffix[:4]), int(suffix[4:]), 1)
+
+
+def expired_tables(prefix: str, names: List[str], cutoff: datetime) -> List[str]:
+    """Monthly tables whose whole month lies before cutoff"""
+    expired = []
+    for name in sorted(names):
+        month = table_month(prefix, name)
+        if month is not None and add_months(month, 1) <= cutoff.date():
+            expired.append(name)
+    return expired
+
+
+def hot_cutoff(now: datetime, days: int) -> datetime:
+    """Midnight boundary so that whole days move out of the hot table together"""
+    boundary = now - timedelta(days=days)
+    return datetime(boundary.year, boundary.month, boundary.day)
+
+
+def rollup_sql(source: str, day_expr: str, condition: str = "TRUE") -> str:
+    """
+    Upsert daily per-symbol rollups aggregated from a raw alert table
+
+    Rollups are recomputed from the complete raw day, so running the same
+    compaction twice leaves the rollup unchanged.
+    """
+    return f"""
+        INSERT INTO alert_daily_rollup
+            (day, symbol, alert_type, alert_count, min_price, max_price, avg_price)
+        SELECT {day_expr}, symbol, alert_type,
+               COUNT(*), MIN(price), MAX(price), AVG(price)
+        FROM {source}
+        WHERE {condition}
+        GROUP BY {day_expr}, symbol, alert_type
+        ON CONFLICT (day, symbol, alert_type) DO UPDATE SET
+            alert_count = excluded.alert_count,
+            min_price = excluded.min_price,
+            max_price = excluded.max_price,
+            avg_price = excluded.avg_price
+    """
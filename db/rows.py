@@ -0,0 +1,139 @@
+"""
+Lightweight row types for hot database paths
+
+Rows read back from our own tables are already well-formed, so they are
+materialized straight from cursor tuples into slotted dataclasses instead
+of being validated as Pydantic models. Use to_model() where code still
+needs the Pydantic models from db.models.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, List, Optional, Union
+from .models import (
+    Alert,
+    AlertCursor,
+    AlertRule,
+    WatchedKeyword,
+    Portfolio,
+    Subscription,
+)
+
+
+def _as_datetime(value: Union[str, datetime]) -> datetime:
+    # SQLite hands timestamps back as ISO strings
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+# Alert types of the RSI signal. The cooldown without an alert type covers
+# only these; rule alerts (RULE#<id>) have a cooldown per rule.
+SIGNAL_ALERT_TYPES = ("BUY", "SELL")
+
+
+@dataclass(frozen=True, slots=True)
+class AlertRow:
+    id: Optional[int]
+    symbol: str
+    alert_type: str
+    price: float
+    timestamp: datetime
+
+    @classmethod
+    def from_tuple(cls, row: tuple) -> "AlertRow":
+        return cls(row[0], row[1], row[2], row[3], _as_datetime(row[4]))
+
+    @classmethod
+    def from_model(cls, alert: Alert) -> "AlertRow":
+        return cls(
+            alert.id, alert.symbol, alert.alert_type, alert.price, alert.timestamp
+        )
+
+    def to_model(self) -> Alert:
+        return Alert(
+            id=self.id,
+            symbol=self.symbol,
+            alert_type=self.alert_type,
+            price=self.price,
+            timestamp=self.timestamp,
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class WatchedKeywordRow:
+    keyword: str
+    last_check: datetime
+
+    @classmethod
+    def from_tuple(cls, row: tuple) -> "WatchedKeywordRow":
+        return cls(row[0], _as_datetime(row[1]))
+
+    def to_model(self) -> WatchedKeyword:
+        return WatchedKeyword(keyword=self.keyword, last_check=self.last_check)
+
+
+@dataclass(frozen=True, slots=True)
+class PortfolioRow:
+    ticker: str
+    quantity: int
+
+    @classmethod
+    def from_tuple(cls, row: tuple) -> "PortfolioRow":
+        return cls(row[0], int(row[1]))
+
+    def to_model(self) -> Portfolio:
+        return Portfolio(ticker=self.ticker, quantity=self.quantity)
+
+
+# Subscription kinds: portfolio-style symbol alerts and keyword news alerts
+SUBSCRIPTION_SYMBOL = "symbol"
+SUBSCRIPTION_KEYWORD = "keyword"
+
+
+@dataclass(frozen=True, slots=True)
+class SubscriptionRow:
+    chat_id: int
+    kind: str
+    value: str
+
+    @classmethod
+    def from_tuple(cls, row: tuple) -> "SubscriptionRow":
+        return cls(row[0], row[1], row[2])
+
+    def to_model(self) -> Subscription:
+        return Subscription(chat_id=self.chat_id, kind=self.kind, value=self.value)
+
+
+@dataclass(frozen=True, slots=True)
+class AlertRuleRow:
+    id: int
+    chat_id: int
+    symbol: Optional[str]  # None applies the rule to every symbol of the chat
+    expression: str
+
+    @classmethod
+    def from_tuple(cls, row: tuple) -> "AlertRuleRow":
+        return cls(row[0], row[1], row[2], row[3])
+
+    def to_model(self) -> AlertRule:
+        return AlertRule(
+            id=self.id,
+            chat_id=self.chat_id,
+            symbol=self.symbol,
+            expression=self.expression,
+        )
+
+
+@dataclass(slots=True)
+class AlertPage:
+    alerts: List[AlertRow]
+    next_cursor: Optional[AlertCursor] = None
+
+
+def to_models(rows: Iterable) -> List:
+    """Convert rows to their Pydantic models"""
+    return [row.to_model() for row in rows]
+
+
+def alert_row_factory(cursor, row: tuple) -> AlertRow:
+    """sqlite3 row_factory producing AlertRow"""
+    return AlertRow.from_tuple(row)
@@ -1,10 +1,35 @@
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple
 import sqlite3
-from datetime import datetime
+from datetime import date, datetime, time, timedelta
 from contextlib import contextmanager
 from .basedb import BaseDB
-from .models import Alert, WatchedKeyword, Portfolio
+from .models import AlertCursor, AlertRollup, RetentionReport
+from .rows import (
+    AlertPage,
+    AlertRow,
+    AlertRuleRow,
+    PortfolioRow,
+    SIGNAL_ALERT_TYPES,
+    SubscriptionRow,
+    WatchedKeywordRow,
+    alert_row_factory,
+)
 from .exceptions import DatabaseError, DuplicateKeywordError
+from .retention import (
+    ARCHIVE_PREFIX,
+    add_months,
+    expired_tables,
+    hot_cutoff,
+    month_start,
+    month_table,
+    rollup_sql,
+    table_month,
+)
+
+
+# The cooldown check without an alert type, one placeholder per
+# SIGNAL_ALERT_TYPES
+_SIGNAL_FILTER = " AND alert_type IN (?, ?)"
 
 
 class SQLiteDB(BaseDB):
@@ -14,6 +39,8 @@ class SQLiteDB(BaseDB):
             self.db_path = db_path
             self.conn = sqlite3.connect(db_path)
             self.conn.row_factory = sqlite3.Row
+            # Archive table names and the schema version they were read at
+            self._archives: Optional[Tuple[int, List[str]]] = None
         except sqlite3.Error as e:
             raise ConnectionError(f"Failed to connect to SQLite database: {e}")
 
@@ -50,11 +77,80 @@ class SQLiteDB(BaseDB):
                     symbol TEXT NOT NULL,
                     alert_type TEXT NOT NULL,
                     price REAL NOT NULL,
-                    timestamp TIMESTAMP NOT NULL,
-                    INDEX idx_symbol_type (symbol, alert_type)
+                    timestamp TIMESTAMP NOT NULL
+                )
+            """
+            )
+
+            # Create indexes for alert history lookups and keyset pagination
+            self._create_alert_indexes(cursor, "alert_history")
+            # Archives made before they were indexed get the same indexes
+            for archive in self._list_archives(cursor):
+                self._create_alert_indexes(cursor, archive)
+
+            # Create portfolio table
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS portfolio (
+                    ticker TEXT NOT NULL,
+                    quantity INTEGER NOT NULL
+                )
+            """
+            )
+
+            # Create daily rollup table for compacted alert history
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS alert_daily_rollup (
+                    day DATE NOT NULL,
+                    symbol TEXT NOT NULL,
+                    alert_type TEXT NOT NULL,
+                    alert_count INTEGER NOT NULL,
+                    min_price REAL NOT NULL,
+                    max_price REAL NOT NULL,
+                    avg_price REAL NOT NULL,
+                    PRIMARY KEY (day, symbol, alert_type)
+                )
+            """
+            )
+
+            # Create per-chat subscriptions to symbols and keywords
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS subscriptions (
+                    chat_id INTEGER NOT NULL,
+                    kind TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    created_at TIMESTAMP NOT NULL,
+                    PRIMARY KEY (chat_id, kind, value)
                 )
             """
             )
+            cursor.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_subscriptions_kind_value
+                ON subscriptions (kind, value)
+            """
+            )
+
+            # Create user-defined alert rules, per chat and optionally symbol
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS alert_rules (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    chat_id INTEGER NOT NULL,
+                    symbol TEXT,
+                    expression TEXT NOT NULL,
+                    created_at TIMESTAMP NOT NULL
+                )
+            """
+            )
+            cursor.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_alert_rules_chat_id
+                ON alert_rules (chat_id)
+            """
+            )
 
     def add_alert(self, symbol: str, alert_type: str, price: float) -> None:
         with self.transaction() as cursor:
@@ -64,26 +160,258 @@ class SQLiteDB(BaseDB):
                 (symbol, alert_type, price, datetime.now()),
             )
 
-    def get_alerts(self) -> List[Alert]:
+    def add_alerts(self, alerts: List[AlertRow]) -> None:
         with self.transaction() as cursor:
-            cursor.execute("SELECT * FROM alert_history ORDER BY timestamp DESC")
-            return [Alert(**dict(row)) for row in cursor.fetchall()]
+            cursor.executemany(
+                """INSERT INTO alert_history (symbol, alert_type, price, timestamp)
+                   VALUES (?, ?, ?, ?)""",
+                [(a.symbol, a.alert_type, a.price, a.timestamp) for a in alerts],
+            )
 
-    def check_duplicate_alert(self, symbol: str) -> Optional[Alert]:
+    def iter_alerts(
+        self,
+        symbol: Optional[str] = None,
+        alert_type: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        batch_size: int = 500,
+    ) -> Iterator[AlertRow]:
+        query, params = self._alert_query(
+            "?",
+            symbol,
+            alert_type,
+            since,
+            until,
+            tables=self._alert_tables(since, until),
+        )
+        cursor = self.conn.cursor()
+        cursor.row_factory = alert_row_factory
+        try:
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Failed to stream alerts: {e}")
+        finally:
+            cursor.close()
+
+    def get_alert_page(
+        self,
+        limit: int = 20,
+        cursor: Optional[AlertCursor] = None,
+        symbol: Optional[str] = None,
+        alert_type: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> AlertPage:
+        query, params = self._alert_query(
+            "?",
+            symbol,
+            alert_type,
+            since,
+            until,
+            cursor,
+            limit + 1,
+            self._alert_tables(since, until, cursor),
+        )
+        with self.transaction() as db_cursor:
+            db_cursor.row_factory = alert_row_factory
+            db_cursor.execute(query, params)
+            alerts = db_cursor.fetchall()
+        return self._build_alert_page(alerts, limit)
+
+    def _alert_tables(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        cursor: Optional[AlertCursor] = None,
+    ) -> List[str]:
+        """
+        alert_history and the archive tables apply_retention moved older
+        alerts to, leaving out months outside since..until and months that
+        start after the cursor
+        """
+        tables = ["alert_history"]
+        for name in sorted(self._archive_tables(), reverse=True):
+            month = table_month(ARCHIVE_PREFIX, name)
+            if month is None:
+                continue
+            start = datetime.combine(month, time())
+            end = datetime.combine(add_months(month, 1), time())
+            if since is not None and end <= since:
+                continue
+            if until is not None and start >= until:
+                continue
+            if cursor is not None and start > cursor.timestamp:
+                continue
+            tables.append(name)
+        return tables
+
+    def _archive_tables(self) -> List[str]:
+        """
+        Names of the archive tables, listed again only after the schema
+        changed (here or in another connection)
+        """
         with self.transaction() as cursor:
-            cursor.execute(
-                """SELECT * FROM alert_history 
+            cursor.execute("PRAGMA schema_version")
+            version = cursor.fetchone()[0]
+            if self._archives is None or self._archives[0] != version:
+                self._archives = (version, self._list_archives(cursor))
+        return self._archives[1]
+
+    @staticmethod
+    def _list_archives(cursor) -> List[str]:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE ?",
+            (f"{ARCHIVE_PREFIX}%",),
+        )
+        return [row["name"] for row in cursor.fetchall()]
+
+    def check_duplicate_alert(
+        self, symbol: str, alert_type: Optional[str] = None
+    ) -> bool:
+        # Timestamps are written as local datetime.now(), so the cutoff is
+        # computed the same way rather than by the database
+        query = """SELECT * FROM alert_history
                    WHERE symbol = ?
-                   AND timestamp > datetime('now', '-24 hours')
-                   LIMIT 1""",
-                (symbol,),
-            )
+                   AND timestamp > ?"""
+        params = (symbol, datetime.now() - timedelta(hours=24))
+        if alert_type is not None:
+            query += " AND alert_type = ?"
+            params += (alert_type,)
+        else:
+            query += _SIGNAL_FILTER
+            params += SIGNAL_ALERT_TYPES
+        with self.transaction() as cursor:
+            cursor.execute(query + " LIMIT 1", params)
             return bool(cursor.fetchone())
 
-    def get_watched_keywords(self) -> List[WatchedKeyword]:
+    def claim_alert(
+        self,
+        symbol: str,
+        alert_type: str,
+        price: float,
+        cooldown: timedelta,
+        by_type: bool = False,
+    ) -> bool:
+        now = datetime.now()
+        type_filter = " AND alert_type = ?" if by_type else _SIGNAL_FILTER
+        params = (symbol, alert_type, price, now, symbol, now - cooldown)
         with self.transaction() as cursor:
-            cursor.execute("SELECT * FROM watched_keywords")
-            return [WatchedKeyword(**dict(row)) for row in cursor.fetchall()]
+            # A single statement runs under SQLite's write lock
+            cursor.execute(
+                f"""INSERT INTO alert_history (symbol, alert_type, price, timestamp)
+                   SELECT ?, ?, ?, ?
+                   WHERE NOT EXISTS (
+                       SELECT 1 FROM alert_history
+                       WHERE symbol = ? AND timestamp > ?{type_filter}
+                   )""",
+                params + ((alert_type,) if by_type else SIGNAL_ALERT_TYPES),
+            )
+            return cursor.rowcount > 0
+
+    def apply_retention(
+        self, hot_days: int, retention_days: int, now: Optional[datetime] = None
+    ) -> RetentionReport:
+        """
+        Rotate old alerts into monthly archive tables and drop expired ones
+
+        alert_history keeps only the last hot_days, older rows move to
+        alert_history_archive_YYYYMM. Archive tables whose month is entirely
+        older than retention_days are rolled up and dropped.
+        """
+        now = now or datetime.now()
+        report = RetentionReport()
+        with self.transaction() as cursor:
+            boundary = hot_cutoff(now, hot_days)
+            cursor.execute(
+                """SELECT DISTINCT substr(timestamp, 1, 7) AS month
+                   FROM alert_history WHERE timestamp < ?""",
+                (boundary,),
+            )
+            for row in cursor.fetchall():
+                month = datetime.strptime(row["month"], "%Y-%m")
+                archive = month_table(ARCHIVE_PREFIX, month_start(month))
+                self._create_archive_table(cursor, archive)
+                cursor.execute(
+                    f"""INSERT INTO {archive}
+                        SELECT * FROM alert_history
+                        WHERE timestamp < ? AND substr(timestamp, 1, 7) = ?""",
+                    (boundary, row["month"]),
+                )
+                report.archived_rows += cursor.rowcount
+            cursor.execute("DELETE FROM alert_history WHERE timestamp < ?", (boundary,))
+
+            archives = self._list_archives(cursor)
+            retention_cutoff = hot_cutoff(now, retention_days)
+            for archive in expired_tables(ARCHIVE_PREFIX, archives, retention_cutoff):
+                cursor.execute(rollup_sql(archive, "date(timestamp)"))
+                report.rolled_up_rows += cursor.rowcount
+                cursor.execute(f"DROP TABLE {archive}")
+                report.dropped_tables.append(archive)
+        return report
+
+    @classmethod
+    def _create_archive_table(cls, cursor, name: str) -> None:
+        cursor.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {name} (
+                id INTEGER PRIMARY KEY,
+                symbol TEXT NOT NULL,
+                alert_type TEXT NOT NULL,
+                price REAL NOT NULL,
+                timestamp TIMESTAMP NOT NULL
+            )
+        """
+        )
+        cls._create_alert_indexes(cursor, name)
+
+    @staticmethod
+    def _create_alert_indexes(cursor, table: str) -> None:
+        """The lookup and keyset pagination indexes of an alert table"""
+        cursor.execute(
+            f"""
+            CREATE INDEX IF NOT EXISTS idx_{table}_symbol_type
+            ON {table} (symbol, alert_type)
+        """
+        )
+        cursor.execute(
+            f"""
+            CREATE INDEX IF NOT EXISTS idx_{table}_timestamp_id
+            ON {table} (timestamp DESC, id DESC)
+        """
+        )
+        cursor.execute(
+            f"""
+            CREATE INDEX IF NOT EXISTS idx_{table}_symbol_timestamp
+            ON {table} (symbol, timestamp DESC, id DESC)
+        """
+        )
+
+    def get_alert_rollups(
+        self, symbol: Optional[str] = None, since: Optional[date] = None
+    ) -> List[AlertRollup]:
+        query = "SELECT * FROM alert_daily_rollup WHERE 1 = 1"
+        params = []
+        if symbol is not None:
+            query += " AND symbol = ?"
+            params.append(symbol)
+        if since is not None:
+            query += " AND day >= ?"
+            params.append(since)
+        query += " ORDER BY day DESC, symbol, alert_type"
+        with self.transaction() as cursor:
+            cursor.execute(query, params)
+            return [AlertRollup(**dict(row)) for row in cursor.fetchall()]
+
+    def get_watched_keywords(self) -> List[WatchedKeywordRow]:
+        with self.transaction() as cursor:
+            cursor.row_factory = None
+            cursor.execute("SELECT keyword, last_check FROM watched_keywords")
+            return [WatchedKeywordRow.from_tuple(row) for row in cursor.fetchall()]
 
     def exists_in_watched_keywords(self, keyword: str) -> bool:
         with self.transaction() as cursor:
@@ -107,12 +435,70 @@ class SQLiteDB(BaseDB):
         with self.transaction() as cursor:
             cursor.execute("DELETE FROM watched_keywords WHERE keyword = ?", (keyword,))
 
-    def get_symbols(self) -> List[Portfolio]:
+    def get_symbols(self) -> List[PortfolioRow]:
         with self.transaction() as cursor:
+            cursor.row_factory = None
             cursor.execute(
                 "SELECT ticker, SUM(quantity) AS quantity FROM portfolio GROUP BY ticker ORDER BY ticker"
             )
-            return [Portfolio(**row) for row in cursor.fetchall()]
+            return [PortfolioRow.from_tuple(row) for row in cursor.fetchall()]
+
+    def add_subscription(self, chat_id: int, kind: str, value: str) -> bool:
+        with self.transaction() as cursor:
+            cursor.execute(
+                """INSERT INTO subscriptions (chat_id, kind, value, created_at)
+                   VALUES (?, ?, ?, ?)
+                   ON CONFLICT (chat_id, kind, value) DO NOTHING""",
+                (chat_id, kind, value, datetime.now()),
+            )
+            return cursor.rowcount > 0
+
+    def remove_subscription(self, chat_id: int, kind: str, value: str) -> bool:
+        with self.transaction() as cursor:
+            cursor.execute(
+                "DELETE FROM subscriptions WHERE chat_id = ? AND kind = ? AND value = ?",
+                (chat_id, kind, value),
+            )
+            return cursor.rowcount > 0
+
+    def get_subscriptions(
+        self, chat_id: Optional[int] = None, kind: Optional[str] = None
+    ) -> List[SubscriptionRow]:
+        query, params = self._subscription_query("?", chat_id, kind)
+        with self.transaction() as cursor:
+            cursor.row_factory = None
+            cursor.execute(query, params)
+            return [SubscriptionRow.from_tuple(row) for row in cursor.fetchall()]
+
+    def add_alert_rule(
+        self, chat_id: int, symbol: Optional[str], expression: str
+    ) -> int:
+        with self.transaction() as cursor:
+            cursor.execute(
+                """INSERT INTO alert_rules (chat_id, symbol, expression, created_at)
+                   VALUES (?, ?, ?, ?)""",
+                (chat_id, symbol, expression, datetime.now()),
+            )
+            return cursor.lastrowid
+
+    def remove_alert_rule(self, chat_id: int, rule_id: int) -> bool:
+        with self.transaction() as cursor:
+            cursor.execute(
+                "DELETE FROM alert_rules WHERE id = ? AND chat_id = ?",
+                (rule_id, chat_id),
+            )
+            return cursor.rowcount > 0
+
+    def get_alert_rules(self, chat_id: Optional[int] = None) -> List[AlertRuleRow]:
+        query = "SELECT id, chat_id, symbol, expression FROM alert_rules"
+        params: tuple = ()
+        if chat_id is not None:
+            query += " WHERE chat_id = ?"
+            params = (chat_id,)
+        with self.transaction() as cursor:
+            cursor.row_factory = None
+            cursor.execute(query + " ORDER BY id", params)
+            return [AlertRuleRow.from_tuple(row) for row in cursor.fetchall()]
 
     def close(self) -> None:
         if hasattr(self, "conn") and self.conn:
@@ -1,10 +1,19 @@
 from bot.stock_alert_bot import StockAlertBot
 from config.settings import Settings
 from db import create_db
+from utils.logger import configure_logging
 
 
 def main():
     settings = Settings()
+    configure_logging(
+        log_dir=settings.LOG_DIR,
+        level=settings.LOG_LEVEL,
+        json_format=settings.LOG_JSON,
+        max_bytes=settings.LOG_MAX_BYTES,
+        backup_count=settings.LOG_BACKUP_COUNT,
+        debug_sample_rate=settings.LOG_DEBUG_SAMPLE_RATE,
+    )
     db = create_db(settings)
     bot = StockAlertBot(settings, db)
     bot.run()
@@ -1,3 +1,4 @@
+from dataclasses import dataclass
 from typing import Optional
 from pydantic import BaseModel
 from datetime import datetime
@@ -8,3 +9,21 @@ class NewsArticle(BaseModel):
     link: str
     content: str
     published: Optional[datetime]
+
+
+@dataclass(slots=True)
+class NewsItem:
+    """Slotted news record used inside the news pipeline"""
+
+    title: str
+    link: str
+    content: str
+    published: Optional[datetime]
+
+    def to_model(self) -> NewsArticle:
+        return NewsArticle(
+            title=self.title,
+            link=self.link,
+            content=self.content,
+            published=self.published,
+        )
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List
+from services.market_calendar import CRYPTO, exchange_for
+from utils.metrics import SCHEDULER_DEFERRED
+
+
+class MarketHoursScheduler:
+    """
+    Decide which portfolio symbols are due for an alert check
+
+    check_alerts runs on a short tick and asks for the due symbols. While a
+    symbol's market is open it is polled every open_interval, or every
+    edge_interval within edge_window of the open and the close; one more
+    poll is made right after the close so the closing bar is seen. While
+    the market is closed the next poll is at the next open, but at most
+    closed_interval away in case the holiday calendar is incomplete.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        open_interval: float = 600,
+        edge_interval: float = 120,
+        edge_window: float = 1800,
+        closed_interval: float = 6 * 3600,
+        close_grace: float = 60,
+    ):
+        self.enabled = enabled
+        self.open_interval = timedelta(seconds=open_interval)
+        self.edge_interval = timedelta(seconds=edge_interval)
+        self.edge_window = timedelta(seconds=edge_window)
+        self.closed_interval = timedelta(seconds=closed_interval)
+        self.close_grace = timedelta(seconds=close_grace)
+        self._next_due: Dict[str, datetime] = {}
+
+    def due_symbols(self, symbols: Iterable[str], now: datetime) -> List[str]:
+        """Symbols to check this tick; symbols never polled are always due"""
+        if not self.enabled:
+            return list(symbols)
+
+        symbols = list(symbols)
+        # Drop state for symbols removed from the portfolio
+        for symbol in self._next_due.keys() - set(symbols):
+            del self._next_due[symbol]
+
+        due = []
+        for symbol in symbols:
+            next_due = self._next_due.get(symbol)
+            if next_due is None or next_due <= now:
+                due.append(symbol)
+            else:
+                SCHEDULER_DEFERRED.inc(exchange=exchange_for(symbol).code)
+        return due
+
+    def mark_polled(self, symbol: str, now: datetime) -> None:
+        self._next_due[symbol] = self.next_poll(symbol, now)
+
+    def next_poll(self, symbol: str, now: datetime) -> datetime:
+        """When symbol should be checked again after a poll at now"""
+        exchange = exchange_for(symbol)
+        if exchange is CRYPTO:
+            return now + self.open_interval
+
+        session = exchange.current_session(now)
+        if session is None:
+            next_open = exchange.next_open(now)
+            if next_open is None:
+                return now + self.closed_interval
+            return min(next_open, now + self.closed_interval)
+
+        start, end = session
+        near_edge = now - start < self.edge_window or end - now < self.edge_window
+        next_due = now + (self.edge_interval if near_edge else self.open_interval)
+        return min(next_due, end + self.close_grace)
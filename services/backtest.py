@@ -0,0 +1,211 @@
+"""
+Vectorized backtests of alert signals
+
+Signals are alert rules (see services.rules) evaluated on every bar of a
+bars x symbols panel. Positions, returns and per-trade results are then
+computed with whole-array NumPy operations over all symbols at once, so ten
+years of daily bars for hundreds of tickers take seconds rather than a
+Python loop per bar.
+
+Positions are long only: a position is opened at the close of a bar where
+the entry rule holds and earns the following bars' returns until the close
+of a bar where the exit rule holds (or for a fixed number of bars when there
+is no exit rule).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+from services.rules import RuleSet, RuleSyntaxError, build_panel
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+# Entry and exit rules of the signals the bot alerts on
+STRATEGIES: Dict[str, Tuple[str, Optional[str]]] = {
+    "rsi": ("RSI(14) < 30", "RSI(14) > 70"),
+    "macd": ("MACD CROSSES ABOVE SIGNAL", "MACD CROSSES BELOW SIGNAL"),
+}
+TRADING_DAYS = 252
+
+
+@dataclass(frozen=True)
+class BacktestReport:
+    """
+    Backtest results
+
+    by_symbol has one row per symbol with the columns trades, hit_rate,
+    total_return, buy_hold_return, max_drawdown, exposure and
+    alerts_per_year; the attributes summarize all symbols.
+    """
+
+    by_symbol: "pd.DataFrame"
+    trades: int
+    hit_rate: float
+    mean_return: float
+    median_return: float
+    mean_drawdown: float
+    worst_drawdown: float
+    alerts_per_year: float
+    years: float
+
+
+def backtest(
+    frames: Dict[str, "pd.DataFrame"],
+    entry: str = STRATEGIES["rsi"][0],
+    exit: Optional[str] = STRATEGIES["rsi"][1],
+    hold: int = 5,
+    cost: float = 0.0,
+    periods_per_year: int = TRADING_DAYS,
+) -> BacktestReport:
+    """
+    Backtest an entry/exit rule pair on per-symbol OHLCV frames
+
+    Args:
+        frames: Symbol to OHLCV frame, oldest bar first
+        entry: Rule that opens a position
+        exit: Rule that closes it; None holds each position for hold bars
+        hold: Bars to hold a position when there is no exit rule
+        cost: Cost of each entry and each exit, as a fraction of the price
+        periods_per_year: Bars per year, for the alert frequency
+
+    Raises:
+        RuleSyntaxError: If a rule is invalid
+    """
+    rules = RuleSet([(0, entry)] + ([(1, exit)] if exit else []))
+    if rules.invalid:
+        raise RuleSyntaxError(next(iter(rules.invalid.values())))
+    if hold < 1:
+        raise ValueError("hold must be at least 1 bar")
+
+    panel = build_panel(frames, sorted(set(rules.fields) | {"Close"}))
+    # Entry and exit share the DAG, so RSI(14) or MACD is computed once
+    signals = rules.signals(panel)
+    close = panel["Close"].to_numpy()
+    return _report(
+        panel["Close"].columns,
+        close,
+        signals[0].to_numpy(),
+        signals[1].to_numpy() if exit else None,
+        hold,
+        cost,
+        periods_per_year,
+    )
+
+
+def positions(
+    entry: "np.ndarray", exit: Optional["np.ndarray"], hold: int
+) -> "np.ndarray":
+    """
+    Bars x symbols 0/1 array of the bars a position is held over
+
+    A position taken at the close of bar t is held over the return of bar
+    t + 1, so signals never see the returns they trade.
+    """
+    import numpy as np
+
+    bars, symbols = entry.shape
+    if exit is None:
+        # In the market while an entry happened within the last hold bars
+        entries = np.cumsum(entry, axis=0)
+        recent = entries.copy()
+        recent[hold:] -= entries[:-hold]
+        state = recent > 0
+    else:
+        # Forward fill the last signal: 1 after an entry, 0 after an exit
+        marked = entry | exit
+        rows = np.where(marked, np.arange(bars)[:, None], -1)
+        last = np.maximum.accumulate(rows, axis=0)
+        state = np.zeros(entry.shape, dtype=bool)
+        seen = last >= 0
+        state[seen] = entry[last[seen], np.nonzero(seen)[1]]
+
+    held = np.zeros(entry.shape, dtype=np.int8)
+    held[1:] = state[:-1]
+    return held
+
+
+def _report(
+    symbols: "pd.Index",
+    close: "np.ndarray",
+    entry: "np.ndarray",
+    exit: Optional["np.ndarray"],
+    hold: int,
+    cost: float,
+    periods_per_year: int,
+) -> BacktestReport:
+    import numpy as np
+    import pandas as pd
+
+    bars, count = close.shape
+    valid = ~np.isnan(close)
+    # Shorter histories are padded with NaN at the start of the panel
+    entry = entry & valid
+    if exit is not None:
+        exit = exit & valid
+    held = positions(entry, exit, hold)
+
+    returns = np.zeros(close.shape)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        returns[1:] = close[1:] / close[:-1] - 1
+    returns[~np.isfinite(returns)] = 0.0
+    padded = np.zeros((bars + 2, count), dtype=np.int8)
+    padded[1:-1] = held
+    changes = np.diff(padded, axis=0)
+    # Log growth per bar: the return while held, less entry and exit costs
+    growth = np.log1p(held * returns) + np.log1p(-cost) * np.abs(changes[:-1])
+
+    # log_equity[t] is the log growth over the bars before t
+    log_equity = np.zeros((bars + 1, count))
+    np.cumsum(growth, axis=0, out=log_equity[1:])
+    equity = np.exp(log_equity)
+    drawdown = equity / np.maximum.accumulate(equity, axis=0) - 1
+
+    # Trades as (symbol, first bar held) and (symbol, first bar after),
+    # both in symbol then bar order so they pair up
+    starts = np.argwhere(changes.T == 1)
+    ends = np.argwhere(changes.T == -1)
+    columns = starts[:, 0]
+    trade_returns = np.expm1(
+        log_equity[ends[:, 1], columns]
+        - log_equity[starts[:, 1], columns]
+        # The exit cost is charged on the bar after the last one held
+        + np.log1p(-cost) * (ends[:, 1] < bars)
+    )
+    trades = np.bincount(columns, minlength=count)
+    wins = np.bincount(columns, weights=trade_returns > 0, minlength=count)
+
+    # Alerts fire when the entry rule starts to hold, like the bot's rule alerts
+    alerts = entry.copy()
+    alerts[1:] &= ~entry[:-1]
+    years = valid.sum(axis=0) / periods_per_year
+    first = np.argmax(valid, axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        by_symbol = pd.DataFrame(
+            {
+                "trades": trades,
+                "hit_rate": np.where(trades > 0, wins / np.maximum(trades, 1), np.nan),
+                "total_return": np.expm1(log_equity[-1]),
+                "buy_hold_return": close[-1] / close[first, np.arange(count)] - 1,
+                "max_drawdown": drawdown.min(axis=0),
+                "exposure": held.sum(axis=0) / valid.sum(axis=0),
+                "alerts_per_year": alerts.sum(axis=0) / years,
+            },
+            index=symbols,
+        )
+
+    total_trades = int(trades.sum())
+    return BacktestReport(
+        by_symbol=by_symbol,
+        trades=total_trades,
+        hit_rate=float(wins.sum() / total_trades) if total_trades else float("nan"),
+        mean_return=float(by_symbol["total_return"].mean()),
+        median_return=float(by_symbol["total_return"].median()),
+        mean_drawdown=float(by_symbol["max_drawdown"].mean()),
+        worst_drawdown=float(by_symbol["max_drawdown"].min()),
+        alerts_per_year=float(alerts.sum() / years.sum()) if years.sum() else 0.0,
+        years=float(bars / periods_per_year),
+    )
@@ -0,0 +1,312 @@
+"""
+Compact columnar OHLCV bars
+
+A yfinance history frame keeps seven float64 columns (Open, High, Low,
+Close, Volume, Dividends, Stock Splits) behind a tz-aware DatetimeIndex.
+Bars keeps only the fields it is given, in one fields x bars block of
+float64 or float32, with int64 epoch-nanosecond timestamps. Symbols with
+the same bar times (one exchange's daily or intraday bars) can share one
+timestamp array through a TimeIndexPool, and a BarBuffer appends refreshed
+bars to cached ones without copying the history.
+
+Columns, slices and to_frame() are views of the block rather than copies,
+so charts and float64 indicator kernels read the cached memory directly;
+float32 bars are widened to float64 by the kernels.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+# The fields alerts, rules and charts use
+FIELDS = ("Open", "High", "Low", "Close", "Volume")
+
+
+class _Timeline:
+    """
+    Timestamp array with room to append
+
+    Bars of several symbols may view the positions before used, so those
+    are only ever rewritten with equal values.
+    """
+
+    __slots__ = ("array", "used")
+
+    def __init__(self, array: "np.ndarray", used: int):
+        self.array = array
+        self.used = used
+
+    def write(self, position: int, timestamps: "np.ndarray") -> bool:
+        """
+        Write timestamps from position on; False if that would change
+        viewed values or there is no room
+        """
+        import numpy as np
+
+        end = position + len(timestamps)
+        if end > len(self.array) or not self.array.flags.writeable:
+            return False
+        overlap = max(0, min(end, self.used) - position)
+        if not np.array_equal(
+            self.array[position : position + overlap], timestamps[:overlap]
+        ):
+            return False
+        self.array[position + overlap : end] = timestamps[overlap:]
+        self.used = max(self.used, end)
+        return True
+
+    def view(self, position: int, length: int) -> "np.ndarray":
+        view = self.array[position : position + length]
+        view.flags.writeable = False
+        return view
+
+
+class TimeIndexPool:
+    """
+    Interned timestamp arrays, so symbols with identical bar times share one
+
+    Arrays are looked up by length, first and last timestamp and time zone.
+    Interned arrays are read-only. Holds at most maxsize arrays; the oldest
+    is forgotten first (bars using it keep it alive).
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._arrays: Dict[tuple, Tuple["np.ndarray", _Timeline, int]] = {}
+
+    @staticmethod
+    def _key(length: int, first, last, tz) -> tuple:
+        return (length, int(first), int(last), None if tz is None else str(tz))
+
+    def _add(self, key: tuple, entry: Tuple["np.ndarray", _Timeline, int]) -> None:
+        if len(self._arrays) >= self.maxsize:
+            del self._arrays[next(iter(self._arrays))]
+        self._arrays[key] = entry
+
+    def intern(self, timestamps: "np.ndarray", tz=None) -> "np.ndarray":
+        """The pooled array equal to timestamps, or timestamps made read-only"""
+        import numpy as np
+
+        if not len(timestamps):
+            return timestamps
+        key = self._key(len(timestamps), timestamps[0], timestamps[-1], tz)
+        shared = self._arrays.get(key)
+        if shared is not None and np.array_equal(shared[0], timestamps):
+            return shared[0]
+        timestamps.flags.writeable = False
+        self._add(key, (timestamps, _Timeline(timestamps, len(timestamps)), 0))
+        return timestamps
+
+    def splice(
+        self,
+        timeline: Optional[_Timeline],
+        position: int,
+        prefix: "np.ndarray",
+        tail: "np.ndarray",
+        tz=None,
+    ) -> Tuple["np.ndarray", _Timeline, int]:
+        """
+        Timestamps of prefix followed by tail, where prefix is viewed at
+        position of timeline (None for an array of no timeline)
+
+        Returns:
+            The array, and the timeline and position it views. Another
+            symbol's array is reused when it has the same prefix memory (or
+            values) and tail; otherwise tail is appended to timeline in
+            place, or both are copied to a new timeline with room to grow
+        """
+        import numpy as np
+
+        length = len(prefix) + len(tail)
+        if not length:
+            return tail, timeline, position
+        first = prefix[0] if len(prefix) else tail[0]
+        last = tail[-1] if len(tail) else prefix[-1]
+        key = self._key(length, first, last, tz)
+        shared = self._arrays.get(key)
+        if shared is not None:
+            array = shared[0]
+            # Usually a view of the same timeline, where the prefix is the
+            # same memory; compare values only after a copy to a new one
+            same = not len(prefix) or (
+                array[: len(prefix)].ctypes.data == prefix.ctypes.data
+                or np.array_equal(array[: len(prefix)], prefix)
+            )
+            if same and np.array_equal(array[len(prefix) :], tail):
+                return shared
+        if timeline is None or not timeline.write(position + len(prefix), tail):
+            array = np.empty(max(2 * length, 64), dtype=np.int64)
+            array[: len(prefix)] = prefix
+            array[len(prefix) : length] = tail
+            timeline, position = _Timeline(array, length), 0
+        entry = (timeline.view(position, length), timeline, position)
+        self._add(key, entry)
+        return entry
+
+    def __len__(self) -> int:
+        return len(self._arrays)
+
+
+class Bars:
+    """
+    Bars of one symbol, oldest first
+
+    Args:
+        timestamps: Start of each bar as int64 epoch nanoseconds (UTC for
+            time zone aware bars)
+        values: fields x bars block
+        fields: Name of each row of values
+        tz: Time zone of the index to_frame() builds
+    """
+
+    __slots__ = ("timestamps", "values", "fields", "tz")
+
+    def __init__(
+        self,
+        timestamps: "np.ndarray",
+        values: "np.ndarray",
+        fields: Sequence[str],
+        tz=None,
+    ):
+        self.timestamps = timestamps
+        self.values = values
+        self.fields = tuple(fields)
+        self.tz = tz
+
+    @classmethod
+    def from_frame(
+        cls,
+        frame: "pd.DataFrame",
+        fields: Iterable[str] = FIELDS,
+        dtype: str = "float64",
+        pool: Optional[TimeIndexPool] = None,
+    ) -> "Bars":
+        """Copy the given fields (those the frame has) out of an OHLCV frame"""
+        import numpy as np
+
+        fields = tuple(field for field in fields if field in frame.columns)
+        values = np.empty((len(fields), len(frame)), dtype=dtype)
+        for row, field in enumerate(fields):
+            values[row] = frame[field].to_numpy()
+        index = frame.index
+        # A copy, so the bars do not keep the frame's index alive
+        timestamps = np.array(index.as_unit("ns").asi8, dtype=np.int64)
+        if pool is not None:
+            timestamps = pool.intern(timestamps, index.tz)
+        return cls(timestamps, values, fields, index.tz)
+
+    @classmethod
+    def concat(
+        cls, parts: Sequence["Bars"], pool: Optional[TimeIndexPool] = None
+    ) -> "Bars":
+        """Bars of parts one after the other; parts share fields and dtype"""
+        import numpy as np
+
+        timestamps = np.concatenate([part.timestamps for part in parts])
+        if pool is not None:
+            timestamps = pool.intern(timestamps, parts[0].tz)
+        values = np.concatenate([part.values for part in parts], axis=1)
+        return cls(timestamps, values, parts[0].fields, parts[0].tz)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __getitem__(self, rows: slice) -> "Bars":
+        """Bars of a slice of rows, sharing memory with these"""
+        return Bars(self.timestamps[rows], self.values[:, rows], self.fields, self.tz)
+
+    def column(self, field: str) -> "np.ndarray":
+        """View of one field"""
+        return self.values[self.fields.index(field)]
+
+    @property
+    def close(self) -> "np.ndarray":
+        return self.column("Close")
+
+    def searchsorted(self, at: "pd.Timestamp") -> int:
+        """Position of the first bar starting at or after at"""
+        import numpy as np
+
+        return int(np.searchsorted(self.timestamps, at.as_unit("ns").value))
+
+    def index(self) -> "pd.DatetimeIndex":
+        import pandas as pd
+
+        index = pd.DatetimeIndex(self.timestamps.view("M8[ns]"))
+        if self.tz is None:
+            return index
+        return index.tz_localize("UTC").tz_convert(self.tz)
+
+    def to_frame(self) -> "pd.DataFrame":
+        """DataFrame view of the bars, sharing their memory; do not modify it"""
+        import pandas as pd
+
+        return pd.DataFrame(
+            self.values.T, index=self.index(), columns=list(self.fields), copy=False
+        )
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes of the arrays, counting a shared timestamp array in full"""
+        return self.values.nbytes + self.timestamps.nbytes
+
+
+class BarBuffer:
+    """
+    Bars of one symbol with room to grow, so refreshing them writes only
+    the new bars instead of copying the history
+
+    Values live in a fields x capacity block that doubles when full and
+    timestamps in a pooled timeline (see TimeIndexPool.splice). Replaced
+    bars are overwritten in place: bars taken from the buffer earlier see
+    the refreshed values of the bars they share, appended bars are beyond
+    their end.
+    """
+
+    def __init__(self, bars: Bars, pool: TimeIndexPool):
+        self.bars = bars
+        self.pool = pool
+        # Filled by the first replace(), which copies bars into a block
+        # and timeline of the buffer's own
+        self._block: Optional["np.ndarray"] = None
+        self._offset = 0
+        self._timeline: Optional[_Timeline] = None
+        self._position = 0
+
+    def replace(self, at: int, tail: Bars) -> Bars:
+        """Replace the bars from position at on by tail; returns the new bars"""
+        import numpy as np
+
+        bars = self.bars
+        length = at + len(tail)
+        block = self._block
+        if block is None or self._offset + length > block.shape[1]:
+            block = np.empty(
+                (len(bars.fields), max(2 * length, 64)), dtype=bars.values.dtype
+            )
+            block[:, :at] = bars.values[:, :at]
+            self._block, self._offset = block, 0
+        columns = slice(self._offset, self._offset + length)
+        block[:, self._offset + at : columns.stop] = tail.values
+
+        timestamps, self._timeline, self._position = self.pool.splice(
+            self._timeline,
+            self._position,
+            bars.timestamps[:at],
+            tail.timestamps,
+            bars.tz,
+        )
+        self.bars = Bars(timestamps, block[:, columns], bars.fields, bars.tz)
+        return self.bars
+
+    def drop(self, count: int) -> Bars:
+        """Forget the first count bars; returns the remaining bars"""
+        if count:
+            self._offset += count
+            self._position += count
+            self.bars = self.bars[count:]
+        return self.bars
@@ -1,41 +1,35 @@
-import yfinance as yf
-import matplotlib.pyplot as plt
 import io
 
+import matplotlib.pyplot as plt
+
+from services import indicators
+
+
+def _series(values, df):
+    import pandas as pd
+
+    return pd.Series(values, index=df.index)
+
 
 def moving_average(df, column, window=20):
     """이동평균을 계산하는 함수"""
-    return df[column].rolling(window=window).mean()
+    return _series(indicators.sma(df[column].to_numpy(dtype=float), window), df)
 
 
 def exponential_moving_average(df, column, span):
     """지수이동평균을 계산하는 함수"""
-    return df[column].ewm(span=span, adjust=False).mean()
+    return _series(indicators.ema(df[column].to_numpy(dtype=float), span), df)
 
 
 def calculate_macd(df):
-    """MACD 계산"""
-    # MACD 지수이동평균선 (Exponential Moving Average)
-    # 12일과 26일의 EMA를 사용하여 MACD 지수이동평균선을 계산
-    exp1 = exponential_moving_average(df, "Close", 12)
-    exp2 = exponential_moving_average(df, "Close", 26)
-
-    # MACD 신호선 (Signal Line)
-    macd = exp1 - exp2
-    # Signal Line은 MACD의 EMA로, 9일을 사용하여 계산
-    signal = macd.ewm(span=9, adjust=False).mean()
-    return macd, signal
+    """MACD 계산 (12일/26일 EMA 차이와 9일 시그널선)"""
+    macd, signal = indicators.macd(df["Close"].to_numpy(dtype=float))
+    return _series(macd, df), _series(signal, df)
 
 
 def calculate_rsi(data, window=14):
     """RSI 계산 함수"""
-    delta = data["Close"].diff(1)  # 종가의 변화량을 계산
-    gain = (delta.where(delta > 0, 0)).rolling(window=window).mean()  # 상승률 계산
-    loss = (-delta.where(delta < 0, 0)).rolling(window=window).mean()  # 하락률 계산
-
-    rs = gain / loss  # RS(Relative Strength) 계산
-    rsi = 100 - (100 / (1 + rs))  # RSI 계산
-    return rsi
+    return _series(indicators.rsi(data["Close"].to_numpy(dtype=float), window), data)
 
 
 def generate_price_chart(symbol, chart_data):
@@ -108,7 +102,6 @@ def generate_macd_signal_chart(symbol, chart_data):
 def generate_rsi_chart(symbol, chart_data, rsi_window=14):
     """RSI를 이용한 매수/매도 신호 표시 차트 생성"""
     rsi = calculate_rsi(chart_data, window=rsi_window)
-    chart_data["RSI"] = rsi
 
     # Buy/Sell signals based on RSI thresholds
     buy_signals = rsi < 30
@@ -0,0 +1,216 @@
+"""
+Technical indicator kernels on float64 arrays
+
+Every kernel works along axis 0, so a 1-D array is one series and a bars x
+symbols array is many series at once. Results match the pandas formulas
+used before (rolling mean, ewm(span, adjust=False) and the rolling-mean
+RSI) to floating point rounding. Kernels take an optional preallocated out
+buffer and never modify their inputs.
+
+NaN handling: leading NaNs (a shorter history padded to a panel) give NaN
+results until the series has enough values. A NaN inside an SMA window
+makes that window NaN; EMAs carry the last value over interior NaNs; RSI
+counts a missing close as unchanged, like the pandas version did.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import TYPE_CHECKING, Optional, Sequence
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# EMA blocks are solved in closed form with powers of the decay factor;
+# a block ends before those powers could grow past this bound
+_MAX_BLOCK_GROWTH = 1e100
+_MAX_BLOCK = 2048
+
+
+def as_float64(values) -> "np.ndarray":
+    """Contiguous float64 view of values, copying only when needed"""
+    import numpy as np
+
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+def sma(
+    values: "np.ndarray", window: int, out: Optional["np.ndarray"] = None
+) -> "np.ndarray":
+    """Simple moving average over window values"""
+    import numpy as np
+
+    values = as_float64(values)
+    out = _buffer(out, values.shape)
+    missing = np.isnan(values)
+    # One running sum of the values and one of the NaN count, so each
+    # window is two subtractions instead of a pass over window values
+    sums = np.zeros((2, len(values) + 1) + values.shape[1:])
+    np.cumsum(np.where(missing, 0.0, values), axis=0, out=sums[0, 1:])
+    np.cumsum(missing, axis=0, out=sums[1, 1:])
+    out[: window - 1] = np.nan
+    totals = sums[:, window:] - sums[:, :-window]
+    np.divide(totals[0], window, out=out[window - 1 :])
+    out[window - 1 :][totals[1] > 0] = np.nan
+    return out
+
+
+def ema(
+    values: "np.ndarray", span: int, out: Optional["np.ndarray"] = None
+) -> "np.ndarray":
+    """Exponential moving average, like pandas ewm(span, adjust=False)"""
+    values = as_float64(values)
+    out = _buffer(out, values.shape)
+    return emas(values, (span,), out[None])[0]
+
+
+def emas(
+    values: "np.ndarray", spans: Sequence[int], out: Optional["np.ndarray"] = None
+) -> "np.ndarray":
+    """
+    EMAs of several spans in one pass over values
+
+    Returns:
+        Array of shape (len(spans), *values.shape)
+    """
+    import numpy as np
+
+    values = as_float64(values)
+    out = _buffer(out, (len(spans),) + values.shape)
+    alphas = np.array([2.0 / (span + 1) for span in spans])
+    filled, leading = _fill_missing(values)
+    # Centered on each series' first value, the seed (and any constant run
+    # at the start) is exact rather than rounded through the closed form
+    first = filled[0]
+    _ema_blocks(filled - first, alphas, out)
+    out += first
+    out[:, leading] = np.nan
+    return out
+
+
+def macd(
+    close: "np.ndarray",
+    fast: int = 12,
+    slow: int = 26,
+    signal: int = 9,
+    out: Optional["np.ndarray"] = None,
+) -> "np.ndarray":
+    """
+    MACD line and signal line, sharing one pass for both price EMAs
+
+    Returns:
+        Array of shape (2, *close.shape): MACD, then the signal line
+    """
+    import numpy as np
+
+    close = as_float64(close)
+    out = _buffer(out, (2,) + close.shape)
+    averages = emas(close, (fast, slow))
+    np.subtract(averages[0], averages[1], out=out[0])
+    ema(out[0], signal, out=out[1])
+    return out
+
+
+def rsi(
+    close: "np.ndarray", window: int = 14, out: Optional["np.ndarray"] = None
+) -> "np.ndarray":
+    """
+    RSI over simple rolling means of gains and losses
+
+    The first close counts as unchanged, so the first value is at index
+    window - 1 of each series.
+    """
+    import numpy as np
+
+    close = as_float64(close)
+    out = _buffer(out, close.shape)
+    bars = len(close)
+    # Gains and losses from one delta array, summed by one cumsum
+    delta = np.zeros(close.shape)
+    np.subtract(close[1:], close[:-1], out=delta[1:])
+    delta[np.isnan(delta)] = 0.0
+    sums = np.zeros((2, bars + 1) + close.shape[1:])
+    np.maximum(delta, 0.0, out=sums[0, 1:])
+    np.minimum(delta, 0.0, out=sums[1, 1:])
+    np.cumsum(sums, axis=1, out=sums)
+    totals = sums[:, window:] - sums[:, :-window]
+
+    # The window sizes cancel in gain / loss; 0 / 0 stays NaN like pandas
+    with np.errstate(invalid="ignore", divide="ignore"):
+        np.divide(totals[0], -totals[1], out=out[window - 1 :])
+    out[window - 1 :] += 1
+    np.divide(100.0, out[window - 1 :], out=out[window - 1 :])
+    np.subtract(100.0, out[window - 1 :], out=out[window - 1 :])
+
+    # No value before a full window of closes; padding before a series'
+    # first close is not a run of unchanged closes
+    rows = np.arange(bars).reshape((bars,) + (1,) * (close.ndim - 1))
+    first = np.argmax(~np.isnan(close), axis=0)
+    np.copyto(out, np.nan, where=rows < first + window - 1)
+    return out
+
+
+def _buffer(out: Optional["np.ndarray"], shape: tuple) -> "np.ndarray":
+    import numpy as np
+
+    if out is None:
+        return np.empty(shape)
+    if out.shape != shape or out.dtype != np.float64:
+        raise ValueError(f"out must be a float64 array of shape {shape}")
+    return out
+
+
+def _fill_missing(values: "np.ndarray"):
+    """
+    Values with NaNs carried forward (leading NaNs take the first value),
+    and the mask of the leading NaNs
+    """
+    import numpy as np
+
+    missing = np.isnan(values)
+    if not missing.any():
+        return values, missing
+    bars = len(values)
+    rows = np.arange(bars).reshape((bars,) + (1,) * (values.ndim - 1))
+    last = np.maximum.accumulate(np.where(missing, -1, rows), axis=0)
+    leading = last < 0
+    first = np.argmax(~missing, axis=0)
+    source = np.where(leading, first, last)
+    return np.take_along_axis(values, source, axis=0), leading
+
+
+def _ema_blocks(values: "np.ndarray", alphas: "np.ndarray", out: "np.ndarray"):
+    """
+    Solve y[t] = y[t-1] + alpha * (x[t] - y[t-1]), y[0] = x[0], for each alpha
+
+    Within a block starting after y[s-1] the recursion has the closed form
+    y[s+k] = beta^(k+1) * y[s-1] + alpha * beta^k * sum(beta^-j * x[s+j]),
+    so each block is one cumsum rather than a Python loop per value.
+    """
+    import numpy as np
+
+    bars = len(values)
+    if bars == 0:
+        return
+    # alpha = 1 (span 1) is the series itself; a beta of one ulp keeps the
+    # closed form finite and rounds to the same values
+    betas = np.maximum(1.0 - alphas, np.finfo(np.float64).eps)
+    block = int(math.log(_MAX_BLOCK_GROWTH) / -math.log(betas.min()))
+    block = max(1, min(_MAX_BLOCK, block))
+    # Per-alpha factors, broadcast over the series dimensions
+    shape = (len(alphas), 1) + (1,) * (values.ndim - 1)
+    steps = np.arange(block).reshape((1, block) + (1,) * (values.ndim - 1))
+    powers = betas.reshape(shape) ** steps
+    growth = 1.0 / powers
+    scale = alphas.reshape(shape) * powers
+    carry = powers * betas.reshape(shape)
+
+    previous = np.broadcast_to(values[0], out[:, 0].shape)
+    for start in range(0, bars, block):
+        size = min(block, bars - start)
+        target = out[:, start : start + size]
+        np.multiply(values[start : start + size], growth[:, :size], out=target)
+        np.cumsum(target, axis=1, out=target)
+        target *= scale[:, :size]
+        target += carry[:, :size] * previous[:, None]
+        previous = target[:, -1]
@@ -0,0 +1,135 @@
+"""
+Incremental indicators for the streaming alert mode
+
+Each indicator keeps the state of the completed bars and evaluates the
+in-progress bar for any candidate close in O(1), so a quote can be checked
+without recomputing the whole series. The results match
+StockService.calculate_rsi and calculate_macd on the same closes.
+"""
+
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, Optional, Tuple
+
+
+class EMA:
+    """Exponential moving average, like pandas ewm(span, adjust=False)"""
+
+    def __init__(self, span: int):
+        self.alpha = 2 / (span + 1)
+        self.value: Optional[float] = None
+
+    def peek(self, x: float) -> float:
+        if self.value is None:
+            return x
+        return self.value + self.alpha * (x - self.value)
+
+    def push(self, x: float) -> None:
+        self.value = self.peek(x)
+
+
+class MACD:
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast = EMA(fast)
+        self.slow = EMA(slow)
+        self.signal = EMA(signal)
+
+    def peek(self, close: float) -> Tuple[float, float]:
+        """MACD and signal line if the current bar closed at close"""
+        macd = self.fast.peek(close) - self.slow.peek(close)
+        return macd, self.signal.peek(macd)
+
+    def push(self, close: float) -> Tuple[float, float]:
+        macd, signal = self.peek(close)
+        self.fast.push(close)
+        self.slow.push(close)
+        self.signal.push(macd)
+        return macd, signal
+
+
+class RollingRSI:
+    """RSI over simple rolling means of gains and losses"""
+
+    def __init__(self, window: int = 14):
+        self.window = window
+        # The in-progress bar contributes the window's last change
+        self._changes = deque(maxlen=window - 1)
+        self._gains = 0.0
+        self._losses = 0.0
+        self.last_close: Optional[float] = None
+
+    def peek(self, close: float) -> Optional[float]:
+        """RSI if the current bar closed at close; None until window bars"""
+        if self.last_close is None or len(self._changes) < self.window - 1:
+            return None
+        change = close - self.last_close
+        gain = (self._gains + max(change, 0.0)) / self.window
+        loss = (self._losses + max(-change, 0.0)) / self.window
+        if loss == 0:
+            return 100.0 if gain > 0 else None
+        return 100 - 100 / (1 + gain / loss)
+
+    def push(self, close: float) -> None:
+        # Like calculate_rsi, the first bar counts as an unchanged close
+        change = 0.0 if self.last_close is None else close - self.last_close
+        if len(self._changes) == self._changes.maxlen:
+            dropped = self._changes[0]
+            self._gains -= max(dropped, 0.0)
+            self._losses -= max(-dropped, 0.0)
+        self._changes.append(change)
+        self._gains += max(change, 0.0)
+        self._losses += max(-change, 0.0)
+        self.last_close = close
+
+
+@dataclass(frozen=True, slots=True)
+class Reading:
+    """Indicator values after a quote, with the last completed bar's MACD"""
+
+    price: float
+    rsi: Optional[float]
+    macd: float
+    signal: float
+    prev_macd: Optional[float]
+    prev_signal: Optional[float]
+
+
+class LiveSignals:
+    """
+    Indicators of one symbol, updated quote by quote
+
+    Quotes of the same bar (identified by its start, see
+    services.timeframes) replace the bar's close; the first quote of a new
+    bar commits the previous close to the indicator state.
+    """
+
+    def __init__(self, rsi_window: int = 14):
+        self.rsi = RollingRSI(rsi_window)
+        self.macd = MACD()
+        self.bar: Optional[datetime] = None
+        self.close: Optional[float] = None
+        self.prev_macd: Optional[float] = None
+        self.prev_signal: Optional[float] = None
+
+    def seed(self, bars: Iterable[Tuple[datetime, float]]) -> None:
+        """Load history as (bar start, close) pairs, oldest first"""
+        for bar, close in bars:
+            self._advance(bar, close)
+
+    def update(self, bar: datetime, price: float) -> Optional[Reading]:
+        """Apply a quote; None for a late quote of an already committed bar"""
+        if self.bar is not None and bar < self.bar:
+            return None
+        self._advance(bar, price)
+        macd, signal = self.macd.peek(price)
+        return Reading(
+            price, self.rsi.peek(price), macd, signal, self.prev_macd, self.prev_signal
+        )
+
+    def _advance(self, bar: datetime, close: float) -> None:
+        if self.bar is not None and bar > self.bar:
+            self.rsi.push(self.close)
+            self.prev_macd, self.prev_signal = self.macd.push(self.close)
+        self.bar = bar
+        self.close = close
@@ -0,0 +1,196 @@
+"""
+Exchange trading sessions and holiday calendars
+
+Symbols are mapped to their exchange by yfinance ticker suffix
+(005930.KS -> KRX, 7203.T -> TSE, ...); symbols without a known suffix
+are treated as US listings and "-USD" pairs as 24/7 crypto.
+"""
+
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo
+
+Session = Tuple[time, time]
+
+
+@dataclass
+class Exchange:
+    code: str
+    tz: ZoneInfo
+    sessions: Tuple[Session, ...]
+    holidays: Set[date] = field(default_factory=set)
+    early_closes: Dict[date, time] = field(default_factory=dict)
+    weekdays: FrozenSet[int] = frozenset(range(5))
+
+    def is_trading_day(self, day: date) -> bool:
+        return day.weekday() in self.weekdays and day not in self.holidays
+
+    def sessions_on(self, day: date) -> List[Tuple[datetime, datetime]]:
+        """Trading sessions of a local calendar day as aware datetimes"""
+        if not self.is_trading_day(day):
+            return []
+        early_close = self.early_closes.get(day)
+        sessions = []
+        for start, end in self.sessions:
+            if early_close is not None:
+                if start >= early_close:
+                    break
+                end = min(end, early_close)
+            sessions.append(
+                (
+                    datetime.combine(day, start, self.tz),
+                    (
+                        datetime.combine(day, end, self.tz)
+                        if end != time(0)
+                        else datetime.combine(day + timedelta(days=1), end, self.tz)
+                    ),
+                )
+            )
+        return sessions
+
+    def current_session(self, at: datetime) -> Optional[Tuple[datetime, datetime]]:
+        """The session containing at, if the market is open"""
+        local = at.astimezone(self.tz)
+        for start, end in self.sessions_on(local.date()):
+            if start <= local < end:
+                return start, end
+        return None
+
+    def is_open(self, at: datetime) -> bool:
+        return self.current_session(at) is not None
+
+    def next_open(self, at: datetime, horizon_days: int = 30) -> Optional[datetime]:
+        """Start of the first session beginning after at"""
+        local = at.astimezone(self.tz)
+        for offset in range(horizon_days):
+            for start, _ in self.sessions_on(local.date() + timedelta(days=offset)):
+                if start > local:
+                    return start
+        return None
+
+
+def _dates(values: Iterable[str]) -> Set[date]:
+    return {date.fromisoformat(value) for value in values}
+
+
+NYSE = Exchange(
+    code="US",
+    tz=ZoneInfo("America/New_York"),
+    sessions=((time(9, 30), time(16, 0)),),
+    holidays=_dates(
+        [
+            # 2025
+            "2025-01-01",
+            "2025-01-09",
+            "2025-01-20",
+            "2025-02-17",
+            "2025-04-18",
+            "2025-05-26",
+            "2025-06-19",
+            "2025-07-04",
+            "2025-09-01",
+            "2025-11-27",
+            "2025-12-25",
+            # 2026
+            "2026-01-01",
+            "2026-01-19",
+            "2026-02-16",
+            "2026-04-03",
+            "2026-05-25",
+            "2026-06-19",
+            "2026-07-03",
+            "2026-09-07",
+            "2026-11-26",
+            "2026-12-25",
+        ]
+    ),  # fmt: skip
+    early_closes={
+        date(2025, 7, 3): time(13, 0),
+        date(2025, 11, 28): time(13, 0),
+        date(2025, 12, 24): time(13, 0),
+        date(2026, 11, 27): time(13, 0),
+        date(2026, 12, 24): time(13, 0),
+    },
+)
+
+KRX = Exchange(
+    code="KRX",
+    tz=ZoneInfo("Asia/Seoul"),
+    sessions=((time(9, 0), time(15, 30)),),
+    holidays=_dates(
+        [
+            # 2025
+            "2025-01-01", "2025-01-27", "2025-01-28", "2025-01-29", "2025-01-30",
+            "2025-03-03", "2025-05-01", "2025-05-05", "2025-05-06", "2025-06-03",
+            "2025-06-06", "2025-08-15", "2025-10-03", "2025-10-06", "2025-10-07",
+            "2025-10-08", "2025-10-09", "2025-12-25", "2025-12-31",
+            # 2026
+            "2026-01-01", "2026-02-16", "2026-02-17", "2026-02-18", "2026-03-02",
+            "2026-05-01", "2026-05-05", "2026-05-25", "2026-06-03", "2026-08-17",
+            "2026-09-24", "2026-09-25", "2026-10-05", "2026-10-09", "2026-12-25",
+            "2026-12-31",
+        ]
+    ),  # fmt: skip
+)
+
+TSE = Exchange(
+    code="TSE",
+    tz=ZoneInfo("Asia/Tokyo"),
+    sessions=((time(9, 0), time(11, 30)), (time(12, 30), time(15, 30))),
+)
+
+HKEX = Exchange(
+    code="HKEX",
+    tz=ZoneInfo("Asia/Hong_Kong"),
+    sessions=((time(9, 30), time(12, 0)), (time(13, 0), time(16, 0))),
+)
+
+LSE = Exchange(
+    code="LSE",
+    tz=ZoneInfo("Europe/London"),
+    sessions=((time(8, 0), time(16, 30)),),
+)
+
+CRYPTO = Exchange(
+    code="CRYPTO",
+    tz=ZoneInfo("UTC"),
+    sessions=((time(0, 0), time(0, 0)),),
+    weekdays=frozenset(range(7)),
+)
+
+EXCHANGES = {
+    exchange.code: exchange for exchange in (NYSE, KRX, TSE, HKEX, LSE, CRYPTO)
+}
+
+SUFFIX_EXCHANGES = {
+    ".KS": KRX,
+    ".KQ": KRX,
+    ".T": TSE,
+    ".HK": HKEX,
+    ".L": LSE,
+}
+
+
+def exchange_for(symbol: str) -> Exchange:
+    """Exchange a yfinance symbol trades on"""
+    symbol = symbol.upper()
+    if symbol.endswith("-USD"):
+        return CRYPTO
+    for suffix, exchange in SUFFIX_EXCHANGES.items():
+        if symbol.endswith(suffix):
+            return exchange
+    return NYSE
+
+
+def add_holidays(extra: str) -> None:
+    """
+    Extend exchange holiday calendars from a setting
+
+    Args:
+        extra: Comma separated CODE:YYYY-MM-DD entries, e.g.
+            "KRX:2026-09-28,US:2026-01-09"
+    """
+    for entry in filter(None, (part.strip() for part in extra.split(","))):
+        code, day = entry.split(":", 1)
+        EXCHANGES[code.strip().upper()].holidays.add(date.fromisoformat(day.strip()))
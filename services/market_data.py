@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Sequence
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class MarketDataProvider(ABC):
+    """Source of OHLCV history for StockService"""
+
+    # Key under which requests are rate limited by the fetch scheduler
+    host = "market-data"
+
+    @abstractmethod
+    def history(
+        self, symbol: str, period: str = "3mo", interval: str = "1d"
+    ) -> pd.DataFrame:
+        """Return OHLCV bars indexed by timestamp, oldest first"""
+        pass
+
+    def closes(self, symbols: Sequence[str], period: str = "5d") -> pd.DataFrame:
+        """
+        Daily closes of several symbols as a bars x symbols frame, in as few
+        requests as the source allows; symbols without data are left out
+        """
+        import pandas as pd
+
+        columns = {}
+        for symbol in symbols:
+            df = self.history(symbol, period=period)
+            if not df.empty:
+                columns[symbol] = df["Close"]
+        return pd.DataFrame(columns)
+
+    def warm_up(self) -> None:
+        """Load whatever the first history() call would otherwise load"""
+        pass
+
+
+class YFinanceProvider(MarketDataProvider):
+    host = "finance.yahoo.com"
+
+    def warm_up(self) -> None:
+        import yfinance  # noqa: F401
+
+    def history(
+        self, symbol: str, period: str = "3mo", interval: str = "1d"
+    ) -> pd.DataFrame:
+        # yfinance pulls in pandas and requests; import it on first fetch
+        import pandas as pd
+        import yfinance as yf
+        from yfinance.exceptions import YFInvalidPeriodError, YFTickerMissingError
+
+        # By default yfinance logs and swallows network errors and throttling,
+        # returning an empty frame; raise them so the fetch scheduler retries
+        # and backs off. An unknown symbol or a period without bars is an
+        # answer, not a failure of the host: it comes back empty
+        stock = yf.Ticker(symbol)
+        try:
+            return stock.history(period=period, interval=interval, raise_errors=True)
+        except (YFTickerMissingError, YFInvalidPeriodError):
+            return pd.DataFrame()
+
+    def closes(self, symbols: Sequence[str], period: str = "5d") -> pd.DataFrame:
+        import pandas as pd
+        import yfinance as yf
+
+        # One download for all symbols, adjusted like Ticker.history
+        data = yf.download(
+            list(symbols),
+            period=period,
+            interval="1d",
+            group_by="column",
+            auto_adjust=True,
+            progress=False,
+            threads=True,
+        )
+        # download() only logs per-symbol failures, so unknown symbols and
+        # failed requests both come back without columns; either way they
+        # are cached as unknown for the quote cache's ttl
+        if data is None or data.empty:
+            return pd.DataFrame()
+        closes = data["Close"]
+        if isinstance(closes, pd.Series):
+            # A single symbol comes back without the symbol column level
+            closes = closes.to_frame(symbols[0])
+        return closes.dropna(axis=1, how="all")
@@ -1,22 +1,108 @@
-from typing import List
-import feedparser
+import asyncio
+import hashlib
+import os
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
 from datetime import datetime, timedelta
 from dateutil import parser
-from newspaper import Article
-from playwright.async_api import async_playwright
-from models import NewsArticle
+from models import NewsItem
 from pathlib import Path
-from utils.http import get_final_url
+from utils.fetch_scheduler import CircuitOpenError, FetchScheduler
 from utils.logger import setup_logger
-from urllib.parse import quote
+from utils.metrics import ARTICLES_EXTRACTED, BROWSER_POOL_SIZE, CACHE_HITS
+from utils.snapshot import Section
+from utils.write_buffer import WriteBehindBuffer
+from urllib.parse import quote, urlparse
 import traceback
 
+if TYPE_CHECKING:
+    import feedparser
+    import numpy as np
+    from playwright.async_api import Browser, Playwright
+
+GOOGLE_NEWS_RSS_URL = (
+    "https://news.google.com/rss/search?q={query}&hl=ko&gl=KR&ceid=KR:ko"
+)
+# Fetch scheduler key for headless browser extractions
+BROWSER_HOST = "browser"
+
+
+class FeedFetchError(Exception):
+    """The feed request failed or was throttled"""
+
+
+def _link_hash(link: str) -> int:
+    digest = hashlib.blake2b(link.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class SeenLinks:
+    """
+    Links of the articles already sent
+
+    Links restored from a snapshot are a sorted array of 64-bit hashes,
+    searched where it is mapped instead of being read into a set; links
+    loaded from the cache file or added since are kept as strings.
+    """
+
+    def __init__(
+        self, links: Iterable[str] = (), hashes: Optional["np.ndarray"] = None
+    ):
+        self._links = set(links)
+        self._hashes = hashes
+
+    def __contains__(self, link: str) -> bool:
+        if link in self._links:
+            return True
+        if self._hashes is None or not len(self._hashes):
+            return False
+        import numpy as np
+
+        key = np.uint64(_link_hash(link))
+        at = int(np.searchsorted(self._hashes, key))
+        return at < len(self._hashes) and self._hashes[at] == key
+
+    def add(self, link: str) -> None:
+        self._links.add(link)
+
+    def hashes(self) -> "np.ndarray":
+        """Sorted hashes of every link"""
+        import numpy as np
+
+        added = np.fromiter(
+            (_link_hash(link) for link in self._links), np.uint64, len(self._links)
+        )
+        if self._hashes is not None:
+            added = np.concatenate([self._hashes, added])
+        return np.unique(added)
+
 
 class NewsService:
-    def __init__(self):
-        self.cache_file = "returned_news.txt"
+    def __init__(
+        self,
+        flush_items: int = 100,
+        flush_delay: float = 5.0,
+        cache_file: str = "returned_news.txt",
+        feed_url: str = GOOGLE_NEWS_RSS_URL,
+        fetcher: Optional[FetchScheduler] = None,
+    ):
+        self.cache_file = cache_file
+        self.feed_url = feed_url
+        self.fetcher = fetcher or FetchScheduler()
         self.logger = setup_logger("news_service")
         self._init_cache_file()
+        # Loaded on first use, unless restore() brings it from a snapshot
+        self._returned_news: Optional[SeenLinks] = None
+        # ETag and Last-Modified of each feed URL, sent back so an unchanged
+        # feed costs a 304 instead of a download and parse
+        self._feed_validators: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+        self._cache_buffer = WriteBehindBuffer(
+            self._write_returned_news, flush_items, flush_delay, name="returned_news"
+        )
+        # Started by warm_up() or the first extraction, shared by every
+        # extraction through a context of its own and stopped by close()
+        self._playwright: Optional["Playwright"] = None
+        self._browser: Optional["Browser"] = None
+        self._browser_lock = asyncio.Lock()
 
     def _init_cache_file(self):
         try:
@@ -26,37 +112,73 @@ class NewsService:
             self.logger.error(f"Failed to initialize cache file: {str(e)}")
             raise
 
+    async def warm_up(self) -> None:
+        """
+        Import the feed and article parsers and start the headless browser
+        the extractions share, so the first news cycle does not pay for a
+        cold start
+        """
+        await asyncio.to_thread(self._import_parsers)
+        await self._get_browser()
+
+    @staticmethod
+    def _import_parsers() -> None:
+        import feedparser  # noqa: F401
+        import newspaper  # noqa: F401
+        import playwright.async_api  # noqa: F401
+
+    async def _get_browser(self) -> "Browser":
+        """The shared headless browser, launched again if it went away"""
+        # Playwright is slow to import; load it on first use
+        from playwright.async_api import async_playwright
+
+        async with self._browser_lock:
+            if self._browser is not None and not self._browser.is_connected():
+                self.logger.warning("Headless browser disconnected, relaunching")
+                self._browser = None
+                BROWSER_POOL_SIZE.dec()
+            if self._browser is None:
+                if self._playwright is None:
+                    self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(headless=True)
+                BROWSER_POOL_SIZE.inc()
+            return self._browser
+
     async def extract_article(self, url: str) -> tuple[str, str, str]:
+        # newspaper is slow to import; load it on first use
+        from newspaper import Article
+
         self.logger.info(f"Extracting article from URL: {url}")
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context(locale="ko-KR")
+        browser = await self._get_browser()
+        # A fresh context per article, so cookies and storage do not carry over
+        context = await browser.new_context(locale="ko-KR")
+        try:
             page = await context.new_page()
+            await page.goto(url, timeout=5000)
+            await page.wait_for_load_state("networkidle", timeout=10000)
+            html = await page.content()
+            link = page.url
+
+            article = Article(link)
+            article.set_html(html)
+            article.parse()
+
+            self.logger.debug(f"Successfully extracted article: {article.title}")
+            return article.title, article.text, link
+        except Exception as e:
+            self.logger.error(f"Failed to extract article: {str(e)}")
+            raise
+        finally:
+            await context.close()
 
-            try:
-                await page.goto(url, timeout=5000)
-                await page.wait_for_load_state("networkidle", timeout=10000)
-                html = await page.content()
-                link = page.url
-
-                article = Article(link)
-                article.set_html(html)
-                article.parse()
-
-                self.logger.debug(f"Successfully extracted article: {article.title}")
-                return article.title, article.text, link
-            except Exception as e:
-                self.logger.error(f"Failed to extract article: {str(e)}")
-                raise
-            finally:
-                await browser.close()
-
-    async def get_news(self, keyword: str) -> List[NewsArticle]:
+    async def get_news(self, keyword: str) -> List[NewsItem]:
         self.logger.info(f"Fetching news for keyword: {keyword}")
-        url = f"https://news.google.com/rss/search?q={quote(keyword)}&hl=ko&gl=KR&ceid=KR:ko"
+        url = self.feed_url.format(query=quote(keyword))
 
         try:
-            feed = feedparser.parse(url)
+            feed = await self.fetcher.submit(
+                urlparse(url).hostname, self._parse_feed, url
+            )
             three_days_ago = datetime.now() - timedelta(days=3)
 
             filtered_entries = [
@@ -73,10 +195,15 @@ class NewsService:
 
             for _, entry in filtered_entries[:5]:
                 try:
-                    title, content, link = await self.extract_article(entry.link)
+                    # Extraction already waits up to 15s, so don't retry it
+                    title, content, link = await self.fetcher.submit(
+                        BROWSER_HOST, self.extract_article, entry.link, attempts=1
+                    )
+                    ARTICLES_EXTRACTED.inc(result="success")
 
                     # redirect되어 최종 url이 나오면 해당 url과 returned_news를 비교
                     if link in returned_news:
+                        CACHE_HITS.inc(cache="returned_news")
                         self.logger.debug(
                             f"Skipping already processed article: {entry.title}"
                         )
@@ -88,7 +215,7 @@ class NewsService:
                         else None
                     )
 
-                    article = NewsArticle(
+                    article = NewsItem(
                         title=f"[{keyword}] {title}",
                         link=link,
                         content=content,
@@ -97,30 +224,118 @@ class NewsService:
                     news_articles.append(article)
                     self._add_to_returned_news(link)
                     self.logger.info(f"Successfully processed article: {title}")
+                except CircuitOpenError as e:
+                    ARTICLES_EXTRACTED.inc(result="skipped")
+                    self.logger.warning(str(e))
+                    break
                 except Exception as e:
+                    ARTICLES_EXTRACTED.inc(result="failure")
                     self.logger.error(f"Failed to process article: {str(e)}")
                     continue
 
             return news_articles
 
+        except CircuitOpenError as e:
+            self.logger.warning(str(e))
+            return []
         except Exception as e:
             self.logger.error(
                 f"Failed to fetch news: {str(e)}\n{traceback.format_exc()}"
             )
             return []
 
-    def _get_returned_news(self) -> set:
+    def _parse_feed(self, url: str) -> "feedparser.FeedParserDict":
+        import feedparser
+
+        etag, modified = self._feed_validators.get(url, (None, None))
+        feed = feedparser.parse(url, etag=etag, modified=modified)
+        # feedparser reports HTTP and network errors on the result instead of
+        # raising; raise so the fetch scheduler can back off
+        if feed.get("status", 200) >= 400:
+            raise FeedFetchError(f"HTTP {feed.status} for {url}")
+        if not feed.entries and isinstance(feed.get("bozo_exception"), OSError):
+            raise FeedFetchError(str(feed.bozo_exception))
+        if feed.get("status") == 304:
+            # Nothing new since the last fetch; the result has no entries
+            CACHE_HITS.inc(cache="feed")
+        if feed.get("etag") or feed.get("modified"):
+            self._feed_validators[url] = (feed.get("etag"), feed.get("modified"))
+        return feed
+
+    def _load_returned_news(self) -> SeenLinks:
         try:
             with open(self.cache_file, "r") as f:
-                return {line.strip() for line in f}
+                return SeenLinks(line.strip() for line in f)
         except Exception as e:
             self.logger.error(f"Failed to read cache file: {str(e)}")
-            return set()
+            return SeenLinks()
+
+    def _get_returned_news(self) -> SeenLinks:
+        # 메모리의 set에는 아직 파일에 쓰이지 않은 링크도 포함됨
+        if self._returned_news is None:
+            self._returned_news = self._load_returned_news()
+        return self._returned_news
 
     def _add_to_returned_news(self, link: str):
-        try:
-            with open(self.cache_file, "a") as f:
-                f.write(f"{link}\n")
-            self.logger.debug(f"Added article to cache: {link}")
-        except Exception as e:
-            self.logger.error(f"Failed to add article to cache: {str(e)}")
+        self._get_returned_news().add(link)
+        self._cache_buffer.add(link)
+        self.logger.debug(f"Added article to cache: {link}")
+
+    def _write_returned_news(self, links: List[str]) -> None:
+        with open(self.cache_file, "a") as f:
+            f.writelines(f"{link}\n" for link in links)
+
+    def flush_if_due(self) -> int:
+        return self._cache_buffer.flush_if_due()
+
+    async def close(self) -> None:
+        """
+        Write any buffered dedup records to the cache file and stop the
+        headless browser
+        """
+        self._cache_buffer.close()
+        async with self._browser_lock:
+            if self._browser is not None:
+                await self._browser.close()
+                self._browser = None
+                BROWSER_POOL_SIZE.dec()
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+
+    def snapshot(self) -> Section:
+        """
+        The dedup index as link hashes, with the cache file's size at this
+        point, and the feed validators
+        """
+        return Section(
+            {
+                "cache_file_size": os.path.getsize(self.cache_file),
+                "feeds": {
+                    url: list(validators)
+                    for url, validators in self._feed_validators.items()
+                },
+            },
+            {"returned_news": self._get_returned_news().hashes()},
+        )
+
+    def restore(self, section: Section) -> None:
+        """
+        Take the dedup index and feed validators from snapshot(); only the
+        links appended to the cache file since are read from it
+        """
+        state = section.state
+        self._feed_validators.update(
+            (url, tuple(validators)) for url, validators in state["feeds"].items()
+        )
+        size = state["cache_file_size"]
+        if os.path.getsize(self.cache_file) < size:
+            # The file was replaced since; it is the source of truth
+            return
+        with open(self.cache_file, "rb") as f:
+            f.seek(size)
+            added = f.read().decode()
+        self._returned_news = SeenLinks(
+            (line.strip() for line in added.splitlines()),
+            section.arrays["returned_news"],
+        )
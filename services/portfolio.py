@@ -0,0 +1,81 @@
+"""
+Portfolio valuation from batched quotes
+
+Positions are valued as whole arrays: market value, the day's change and
+each position's weight come from a few NumPy operations over all holdings,
+however many there are.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, List, Sequence
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from db.rows import PortfolioRow
+
+
+@dataclass(frozen=True)
+class PortfolioValuation:
+    """
+    Valued portfolio
+
+    positions has one row per ticker, largest value first, with the columns
+    quantity, price, previous_close, value, day_change, day_change_pct and
+    weight; tickers without a quote are listed in missing instead.
+    """
+
+    positions: "pd.DataFrame"
+    total_value: float
+    day_change: float
+    day_change_pct: float
+    missing: List[str]
+
+
+def value_portfolio(
+    holdings: Sequence["PortfolioRow"], quotes: "pd.DataFrame"
+) -> PortfolioValuation:
+    """
+    Value holdings at quotes
+
+    Args:
+        holdings: Ticker and quantity per position
+        quotes: price and previous_close indexed by symbol
+    """
+    import numpy as np
+    import pandas as pd
+
+    tickers = [holding.ticker for holding in holdings]
+    quantity = np.array([holding.quantity for holding in holdings], dtype=float)
+    quoted = quotes.reindex(tickers)
+    price = quoted["price"].to_numpy(dtype=float)
+    previous = quoted["previous_close"].to_numpy(dtype=float)
+    known = ~np.isnan(price)
+
+    value = quantity * price
+    # No previous close (a new listing) counts as unchanged
+    change = quantity * (price - np.where(np.isnan(previous), price, previous))
+    total = float(value[known].sum())
+    opening = total - float(change[known].sum())
+    with np.errstate(invalid="ignore", divide="ignore"):
+        positions = pd.DataFrame(
+            {
+                "quantity": quantity,
+                "price": price,
+                "previous_close": previous,
+                "value": value,
+                "day_change": change,
+                "day_change_pct": change / (value - change),
+                "weight": value / total,
+            },
+            index=pd.Index(tickers, name="ticker"),
+        )[known]
+    return PortfolioValuation(
+        positions=positions.sort_values("value", ascending=False),
+        total_value=total,
+        day_change=total - opening,
+        day_change_pct=(total - opening) / opening if opening else 0.0,
+        missing=[ticker for ticker, ok in zip(tickers, known) if not ok],
+    )
@@ -0,0 +1,138 @@
+import asyncio
+import csv
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import AsyncIterator, Iterable, List, Optional
+
+
+@dataclass(frozen=True, slots=True)
+class Quote:
+    symbol: str
+    price: float
+    timestamp: datetime
+
+
+class StreamUnavailableError(Exception):
+    """The quote stream cannot be used; alerts fall back to polling"""
+
+
+class QuoteStream(ABC):
+    """Source of real-time quotes for the streaming alert mode"""
+
+    @abstractmethod
+    def stream(self, symbols: List[str]) -> AsyncIterator[Quote]:
+        """
+        Yield quotes for symbols as they arrive
+
+        Runs until cancelled or until the source ends; raises
+        StreamUnavailableError when the feed cannot be reached.
+        """
+        pass
+
+
+class ReplayQuoteStream(QuoteStream):
+    """
+    Replay recorded quotes, for offline runs and load tests
+
+    Args:
+        quotes: Quotes in timestamp order
+        speed: Replay speed relative to the recorded timestamps; 0 replays
+            without pauses
+    """
+
+    def __init__(self, quotes: Iterable[Quote], speed: float = 1.0):
+        self.quotes = list(quotes)
+        self.speed = speed
+
+    @classmethod
+    def from_csv(cls, path: str, speed: float = 1.0) -> "ReplayQuoteStream":
+        """Load symbol,timestamp,price rows; naive timestamps are UTC"""
+        quotes = []
+        with open(path, newline="") as f:
+            for row in csv.DictReader(f):
+                timestamp = datetime.fromisoformat(row["timestamp"])
+                if timestamp.tzinfo is None:
+                    timestamp = timestamp.replace(tzinfo=timezone.utc)
+                quotes.append(Quote(row["symbol"], float(row["price"]), timestamp))
+        return cls(quotes, speed)
+
+    async def stream(self, symbols: List[str]) -> AsyncIterator[Quote]:
+        wanted = set(symbols)
+        previous: Optional[datetime] = None
+        for quote in self.quotes:
+            if quote.symbol not in wanted:
+                continue
+            if self.speed and previous is not None:
+                delay = (quote.timestamp - previous).total_seconds() / self.speed
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            previous = quote.timestamp
+            yield quote
+
+
+class YFinanceQuoteStream(QuoteStream):
+    """
+    Yahoo Finance's streaming endpoint through yfinance.AsyncWebSocket
+
+    Needs a yfinance release that ships AsyncWebSocket (0.2.55 or later).
+    """
+
+    def __init__(self, max_pending: int = 10000):
+        self.max_pending = max_pending
+
+    async def stream(self, symbols: List[str]) -> AsyncIterator[Quote]:
+        import yfinance as yf
+
+        if not hasattr(yf, "AsyncWebSocket"):
+            raise StreamUnavailableError(
+                f"yfinance {yf.__version__} has no AsyncWebSocket"
+            )
+
+        queue: asyncio.Queue = asyncio.Queue(self.max_pending)
+
+        def on_message(message: dict) -> None:
+            if "id" in message and "price" in message:
+                # Drop ticks rather than block the socket if we fall behind
+                if not queue.full():
+                    queue.put_nowait(message)
+
+        try:
+            async with yf.AsyncWebSocket(verbose=False) as websocket:
+                await websocket.subscribe(symbols)
+                listener = asyncio.create_task(websocket.listen(on_message))
+                try:
+                    while True:
+                        message = asyncio.create_task(queue.get())
+                        await asyncio.wait(
+                            {message, listener}, return_when=asyncio.FIRST_COMPLETED
+                        )
+                        if not message.done():
+                            message.cancel()
+                            listener.result()
+                            raise StreamUnavailableError("Quote stream closed")
+                        yield self._quote(message.result())
+                finally:
+                    listener.cancel()
+        except (OSError, ImportError) as e:
+            raise StreamUnavailableError(str(e)) from e
+
+    @staticmethod
+    def _quote(message: dict) -> Quote:
+        # time is milliseconds since the epoch, sent as a string
+        timestamp = datetime.fromtimestamp(int(message["time"]) / 1000, timezone.utc)
+        return Quote(message["id"], float(message["price"]), timestamp)
+
+
+def create_quote_stream(
+    provider: str, replay_file: Optional[str] = None, replay_speed: float = 1.0
+) -> QuoteStream:
+    """Build the quote stream named by the STREAM_PROVIDER setting"""
+    provider = provider.lower()
+    if provider == "yfinance":
+        return YFinanceQuoteStream()
+    if provider == "replay":
+        if not replay_file:
+            raise ValueError("STREAM_PROVIDER=replay requires STREAM_REPLAY_FILE")
+        return ReplayQuoteStream.from_csv(replay_file, replay_speed)
+    raise ValueError(f"Unsupported quote stream provider: {provider}")
@@ -0,0 +1,78 @@
+"""
+Latest prices for many symbols at once
+
+Quotes are the last two daily closes of each symbol: the latest price
+(today's close so far during the session) and the previous close for the
+day's change. They are downloaded in one batched request for every symbol
+that is not cached, and kept for the cache's ttl.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, List, Sequence, Tuple
+
+from utils.singleflight import TTLCache
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+
+def last_two_closes(closes: "pd.DataFrame") -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    Latest and previous close of each column of a bars x symbols frame,
+    skipping missing bars (symbols from different exchanges rarely share
+    every date); NaN where a symbol has fewer closes
+    """
+    import numpy as np
+
+    values = closes.to_numpy(dtype=float)
+    bars, count = values.shape
+    if not bars:
+        return np.full(count, np.nan), np.full(count, np.nan)
+    columns = np.arange(count)
+    rows = np.where(np.isnan(values), -1, np.arange(bars)[:, None])
+    last = rows.max(axis=0)
+    rows[last, columns] = -1
+    previous = rows.max(axis=0)
+    padded = np.vstack([values, np.full(count, np.nan)])
+    # Row -1 (no close) picks the NaN padding row
+    return padded[last, columns], padded[previous, columns]
+
+
+class QuoteCache:
+    """
+    Price and previous close per symbol, kept for ttl seconds
+
+    Symbols a download had no data for are cached as unknown too, so a bad
+    ticker is not requested again on every lookup.
+    """
+
+    def __init__(self, ttl: float = 60.0, maxsize: int = 10000):
+        self._quotes = TTLCache(ttl, maxsize)
+
+    def missing(self, symbols: Sequence[str]) -> List[str]:
+        """Symbols without a fresh quote"""
+        return [symbol for symbol in symbols if self._quotes.get(symbol) is None]
+
+    def update(self, symbols: Sequence[str], closes: "pd.DataFrame") -> None:
+        """Store quotes from a download of daily closes for symbols"""
+        import numpy as np
+
+        prices, previous = last_two_closes(closes)
+        found = dict(zip(closes.columns, zip(prices.tolist(), previous.tolist())))
+        for symbol in symbols:
+            self._quotes.set(symbol, found.get(symbol, (np.nan, np.nan)))
+
+    def get(self, symbols: Sequence[str]) -> "pd.DataFrame":
+        """Quotes indexed by symbol, columns price and previous_close"""
+        import numpy as np
+        import pandas as pd
+
+        unknown = (np.nan, np.nan)
+        return pd.DataFrame(
+            [self._quotes.get(symbol, unknown) for symbol in symbols],
+            index=pd.Index(symbols, name="symbol"),
+            columns=["price", "previous_close"],
+            dtype=float,
+        )
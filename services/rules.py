@@ -0,0 +1,534 @@
+"""
+User-defined alert rules
+
+A rule is a boolean expression over indicator series, for example
+
+    RSI(14) < 25 AND close > SMA(200)
+    MACD CROSSES ABOVE SIGNAL
+
+Rules are tokenized and parsed once into nodes of a shared expression DAG.
+Equal subexpressions are interned to a single node (the SMA(200) used by
+several rules, the MACD under SIGNAL), so each is computed once per cycle.
+Nodes are evaluated on bars x symbols panels, one vectorized operation per
+node for all symbols at once; indicators use the services.indicators
+kernels.
+
+Grammar (keywords and names are case-insensitive):
+
+    rule       := or
+    or         := and ("OR" and)*
+    and        := not ("AND" not)*
+    not        := "NOT" not | comparison
+    comparison := sum [("<" | "<=" | ">" | ">=" | "==" | "!=") sum
+                       | "CROSSES" ("ABOVE" | "BELOW") sum]
+    sum        := product (("+" | "-") product)*
+    product    := unary (("*" | "/") unary)*
+    unary      := "-" unary | NUMBER | NAME ["(" args ")"] | "(" or ")"
+
+Series: CLOSE, OPEN, HIGH, LOW, VOLUME, SMA(n[, series]), EMA(n[, series]),
+RSI[(n)], MACD[(fast, slow)] and SIGNAL[(fast, slow, n)].
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+from services import indicators
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+MAX_RULE_LENGTH = 256
+FIELDS = {
+    "CLOSE": "Close",
+    "OPEN": "Open",
+    "HIGH": "High",
+    "LOW": "Low",
+    "VOLUME": "Volume",
+}
+FUNCTIONS = {"SMA", "EMA", "RSI", "MACD", "SIGNAL"}
+KEYWORDS = {"AND", "OR", "NOT", "CROSSES", "ABOVE", "BELOW"}
+# Words that start an expression, so they cannot be read as a rule's symbol
+RESERVED = set(FIELDS) | FUNCTIONS | KEYWORDS
+
+COMPARISONS = {"<": "lt", "<=": "le", ">": "gt", ">=": "ge", "==": "eq", "!=": "ne"}
+ARITHMETIC = {"+": "add", "-": "sub", "*": "mul", "/": "div"}
+
+TOKEN = re.compile(
+    r"\s*(?:(?P<number>\d+(?:\.\d*)?|\.\d+)"
+    r"|(?P<name>[A-Za-z_][A-Za-z0-9_]*)"
+    r"|(?P<op><=|>=|==|!=|[<>()+\-*/,]))"
+)
+
+NUMBER = "number"
+SERIES = "series"
+BOOLEAN = "boolean"
+
+
+class RuleSyntaxError(ValueError):
+    """The rule text is not a valid boolean expression"""
+
+
+@dataclass(frozen=True, slots=True)
+class Token:
+    kind: str
+    text: str
+    position: int
+
+
+def tokenize(text: str) -> List[Token]:
+    if len(text) > MAX_RULE_LENGTH:
+        raise RuleSyntaxError(f"Rule is longer than {MAX_RULE_LENGTH} characters")
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = TOKEN.match(text, position)
+        if match is None:
+            raise RuleSyntaxError(f"Unexpected character at {position + 1}")
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "name":
+            value = value.upper()
+        tokens.append(Token(kind, value, match.start(kind)))
+        position = match.end()
+    return tokens
+
+
+class Node:
+    """
+    Interned expression node; build nodes through ExpressionPool.node
+
+    Attributes:
+        id: Position in the pool, children always have smaller ids
+        op: Operation name
+        args: Child nodes
+        params: Literal parameters (windows, constants, field names)
+        kind: NUMBER, SERIES or BOOLEAN
+    """
+
+    __slots__ = ("id", "op", "args", "params", "kind")
+
+    def __init__(self, id: int, op: str, args: tuple, params: tuple, kind: str):
+        self.id = id
+        self.op = op
+        self.args = args
+        self.params = params
+        self.kind = kind
+
+    def __repr__(self) -> str:
+        return f"Node({self.id}, {self.op}, {[a.id for a in self.args]}, {self.params})"
+
+
+class ExpressionPool:
+    """Hash-consing store: one node per distinct (op, children, params)"""
+
+    def __init__(self):
+        self.nodes: List[Node] = []
+        self._index: Dict[tuple, Node] = {}
+
+    def node(
+        self, op: str, args: Tuple[Node, ...] = (), params: tuple = (), kind=SERIES
+    ) -> Node:
+        key = (op, tuple(arg.id for arg in args), params)
+        node = self._index.get(key)
+        if node is None:
+            node = Node(len(self.nodes), op, args, params, kind)
+            self.nodes.append(node)
+            self._index[key] = node
+        return node
+
+    def parse(self, text: str) -> Node:
+        """Parse a rule into this pool; raises RuleSyntaxError"""
+        root = _Parser(self, tokenize(text)).parse()
+        if root.kind != BOOLEAN:
+            raise RuleSyntaxError("A rule must be a comparison, e.g. RSI < 30")
+        if not any(node.op == "field" for node in self.reachable([root])):
+            raise RuleSyntaxError("A rule must compare a price series")
+        return root
+
+    @staticmethod
+    def reachable(roots: Iterable[Node]) -> List[Node]:
+        """Nodes the roots depend on, children before parents"""
+        seen: Dict[int, Node] = {}
+        stack = list(roots)
+        while stack:
+            node = stack.pop()
+            if node.id not in seen:
+                seen[node.id] = node
+                stack.extend(node.args)
+        return sorted(seen.values(), key=lambda node: node.id)
+
+
+class _Parser:
+    def __init__(self, pool: ExpressionPool, tokens: List[Token]):
+        self.pool = pool
+        self.tokens = tokens
+        self.index = 0
+
+    def parse(self) -> Node:
+        if not self.tokens:
+            raise RuleSyntaxError("Empty rule")
+        node = self._or()
+        if self.index < len(self.tokens):
+            token = self.tokens[self.index]
+            raise RuleSyntaxError(f"Unexpected '{token.text}' at {token.position + 1}")
+        return node
+
+    def _peek(self) -> Optional[str]:
+        if self.index < len(self.tokens):
+            return self.tokens[self.index].text
+        return None
+
+    def _take(self, *expected: str) -> str:
+        if self.index >= len(self.tokens):
+            raise RuleSyntaxError(
+                f"Expected {' or '.join(expected) if expected else 'more'} at end"
+            )
+        token = self.tokens[self.index]
+        if expected and token.text not in expected:
+            raise RuleSyntaxError(
+                f"Expected {' or '.join(expected)} at {token.position + 1}, "
+                f"got '{token.text}'"
+            )
+        self.index += 1
+        return token.text
+
+    def _logical(self, op: str, args: Tuple[Node, ...]) -> Node:
+        for arg in args:
+            if arg.kind != BOOLEAN:
+                raise RuleSyntaxError(f"{op.upper()} needs comparisons on both sides")
+        return self.pool.node(op, args, kind=BOOLEAN)
+
+    def _or(self) -> Node:
+        node = self._and()
+        while self._peek() == "OR":
+            self._take()
+            node = self._logical("or", (node, self._and()))
+        return node
+
+    def _and(self) -> Node:
+        node = self._not()
+        while self._peek() == "AND":
+            self._take()
+            node = self._logical("and", (node, self._not()))
+        return node
+
+    def _not(self) -> Node:
+        if self._peek() == "NOT":
+            self._take()
+            return self._logical("not", (self._not(),))
+        return self._comparison()
+
+    def _comparison(self) -> Node:
+        left = self._sum()
+        token = self._peek()
+        if token in COMPARISONS:
+            self._take()
+            op = COMPARISONS[token]
+        elif token == "CROSSES":
+            self._take()
+            op = "crosses_" + self._take("ABOVE", "BELOW").lower()
+        else:
+            return left
+        right = self._sum()
+        for side in (left, right):
+            if side.kind == BOOLEAN:
+                raise RuleSyntaxError("Comparisons take numbers or series")
+        if op.startswith("crosses") and SERIES not in (left.kind, right.kind):
+            raise RuleSyntaxError("CROSSES needs a series on one side")
+        return self.pool.node(op, (left, right), kind=BOOLEAN)
+
+    def _arithmetic(self, op: str, left: Node, right: Node) -> Node:
+        if BOOLEAN in (left.kind, right.kind):
+            raise RuleSyntaxError("Arithmetic takes numbers or series")
+        if left.kind == right.kind == NUMBER:
+            # Fold constants so "100 * 1.1" and "110" share a node
+            a, b = left.params[0], right.params[0]
+            if op == "div" and b == 0:
+                raise RuleSyntaxError("Division by zero")
+            value = {"add": a + b, "sub": a - b, "mul": a * b}.get(op)
+            return self._number(a / b if value is None else value)
+        return self.pool.node(op, (left, right))
+
+    def _sum(self) -> Node:
+        node = self._product()
+        while self._peek() in ("+", "-"):
+            node = self._arithmetic(ARITHMETIC[self._take()], node, self._product())
+        return node
+
+    def _product(self) -> Node:
+        node = self._unary()
+        while self._peek() in ("*", "/"):
+            node = self._arithmetic(ARITHMETIC[self._take()], node, self._unary())
+        return node
+
+    def _number(self, value: float) -> Node:
+        return self.pool.node("const", params=(float(value),), kind=NUMBER)
+
+    def _unary(self) -> Node:
+        if self.index >= len(self.tokens):
+            raise RuleSyntaxError("Rule ends unexpectedly")
+        token = self.tokens[self.index]
+        if token.text == "-":
+            self._take()
+            operand = self._unary()
+            return self._arithmetic("sub", self._number(0), operand)
+        if token.text == "(":
+            self._take()
+            node = self._or()
+            self._take(")")
+            return node
+        if token.kind == "number":
+            self._take()
+            return self._number(float(token.text))
+        if token.kind == "name":
+            self._take()
+            if token.text in FIELDS:
+                return self.pool.node("field", params=(FIELDS[token.text],))
+            if token.text in FUNCTIONS:
+                return self._function(token)
+        raise RuleSyntaxError(f"Unexpected '{token.text}' at {token.position + 1}")
+
+    def _arguments(self) -> List[Node]:
+        if self._peek() != "(":
+            return []
+        self._take("(")
+        args = [self._sum()]
+        while self._peek() == ",":
+            self._take()
+            args.append(self._sum())
+        self._take(")")
+        return args
+
+    @staticmethod
+    def _window(node: Node, name: str) -> int:
+        value = node.params[0] if node.kind == NUMBER else None
+        if value is None or value != int(value) or not 1 <= value <= 1000:
+            raise RuleSyntaxError(f"{name} windows are whole numbers from 1 to 1000")
+        return int(value)
+
+    def _function(self, token: Token) -> Node:
+        name = token.text
+        args = self._arguments()
+        close = self.pool.node("field", params=("Close",))
+
+        if name in ("SMA", "EMA"):
+            if not 1 <= len(args) <= 2:
+                raise RuleSyntaxError(f"{name} takes (window[, series])")
+            source = args[1] if len(args) == 2 else close
+            if source.kind != SERIES:
+                raise RuleSyntaxError(f"{name} averages a series")
+            return self.pool.node(
+                name.lower(), (source,), (self._window(args[0], name),)
+            )
+
+        defaults = {"RSI": [14], "MACD": [12, 26], "SIGNAL": [12, 26, 9]}[name]
+        if len(args) not in (0, len(defaults)):
+            raise RuleSyntaxError(
+                f"{name} takes no arguments or "
+                f"{len(defaults)} window{'s' if len(defaults) > 1 else ''}"
+            )
+        windows = [self._window(arg, name) for arg in args] or defaults
+        if name == "RSI":
+            return self.pool.node("rsi", (close,), tuple(windows))
+        macd = self.pool.node("macd", (close,), tuple(windows[:2]))
+        if name == "MACD":
+            return macd
+        return self.pool.node("signal", (macd,), (windows[2],))
+
+
+def lookback(node: Node, memo: Optional[Dict[int, int]] = None) -> int:
+    """Bars of history a node needs before its latest value is meaningful"""
+    memo = {} if memo is None else memo
+    if node.id in memo:
+        return memo[node.id]
+    children = max((lookback(arg, memo) for arg in node.args), default=0)
+    if node.op == "field":
+        bars = 1
+    elif node.op == "sma":
+        bars = children + node.params[0] - 1
+    elif node.op == "rsi":
+        bars = children + node.params[0]
+    elif node.op in ("ema", "signal"):
+        # An EMA seeded with its first value settles after a few spans
+        bars = children + 3 * node.params[0]
+    elif node.op == "macd":
+        bars = children + 3 * max(node.params)
+    elif node.op.startswith("crosses"):
+        bars = children + 1
+    else:
+        bars = children
+    memo[node.id] = bars
+    return bars
+
+
+def build_panel(
+    frames: Dict[str, "pd.DataFrame"], fields: Iterable[str] = ("Close",)
+) -> Dict[str, "pd.DataFrame"]:
+    """
+    Align per-symbol OHLCV frames into one bars x symbols frame per field
+
+    Symbols trade on different calendars, so bars are aligned by position
+    from the latest bar rather than by date; the last row holds every
+    symbol's latest bar.
+    """
+    import pandas as pd
+
+    length = max((len(frame) for frame in frames.values()), default=0)
+    panel = {}
+    for field in fields:
+        columns = {}
+        for symbol, frame in frames.items():
+            values = frame[field].to_numpy(dtype=float)
+            columns[symbol] = pd.Series(
+                values, index=range(length - len(values), length)
+            )
+        panel[field] = pd.DataFrame(columns, index=range(length), dtype=float)
+    return panel
+
+
+def _kernel(kernel, frame: "pd.DataFrame", *args) -> "pd.DataFrame":
+    # Run an indicator kernel on all columns of a bars x symbols frame
+    return _like(kernel(frame.to_numpy(dtype=float), *args), frame)
+
+
+def _like(values, frame: "pd.DataFrame") -> "pd.DataFrame":
+    import pandas as pd
+
+    return pd.DataFrame(values, index=frame.index, columns=frame.columns)
+
+
+def _crosses(left, right, above: bool):
+    # A constant side broadcasts as the same level on both bars
+    previous_left = left.shift(1) if hasattr(left, "shift") else left
+    previous_right = right.shift(1) if hasattr(right, "shift") else right
+    if above:
+        return (left > right) & (previous_left <= previous_right)
+    return (left < right) & (previous_left >= previous_right)
+
+
+def _evaluate(node: Node, args: list, panel: Dict[str, "pd.DataFrame"]):
+    op = node.op
+    if op == "const":
+        return node.params[0]
+    if op == "field":
+        return panel[node.params[0]]
+    if op == "sma":
+        return _kernel(indicators.sma, args[0], node.params[0])
+    if op in ("ema", "signal"):
+        return _kernel(indicators.ema, args[0], node.params[0])
+    if op == "rsi":
+        return _kernel(indicators.rsi, args[0], node.params[0])
+    if op == "macd":
+        # Both EMAs in one pass; the signal line is its own node
+        fast, slow = indicators.emas(args[0].to_numpy(dtype=float), node.params)
+        return _like(fast - slow, args[0])
+    if op == "add":
+        return args[0] + args[1]
+    if op == "sub":
+        return args[0] - args[1]
+    if op == "mul":
+        return args[0] * args[1]
+    if op == "div":
+        return args[0] / args[1]
+    if op == "lt":
+        return args[0] < args[1]
+    if op == "le":
+        return args[0] <= args[1]
+    if op == "gt":
+        return args[0] > args[1]
+    if op == "ge":
+        return args[0] >= args[1]
+    if op == "eq":
+        return args[0] == args[1]
+    if op == "ne":
+        return args[0] != args[1]
+    if op == "crosses_above":
+        return _crosses(args[0], args[1], above=True)
+    if op == "crosses_below":
+        return _crosses(args[0], args[1], above=False)
+    if op == "and":
+        return args[0] & args[1]
+    if op == "or":
+        return args[0] | args[1]
+    if op == "not":
+        return ~args[0] if hasattr(args[0], "shift") else not args[0]
+    raise ValueError(f"Unknown rule operation: {op}")
+
+
+class RuleSet:
+    """
+    Rules compiled into one expression DAG
+
+    Args:
+        rules: (rule id, rule text) pairs; invalid rules are left out and
+            listed in invalid with their errors
+    """
+
+    def __init__(self, rules: Iterable[Tuple[int, str]]):
+        self.rules = list(rules)
+        self.pool = ExpressionPool()
+        self.roots: Dict[int, Node] = {}
+        self.invalid: Dict[int, str] = {}
+        for rule_id, text in self.rules:
+            try:
+                self.roots[rule_id] = self.pool.parse(text)
+            except RuleSyntaxError as e:
+                self.invalid[rule_id] = str(e)
+        memo: Dict[int, int] = {}
+        self.lookbacks = {
+            rule_id: lookback(root, memo) for rule_id, root in self.roots.items()
+        }
+        self.fields = sorted(
+            {node.params[0] for node in self.pool.nodes if node.op == "field"}
+        )
+
+    def evaluate(self, panel: Dict[str, "pd.DataFrame"]) -> Dict[int, "pd.Series"]:
+        """
+        Evaluate every rule on the latest bar of every symbol in the panel
+
+        Returns:
+            Rule id to a boolean Series indexed by symbol
+        """
+        import pandas as pd
+
+        symbols = next(iter(panel.values())).columns if panel else []
+        results = {}
+        for rule_id, value in self._root_values(panel).items():
+            if isinstance(value, pd.DataFrame):
+                latest = value.iloc[-1] if len(value) else pd.Series(False, symbols)
+                results[rule_id] = latest.fillna(False).astype(bool)
+            else:
+                results[rule_id] = pd.Series(bool(value), index=symbols)
+        return results
+
+    def signals(self, panel: Dict[str, "pd.DataFrame"]) -> Dict[int, "pd.DataFrame"]:
+        """
+        Evaluate every rule on every bar of the panel, for backtests
+
+        Returns:
+            Rule id to a bars x symbols boolean frame
+        """
+        import pandas as pd
+
+        shape = next(iter(panel.values())) if panel else pd.DataFrame()
+        results = {}
+        for rule_id, value in self._root_values(panel).items():
+            if isinstance(value, pd.DataFrame):
+                results[rule_id] = value.fillna(False).astype(bool)
+            else:
+                results[rule_id] = pd.DataFrame(
+                    bool(value), index=shape.index, columns=shape.columns
+                )
+        return results
+
+    def _root_values(self, panel: Dict[str, "pd.DataFrame"]) -> dict:
+        # Each node once, children before parents
+        values = {}
+        for node in self.pool.reachable(self.roots.values()):
+            args = [values[arg.id] for arg in node.args]
+            values[node.id] = _evaluate(node, args, panel)
+        return {rule_id: values[root.id] for rule_id, root in self.roots.items()}
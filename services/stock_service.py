@@ -1,43 +1,168 @@
+from __future__ import annotations
+
+import asyncio
 import traceback
-import yfinance as yf
-from typing import Tuple, Optional
-import pandas as pd
+from collections import defaultdict
+from typing import TYPE_CHECKING, Dict, Sequence, Tuple, Optional
 import io
-import numpy as np
-import matplotlib.pyplot as plt
+from services import indicators
+from services.market_data import MarketDataProvider, YFinanceProvider
+from services.quotes import QuoteCache
+from services.timeframes import BarStore, period_for
+from utils.fetch_scheduler import FetchScheduler, Priority
 from utils.logger import setup_logger
+from utils.metrics import CACHE_HITS
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 class StockService:
-    def __init__(self):
-        self.logger = setup_logger()
+    def __init__(
+        self,
+        provider: Optional[MarketDataProvider] = None,
+        fetcher: Optional[FetchScheduler] = None,
+        bar_store: Optional[BarStore] = None,
+        quote_cache: Optional[QuoteCache] = None,
+    ):
+        self.logger = setup_logger("stock_service")
+        self.provider = provider or YFinanceProvider()
+        self.fetcher = fetcher or FetchScheduler()
+        self.bar_store = bar_store or BarStore()
+        # One base bar refresh per symbol at a time
+        self._bar_locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self.quote_cache = quote_cache or QuoteCache()
+        # Concurrent lookups wait for a running download instead of
+        # requesting the same symbols again
+        self._quote_lock = asyncio.Lock()
 
-    @staticmethod
-    def get_stock_data(symbol: str, period: str = "3mo") -> pd.DataFrame:
-        stock = yf.Ticker(symbol)
-        return stock.history(period=period)
+    def warm_up(self) -> None:
+        """
+        Import the market data and charting libraries and build matplotlib's
+        font cache ahead of the first alert; blocking, run it in a thread
+        """
+        # pyplot is only imported: its figure state belongs to the charts
+        # drawn on the event loop thread, so the warm-up figure is drawn
+        # through the object-oriented API
+        import matplotlib.pyplot  # noqa: F401
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        self.provider.warm_up()
+        # Rendering one figure loads the renderer and resolves the fonts
+        figure = Figure(figsize=(1, 1))
+        axes = figure.add_subplot()
+        axes.plot([0, 1], [0, 1])
+        axes.set_title("warm-up")
+        FigureCanvasAgg(figure).print_png(io.BytesIO())
+
+    def get_stock_data(self, symbol: str, period: str = "3mo") -> pd.DataFrame:
+        return self.provider.history(symbol, period=period)
+
+    async def fetch_stock_data(
+        self,
+        symbol: str,
+        period: str = "3mo",
+        priority: Priority = Priority.BACKGROUND,
+        interval: str = "1d",
+    ) -> pd.DataFrame:
+        """get_stock_data through the fetch scheduler, off the event loop"""
+        return await self.fetcher.submit(
+            self.provider.host,
+            self.provider.history,
+            symbol,
+            period=period,
+            interval=interval,
+            priority=priority,
+        )
+
+    async def fetch_bars(
+        self,
+        symbol: str,
+        timeframe: str = "1d",
+        bars: int = 63,
+        priority: Priority = Priority.BACKGROUND,
+    ) -> pd.DataFrame:
+        """
+        The last bars bars of a timeframe, aggregated from the cached base
+        interval bars; only the newest base bars are downloaded, at most once
+        per refresh interval for all timeframes. Longer histories than the
+        base interval reaches are downloaded in the timeframe itself.
+        """
+        store = self.bar_store
+        if not store.covers(timeframe, bars):
+            return await self.fetch_stock_data(
+                symbol, period_for(timeframe, bars), priority, interval=timeframe
+            )
+
+        async with self._bar_locks[symbol]:
+            period = store.refresh_period(symbol)
+            if period is None:
+                CACHE_HITS.inc(cache="bars")
+            else:
+                fresh = await self.fetch_stock_data(
+                    symbol, period, priority, interval=store.base_interval
+                )
+                store.merge(symbol, fresh)
+        cached = store.bars(symbol, timeframe)
+        if cached is None:
+            # Nothing came back for the symbol yet, e.g. an unknown ticker
+            import pandas as pd
+
+            return pd.DataFrame()
+        # A view of the cached bars, shared with other callers
+        return cached[-bars:].to_frame()
+
+    async def fetch_quotes(
+        self, symbols: Sequence[str], priority: Priority = Priority.BACKGROUND
+    ) -> pd.DataFrame:
+        """
+        Price and previous close of symbols, indexed by symbol (NaN when
+        unknown); symbols missing from the quote cache are downloaded
+        together in one request
+        """
+        async with self._quote_lock:
+            missing = self.quote_cache.missing(symbols)
+            if missing:
+                closes = await self.fetcher.submit(
+                    self.provider.host,
+                    self.provider.closes,
+                    missing,
+                    priority=priority,
+                )
+                self.quote_cache.update(missing, closes)
+            else:
+                CACHE_HITS.inc(cache="quotes")
+        return self.quote_cache.get(symbols)
 
     @staticmethod
     def calculate_macd(data: pd.DataFrame) -> Tuple[pd.Series, pd.Series]:
-        exp1 = data["Close"].ewm(span=12, adjust=False).mean()
-        exp2 = data["Close"].ewm(span=26, adjust=False).mean()
-        macd = exp1 - exp2
-        signal = macd.ewm(span=9, adjust=False).mean()
-        return macd, signal
+        """MACD(12, 26)와 9일 시그널선"""
+        import pandas as pd
+
+        macd, signal = indicators.macd(data["Close"].to_numpy(dtype=float))
+        return pd.Series(macd, index=data.index), pd.Series(signal, index=data.index)
 
     @staticmethod
     def calculate_rsi(data, window=14):
         """RSI 계산 함수"""
-        delta = data["Close"].diff(1)  # 종가의 변화량을 계산
-        gain = (delta.where(delta > 0, 0)).rolling(window=window).mean()  # 상승률 계산
-        loss = (-delta.where(delta < 0, 0)).rolling(window=window).mean()  # 하락률 계산
+        import pandas as pd
+
+        rsi = indicators.rsi(data["Close"].to_numpy(dtype=float), window)
+        return pd.Series(rsi, index=data.index)
 
-        rs = gain / loss  # RS(Relative Strength) 계산
-        rsi = 100 - (100 / (1 + rs))  # RSI 계산
-        return rsi
+    @staticmethod
+    def moving_average(data: pd.DataFrame, window: int = 20) -> pd.Series:
+        """종가 이동평균"""
+        import pandas as pd
+
+        sma = indicators.sma(data["Close"].to_numpy(dtype=float), window)
+        return pd.Series(sma, index=data.index)
 
     def generate_price_chart(self, symbol: str, data: pd.DataFrame) -> io.BytesIO:
         """종가 차트 생성"""
+        import matplotlib.pyplot as plt
+
         plt.figure(figsize=(10, 6))
         plt.plot(data.index, data["Close"])
         plt.title(f"{symbol} Stock Price")
@@ -55,6 +180,8 @@ class StockService:
         self, symbol: str, chart_data: pd.DataFrame
     ) -> io.BytesIO:
         """MACD 시그널 차트 생성"""
+        import matplotlib.pyplot as plt
+
         macd, signal = self.calculate_macd(chart_data)
         plt.figure(figsize=(12, 6))
         plt.subplot(2, 1, 1)
@@ -66,8 +193,8 @@ class StockService:
             # buy_signals = (macd > signal)[signal.first_valid_index() :]
             # sell_signals = ~buy_signals
             # 주가와 함께 확인
-            price_above_ma = (
-                chart_data["Close"] > chart_data["Close"].rolling(window=20).mean()
+            price_above_ma = chart_data["Close"] > self.moving_average(
+                chart_data, 20
             )  # 20일 SMA
             buy_signals = (macd > signal) & price_above_ma
             sell_signals = (macd < signal) & ~price_above_ma
@@ -116,8 +243,9 @@ class StockService:
 
     def generate_rsi_chart(self, symbol, chart_data, rsi_window=14):
         """RSI를 이용한 매수/매도 신호 표시 차트 생성"""
+        import matplotlib.pyplot as plt
+
         rsi = self.calculate_rsi(chart_data, window=rsi_window)
-        chart_data["RSI"] = rsi
 
         # Buy/Sell signals based on RSI thresholds
         buy_signals = rsi < 30
@@ -0,0 +1,448 @@
+"""
+Multi-timeframe bars built locally from one base interval
+
+Only the finest interval (the base, e.g. 5m) is downloaded. Coarser
+timeframes (15m, 1h, 1d, 1wk) are aggregated from it, and after the first
+download each refresh fetches just the latest base bars and re-aggregates
+only the buckets they touch.
+
+Buckets are labelled by their start in the exchange's local time: intraday
+buckets are aligned to the first session's open (so US hourly bars start at
+9:30 like Yahoo's), daily buckets are local dates and weekly buckets start
+on Monday.
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Dict, Optional, Sequence, Tuple
+
+from services.bars import FIELDS, BarBuffer, Bars, TimeIndexPool
+from services.market_calendar import Exchange, exchange_for
+from utils.snapshot import Section
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+TIMEFRAME_MINUTES = {
+    "1m": 1,
+    "2m": 2,
+    "5m": 5,
+    "15m": 15,
+    "30m": 30,
+    "1h": 60,
+    "1d": 1440,
+    "1wk": 10080,
+}
+# Days of history Yahoo serves for intraday intervals
+INTERVAL_REACH_DAYS = {"1m": 7, "2m": 60, "5m": 60, "15m": 60, "30m": 60, "1h": 730}
+# Shortest yfinance period covering a number of trading days
+PERIODS = (
+    ("5d", 5),
+    ("1mo", 21),
+    ("3mo", 63),
+    ("6mo", 126),
+    ("1y", 252),
+    ("2y", 504),
+    ("5y", 1260),
+    ("10y", 2520),
+)
+# Regular US session, for sizing intraday downloads
+SESSION_MINUTES = 390
+
+_MINUTE_NS = 60 * 10**9
+_DAY_NS = 1440 * _MINUTE_NS
+
+
+def validate_timeframe(timeframe: str, base_interval: str) -> None:
+    """Raise ValueError unless timeframe can be aggregated from base_interval"""
+    for name in (timeframe, base_interval):
+        if name not in TIMEFRAME_MINUTES:
+            raise ValueError(
+                f"Unknown timeframe {name}; use one of {', '.join(TIMEFRAME_MINUTES)}"
+            )
+    minutes, base = TIMEFRAME_MINUTES[timeframe], TIMEFRAME_MINUTES[base_interval]
+    if minutes < base or minutes % base:
+        raise ValueError(f"{timeframe} bars cannot be built from {base_interval} bars")
+
+
+def period_for(timeframe: str, bars: int) -> str:
+    """Shortest yfinance period with at least bars bars of timeframe"""
+    minutes = TIMEFRAME_MINUTES[timeframe]
+    if minutes >= TIMEFRAME_MINUTES["1wk"]:
+        days = bars * 5
+    elif minutes >= TIMEFRAME_MINUTES["1d"]:
+        days = bars
+    else:
+        days = math.ceil(bars * minutes / SESSION_MINUTES)
+        reach = INTERVAL_REACH_DAYS.get(timeframe)
+        if reach is not None and days * 7 / 5 > reach:
+            return f"{reach}d"
+    for period, period_days in PERIODS:
+        if days <= period_days:
+            return period
+    return "max"
+
+
+def bars_within(timeframe: str, days: float) -> int:
+    """Approximate number of bars of timeframe in days calendar days"""
+    trading_days = days * 5 / 7
+    minutes = TIMEFRAME_MINUTES[timeframe]
+    if minutes >= TIMEFRAME_MINUTES["1wk"]:
+        return int(days / 7)
+    if minutes >= TIMEFRAME_MINUTES["1d"]:
+        return int(trading_days)
+    return int(trading_days * SESSION_MINUTES / minutes)
+
+
+def bucket_start(at: datetime, timeframe: str, exchange: Exchange) -> "pd.Timestamp":
+    """Start of the timeframe bucket containing at"""
+    import numpy as np
+    import pandas as pd
+
+    local = pd.Timestamp(at).tz_convert(exchange.tz).tz_localize(None)
+    wall = np.array([local.as_unit("ns").value])
+    start = pd.Timestamp(int(_bucket_walls(wall, timeframe, _anchor(exchange))[0]))
+    return start.tz_localize(exchange.tz, ambiguous=True, nonexistent="shift_forward")
+
+
+def resample(
+    frame: "pd.DataFrame", timeframe: str, exchange: Exchange
+) -> "pd.DataFrame":
+    """Aggregate OHLCV bars, oldest first, into timeframe buckets"""
+    import pandas as pd
+
+    if frame.empty:
+        return frame.copy()
+    keys, starts, ends = _buckets(frame.index, timeframe, exchange)
+    values = _aggregate(frame.to_numpy(dtype=float).T, frame.columns, starts, ends)
+    result = pd.DataFrame(
+        values.T, index=_bucket_index(keys[starts], exchange), columns=frame.columns
+    )
+    if "Volume" in result:
+        result["Volume"] = result["Volume"].astype("int64")
+    return result
+
+
+def resample_bars(bars: Bars, timeframe: str, exchange: Exchange) -> Bars:
+    """resample() for compact bars, without building DataFrames"""
+    import numpy as np
+
+    if not len(bars):
+        return bars
+    keys, starts, ends = _buckets(bars.index(), timeframe, exchange)
+    values = _aggregate(bars.values, bars.fields, starts, ends)
+    index = _bucket_index(keys[starts], exchange)
+    return Bars(
+        np.array(index.as_unit("ns").asi8, dtype=np.int64),
+        values.astype(bars.values.dtype, copy=False),
+        bars.fields,
+        index.tz,
+    )
+
+
+def _buckets(
+    index: "pd.DatetimeIndex", timeframe: str, exchange: Exchange
+) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    # Bucket of every bar, and the first and last bar of each bucket
+    import numpy as np
+
+    if index.tz is None:
+        index = index.tz_localize(exchange.tz)
+    walls = _walls(index.tz_convert(exchange.tz))
+    keys = _bucket_walls(walls, timeframe, _anchor(exchange))
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(keys)] - 1
+    return keys, starts, ends
+
+
+def _aggregate(
+    values: "np.ndarray", fields: Sequence[str], starts, ends
+) -> "np.ndarray":
+    # Aggregate a fields x bars array into fields x buckets. Volume,
+    # dividends and splits add up over the bucket, the price fields are then
+    # taken from the first, last, highest and lowest bar
+    import numpy as np
+
+    values = values.astype(float, copy=False)
+    result = np.add.reduceat(np.nan_to_num(values), starts, axis=1)
+    for row, field in enumerate(fields):
+        if field == "Open":
+            result[row] = values[row, starts]
+        elif field == "High":
+            result[row] = np.fmax.reduceat(values[row], starts)
+        elif field == "Low":
+            result[row] = np.fmin.reduceat(values[row], starts)
+        elif field == "Close":
+            result[row] = values[row, ends]
+    return result
+
+
+def _anchor(exchange: Exchange) -> int:
+    # Intraday buckets start at the first session's open
+    opening = exchange.sessions[0][0]
+    return (opening.hour * 60 + opening.minute) * _MINUTE_NS
+
+
+def _walls(local: "pd.DatetimeIndex") -> "np.ndarray":
+    # Local wall-clock time as integer nanoseconds, whatever the index unit
+    return local.tz_localize(None).as_unit("ns").asi8
+
+
+def _bucket_walls(walls: "np.ndarray", timeframe: str, anchor: int) -> "np.ndarray":
+    import numpy as np
+
+    minutes = TIMEFRAME_MINUTES[timeframe]
+    days = walls // _DAY_NS
+    if minutes >= TIMEFRAME_MINUTES["1wk"]:
+        # 1970-01-01 was a Thursday, weekday 3
+        return (days - (days + 3) % 7) * _DAY_NS
+    if minutes >= TIMEFRAME_MINUTES["1d"]:
+        return days * _DAY_NS
+    step = minutes * _MINUTE_NS
+    since_open = walls - days * _DAY_NS - anchor
+    return days * _DAY_NS + anchor + np.floor_divide(since_open, step) * step
+
+
+def _bucket_index(walls: "np.ndarray", exchange: Exchange) -> "pd.DatetimeIndex":
+    # Bucket starts back to exchange timestamps; a start in a DST gap moves
+    # to the end of the gap
+    import numpy as np
+    import pandas as pd
+
+    return pd.DatetimeIndex(walls).tz_localize(
+        exchange.tz,
+        ambiguous=np.ones(len(walls), dtype=bool),
+        nonexistent="shift_forward",
+    )
+
+
+class _SymbolBars:
+    def __init__(self, exchange: Exchange):
+        self.exchange = exchange
+        self.base: Optional[Bars] = None
+        self.refreshed_at = 0.0
+        # Timeframe to aggregated bars, built on first use
+        self.frames: Dict[str, Bars] = {}
+        # Timeframe (the base interval too) to the buffer its bars were last
+        # refreshed in
+        self.buffers: Dict[str, BarBuffer] = {}
+
+
+class BarStore:
+    """
+    Base interval bars per symbol and the timeframes aggregated from them
+
+    Bars are kept in the compact form of services.bars: only the OHLCV
+    fields, in dtype, with the timestamps shared between symbols that have
+    the same bar times.
+
+    Args:
+        base_interval: The one interval that is downloaded
+        max_age: Seconds before a symbol's base bars are refreshed
+        dtype: float64, or float32 for half the memory at about seven
+            significant digits
+    """
+
+    def __init__(
+        self, base_interval: str = "5m", max_age: float = 60.0, dtype: str = "float64"
+    ):
+        validate_timeframe(base_interval, base_interval)
+        self.base_interval = base_interval
+        self.max_age = max_age
+        self.dtype = dtype
+        self.reach_days = INTERVAL_REACH_DAYS.get(base_interval)
+        self.time_index = TimeIndexPool()
+        self._symbols: Dict[str, _SymbolBars] = {}
+
+    def covers(self, timeframe: str, bars: int) -> bool:
+        """Whether the base interval reaches back far enough for bars bars"""
+        if TIMEFRAME_MINUTES[timeframe] < TIMEFRAME_MINUTES[self.base_interval]:
+            return False
+        if self.reach_days is None:
+            return True
+        # Leave a margin for holidays and half days
+        return bars <= 0.9 * bars_within(timeframe, self.reach_days)
+
+    def refresh_period(
+        self, symbol: str, now: Optional[datetime] = None
+    ) -> Optional[str]:
+        """
+        The period of base bars to download for symbol, or None while the
+        cached bars are fresh
+        """
+        state = self._symbols.get(symbol)
+        if state is not None and time.monotonic() - state.refreshed_at < self.max_age:
+            return None
+        if state is None or state.base is None or not len(state.base):
+            return self._initial_period()
+
+        now = now or datetime.now(timezone.utc)
+        last = state.base[-1:].index()[0].to_pydatetime()
+        local_now = now.astimezone(state.exchange.tz)
+        if last.astimezone(state.exchange.tz).date() == local_now.date():
+            return "1d"
+        # Refetch from the last cached bar, which may have been partial
+        gap = now - last
+        if gap <= timedelta(days=4):
+            return "5d"
+        if gap <= timedelta(days=25) and self.reach_days != 7:
+            return "1mo"
+        return self._initial_period()
+
+    def merge(self, symbol: str, fresh: "pd.DataFrame") -> None:
+        """
+        Add downloaded base bars, replacing the cached bars they overlap,
+        and bring the aggregated timeframes up to date
+        """
+        import pandas as pd
+
+        state = self._symbols.get(symbol)
+        if state is None:
+            state = self._symbols[symbol] = _SymbolBars(exchange_for(symbol))
+        state.refreshed_at = time.monotonic()
+        if fresh.empty:
+            return
+
+        new = Bars.from_frame(fresh, FIELDS, self.dtype)
+        base = state.base
+        if base is None or not len(base) or base.fields != new.fields:
+            state.base = self._interned(new)
+            state.frames.clear()
+            state.buffers.clear()
+            return
+        # Only the new bars are written; the history stays where it is
+        first = fresh.index[0]
+        buffer = self._buffer(state, self.base_interval, base)
+        base = buffer.replace(base.searchsorted(first), new)
+        if self.reach_days is not None:
+            cutoff = fresh.index[-1] - pd.Timedelta(days=self.reach_days)
+            base = buffer.drop(base.searchsorted(cutoff))
+        state.base = base
+
+        # Only the buckets from the one containing the first new bar change;
+        # older aggregated bars are kept even after their base bars are gone
+        for timeframe, bars in state.frames.items():
+            start = bucket_start(first, timeframe, state.exchange)
+            tail = resample_bars(
+                base[base.searchsorted(start) :], timeframe, state.exchange
+            )
+            state.frames[timeframe] = self._buffer(state, timeframe, bars).replace(
+                bars.searchsorted(start), tail
+            )
+
+    def _buffer(self, state: _SymbolBars, timeframe: str, bars: Bars) -> BarBuffer:
+        # The buffer holding bars, or a new one when they were replaced by
+        # a full download, built by bars() or restored from a snapshot
+        buffer = state.buffers.get(timeframe)
+        if buffer is None or buffer.bars is not bars:
+            buffer = state.buffers[timeframe] = BarBuffer(bars, self.time_index)
+        return buffer
+
+    def bars(self, symbol: str, timeframe: str) -> Optional[Bars]:
+        """Cached bars of timeframe for symbol, None before the first merge"""
+        state = self._symbols.get(symbol)
+        if state is None or state.base is None:
+            return None
+        if timeframe == self.base_interval:
+            return state.base
+        validate_timeframe(timeframe, self.base_interval)
+        if timeframe not in state.frames:
+            state.frames[timeframe] = self._interned(
+                resample_bars(state.base, timeframe, state.exchange)
+            )
+        return state.frames[timeframe]
+
+    def snapshot(self) -> Section:
+        """
+        The cached bars of every symbol, with how long ago each was
+        refreshed; timestamp arrays shared between symbols are written once
+        """
+        now = time.monotonic()
+        times: Dict[int, int] = {}
+        timestamps = []
+        values = []
+        offset = 0
+        entries = []
+        for symbol, state in self._symbols.items():
+            frames = dict(state.frames)
+            if state.base is not None:
+                frames[self.base_interval] = state.base
+            for timeframe, bars in frames.items():
+                if id(bars.timestamps) not in times:
+                    times[id(bars.timestamps)] = len(timestamps)
+                    timestamps.append(bars.timestamps)
+                tz = None if bars.tz is None else str(bars.tz)
+                entries.append(
+                    [
+                        symbol,
+                        timeframe,
+                        list(bars.fields),
+                        tz,
+                        times[id(bars.timestamps)],
+                        offset,
+                    ]
+                )
+                values.append(bars.values.astype(self.dtype, copy=False))
+                offset += bars.values.size
+        return Section(
+            {
+                "base_interval": self.base_interval,
+                "dtype": self.dtype,
+                "saved_at": time.time(),
+                "ages": {
+                    symbol: now - state.refreshed_at
+                    for symbol, state in self._symbols.items()
+                },
+                "times": [len(array) for array in timestamps],
+                "bars": entries,
+            },
+            {"timestamps": timestamps, "values": values},
+        )
+
+    def restore(self, section: Section) -> int:
+        """
+        Load bars from snapshot() in place of the cached ones; the arrays
+        are used as they are, mapped from the snapshot file. Returns the
+        number of symbols, 0 for a snapshot of another base interval or dtype
+        """
+        import numpy as np
+
+        state = section.state
+        if state["base_interval"] != self.base_interval or state["dtype"] != self.dtype:
+            return 0
+        ends = np.cumsum(state["times"], dtype=np.int64)
+        timestamps = [
+            section.arrays["timestamps"][end - length : end]
+            for length, end in zip(state["times"], ends.tolist())
+        ]
+        values = section.arrays["values"]
+        elapsed = max(0.0, time.time() - state["saved_at"])
+        now = time.monotonic()
+        symbols: Dict[str, _SymbolBars] = {}
+        for symbol, age in state["ages"].items():
+            symbols[symbol] = _SymbolBars(exchange_for(symbol))
+            symbols[symbol].refreshed_at = now - age - elapsed
+        for symbol, timeframe, fields, tz, times, offset in state["bars"]:
+            shared = self.time_index.intern(timestamps[times], tz)
+            block = values[offset : offset + len(fields) * len(shared)]
+            bars = Bars(shared, block.reshape(len(fields), len(shared)), fields, tz)
+            if timeframe == self.base_interval:
+                symbols[symbol].base = bars
+            else:
+                symbols[symbol].frames[timeframe] = bars
+        self._symbols = symbols
+        return len(symbols)
+
+    def _interned(self, bars: Bars) -> Bars:
+        # Bars sharing an equal timestamp array of another symbol
+        timestamps = self.time_index.intern(bars.timestamps, bars.tz)
+        return Bars(timestamps, bars.values, bars.fields, bars.tz)
+
+    def _initial_period(self) -> str:
+        if self.reach_days is not None:
+            return f"{self.reach_days}d"
+        return "10y" if self.base_interval == "1wk" else "2y"
@@ -0,0 +1,75 @@
+import os
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from db.buffer import AlertWriteBuffer
+from db.rows import AlertRow
+from db.sqlite import SQLiteDB
+
+COOLDOWN = timedelta(hours=24)
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = SQLiteDB(str(tmp_path / "alerts.db"))
+    db.setup_database()
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def seoul_time(monkeypatch):
+    """Local time ahead of UTC, as on the bot's host"""
+    monkeypatch.setenv("TZ", "Asia/Seoul")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_rule_alert_does_not_block_signal_alert(db):
+    assert db.claim_alert("AAPL", "RULE#1", 100.0, COOLDOWN, by_type=True)
+    assert not db.check_duplicate_alert("AAPL")
+    assert db.claim_alert("AAPL", "BUY", 100.0, COOLDOWN)
+
+
+def test_signal_alert_does_not_block_rule_alert(db):
+    assert db.claim_alert("AAPL", "BUY", 100.0, COOLDOWN)
+    assert db.claim_alert("AAPL", "RULE#1", 100.0, COOLDOWN, by_type=True)
+
+
+def test_signal_cooldown_covers_buy_and_sell(db):
+    assert db.claim_alert("AAPL", "BUY", 100.0, COOLDOWN)
+    assert db.check_duplicate_alert("AAPL")
+    assert not db.claim_alert("AAPL", "SELL", 100.0, COOLDOWN)
+    assert db.claim_alert("MSFT", "SELL", 100.0, COOLDOWN)
+
+
+def test_rule_cooldown_is_per_rule(db):
+    assert db.claim_alert("AAPL", "RULE#1", 100.0, COOLDOWN, by_type=True)
+    assert not db.claim_alert("AAPL", "RULE#1", 100.0, COOLDOWN, by_type=True)
+    assert db.claim_alert("AAPL", "RULE#2", 100.0, COOLDOWN, by_type=True)
+
+
+def test_buffered_rule_alert_does_not_block_signal_alert(db):
+    buffer = AlertWriteBuffer(db, max_items=100, max_delay=60.0)
+    assert buffer.claim_alert("AAPL", "RULE#1", 100.0, by_type=True)
+    assert not buffer.check_duplicate_alert("AAPL")
+    assert buffer.claim_alert("AAPL", "BUY", 100.0)
+    assert not buffer.claim_alert("AAPL", "SELL", 100.0)
+    buffer.close()
+    assert db.check_duplicate_alert("AAPL")
+    assert db.check_duplicate_alert("AAPL", "RULE#1")
+
+
+def test_duplicate_window_is_in_local_time(db, seoul_time):
+    db.add_alerts(
+        [AlertRow(None, "AAPL", "BUY", 100.0, datetime.now() - timedelta(hours=25))]
+    )
+    assert not db.check_duplicate_alert("AAPL")
+    db.add_alerts(
+        [AlertRow(None, "AAPL", "BUY", 100.0, datetime.now() - timedelta(hours=23))]
+    )
+    assert db.check_duplicate_alert("AAPL")
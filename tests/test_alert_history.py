@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from db.models import AlertCursor
+from db.rows import AlertRow
+from db.sqlite import SQLiteDB
+
+NOW = datetime(2026, 3, 20, 12, 0)
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = SQLiteDB(str(tmp_path / "alerts.db"))
+    db.setup_database()
+    # One alert in the hot week, one earlier this month and one last month
+    db.add_alerts(
+        [
+            AlertRow(None, "AAPL", "BUY", 100.0, NOW - timedelta(days=40)),
+            AlertRow(None, "AAPL", "SELL", 110.0, NOW - timedelta(days=10)),
+            AlertRow(None, "MSFT", "BUY", 200.0, NOW - timedelta(days=1)),
+        ]
+    )
+    yield db
+    db.close()
+
+
+def test_history_reads_archived_alerts(db):
+    before = [alert.id for alert in db.iter_alerts()]
+    report = db.apply_retention(hot_days=7, retention_days=90, now=NOW)
+
+    assert report.archived_rows == 2
+    assert [alert.id for alert in db.iter_alerts()] == before
+    assert [alert.alert_type for alert in db.iter_alerts(symbol="AAPL")] == [
+        "SELL",
+        "BUY",
+    ]
+
+
+def test_history_since_skips_older_archives(db):
+    db.apply_retention(hot_days=7, retention_days=90, now=NOW)
+
+    since = NOW - timedelta(days=15)
+    assert [alert.symbol for alert in db.iter_alerts(since=since)] == [
+        "MSFT",
+        "AAPL",
+    ]
+    assert db._alert_tables(since) == ["alert_history", "alert_history_archive_202603"]
+
+
+def test_alert_pages_span_archives(db):
+    db.apply_retention(hot_days=7, retention_days=90, now=NOW)
+
+    first = db.get_alert_page(limit=2)
+    second = db.get_alert_page(limit=2, cursor=first.next_cursor)
+    assert [alert.symbol for alert in first.alerts] == ["MSFT", "AAPL"]
+    assert [alert.price for alert in second.alerts] == [100.0]
+    assert second.next_cursor is None
+
+
+def test_archives_have_the_alert_history_indexes(db):
+    db.apply_retention(hot_days=7, retention_days=90, now=NOW)
+
+    def indexes(table):
+        with db.transaction() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ?",
+                (table,),
+            )
+            return sorted(row["name"].replace(table, "") for row in cursor)
+
+    assert indexes("alert_history_archive_202602") == indexes("alert_history")
+    assert len(indexes("alert_history")) == 3
+
+
+def test_history_reads_only_archives_in_range(db):
+    db.apply_retention(hot_days=7, retention_days=90, now=NOW)
+
+    assert db._alert_tables(until=datetime(2026, 3, 1)) == [
+        "alert_history",
+        "alert_history_archive_202602",
+    ]
+    # Past the cursor lie only older months
+    cursor = AlertCursor(timestamp=NOW - timedelta(days=40), id=1)
+    assert db._alert_tables(cursor=cursor) == [
+        "alert_history",
+        "alert_history_archive_202602",
+    ]
+    assert [alert.price for alert in db.iter_alerts(until=NOW)] == [
+        200.0,
+        110.0,
+        100.0,
+    ]
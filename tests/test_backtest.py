@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.backtest import backtest
+from services.rules import RuleSyntaxError
+
+RSI_WINDOW = 5
+LENGTHS = {"LONG": 400, "MID": 250, "SHORT": 30}
+
+
+def _frames():
+    rng = np.random.default_rng(11)
+    return {
+        symbol: pd.DataFrame(
+            {"Close": 100 * np.exp(np.cumsum(rng.normal(0, 0.02, length)))}
+        )
+        for symbol, length in LENGTHS.items()
+    }
+
+
+def _rsi(close):
+    delta = close.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=RSI_WINDOW).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=RSI_WINDOW).mean()
+    return 100 - (100 / (1 + gain / loss))
+
+
+def _reference(close, entry, exit, hold, cost, periods_per_year=252):
+    """One symbol, one bar at a time"""
+    close = close.to_numpy()
+    entry = entry.to_numpy()
+    exit = None if exit is None else exit.to_numpy()
+    equity = peak = 1.0
+    drawdown = 0.0
+    in_market = False
+    left = 0
+    held_before = False
+    held_bars = 0
+    trades = []
+    for t in range(len(close)):
+        # A position taken at the close of bar t - 1 earns bar t's return
+        held = in_market
+        if held and not held_before:
+            opened_at = equity
+            equity *= 1 - cost
+        if held_before and not held:
+            equity *= 1 - cost
+            trades.append(equity / opened_at - 1)
+        if held:
+            equity *= close[t] / close[t - 1]
+            held_bars += 1
+        peak = max(peak, equity)
+        drawdown = min(drawdown, equity / peak - 1)
+        held_before = held
+
+        if exit is None:
+            left = hold if entry[t] else left - 1
+            in_market = left > 0
+        elif entry[t]:
+            in_market = True
+        elif exit[t]:
+            in_market = False
+    if held_before:
+        trades.append(equity / opened_at - 1)
+
+    alerts = int(entry[0]) + int(np.sum(entry[1:] & ~entry[:-1]))
+    return {
+        "trades": len(trades),
+        "hit_rate": np.mean([r > 0 for r in trades]) if trades else np.nan,
+        "total_return": equity - 1,
+        "buy_hold_return": close[-1] / close[0] - 1,
+        "max_drawdown": drawdown,
+        "exposure": held_bars / len(close),
+        "alerts_per_year": alerts / (len(close) / periods_per_year),
+    }
+
+
+@pytest.mark.parametrize(
+    "exit, hold, cost",
+    [(True, 5, 0.0), (True, 5, 0.001), (False, 3, 0.0), (False, 3, 0.002)],
+)
+def test_matches_bar_by_bar_reference(exit, hold, cost):
+    frames = _frames()
+    report = backtest(
+        frames,
+        entry=f"RSI({RSI_WINDOW}) < 30",
+        exit=f"RSI({RSI_WINDOW}) > 70" if exit else None,
+        hold=hold,
+        cost=cost,
+    )
+
+    for symbol, frame in frames.items():
+        rsi = _rsi(frame["Close"])
+        expected = _reference(
+            frame["Close"], rsi < 30, rsi > 70 if exit else None, hold, cost
+        )
+        row = report.by_symbol.loc[symbol]
+        assert expected["trades"] > 0
+        for column, value in expected.items():
+            assert row[column] == pytest.approx(value, rel=1e-9, nan_ok=True), (
+                symbol,
+                column,
+            )
+    assert report.trades == int(report.by_symbol["trades"].sum())
+
+
+def test_rejects_invalid_rules():
+    with pytest.raises(RuleSyntaxError):
+        backtest(_frames(), entry="RSI <")
+    with pytest.raises(ValueError):
+        backtest(_frames(), exit=None, hold=0)
@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from utils.fetch_scheduler import CircuitOpenError, FetchScheduler
+
+HOST = "example.com"
+
+
+def _scheduler(cool_off: float) -> FetchScheduler:
+    return FetchScheduler(
+        max_attempts=1, backoff_base=0.0, failure_threshold=1, cool_off=cool_off
+    )
+
+
+async def _fail():
+    raise ConnectionError("down")
+
+
+async def _ok():
+    return "ok"
+
+
+async def _open(fetcher: FetchScheduler) -> None:
+    with pytest.raises(ConnectionError):
+        await fetcher.submit(HOST, _fail)
+    assert fetcher._host(HOST).breaker.is_open
+
+
+def test_open_circuit_rejects_calls():
+    async def scenario():
+        fetcher = _scheduler(cool_off=60.0)
+        await _open(fetcher)
+        with pytest.raises(CircuitOpenError):
+            await fetcher.submit(HOST, _ok)
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_trial_lets_the_next_call_probe():
+    async def scenario():
+        fetcher = _scheduler(cool_off=0.0)
+        await _open(fetcher)
+        started = asyncio.Event()
+
+        async def hang():
+            started.set()
+            await asyncio.sleep(3600)
+
+        trial = asyncio.create_task(fetcher.submit(HOST, hang))
+        await started.wait()
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+
+        assert await fetcher.submit(HOST, _ok) == "ok"
+        assert not fetcher._host(HOST).breaker.is_open
+
+    asyncio.run(scenario())
+
+
+def test_failed_trial_reopens_the_circuit():
+    async def scenario():
+        fetcher = _scheduler(cool_off=0.0)
+        await _open(fetcher)
+        with pytest.raises(ConnectionError):
+            await fetcher.submit(HOST, _fail)
+        assert fetcher._host(HOST).breaker.is_open
+
+    asyncio.run(scenario())
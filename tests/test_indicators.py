@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services import indicators
+
+# Random walks of different lengths, padded with NaN at the start into one
+# bars x symbols panel like rules.build_panel does
+LENGTHS = (300, 120, 40, 10)
+BARS = max(LENGTHS)
+
+
+def _series():
+    rng = np.random.default_rng(7)
+    return [100 + np.cumsum(rng.normal(0, 1, length)) for length in LENGTHS]
+
+
+def _panel(series):
+    panel = np.full((BARS, len(series)), np.nan)
+    for column, values in enumerate(series):
+        panel[BARS - len(values) :, column] = values
+    return panel
+
+
+def _padded(values):
+    return np.concatenate([np.full(BARS - len(values), np.nan), values])
+
+
+# The pandas formulas the kernels replaced
+def pandas_sma(close, window):
+    return close.rolling(window=window).mean()
+
+
+def pandas_ema(close, span):
+    return close.ewm(span=span, adjust=False).mean()
+
+
+def pandas_rsi(close, window):
+    delta = close.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=window).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=window).mean()
+    return 100 - (100 / (1 + gain / loss))
+
+
+def pandas_macd(close):
+    macd = pandas_ema(close, 12) - pandas_ema(close, 26)
+    return macd, pandas_ema(macd, 9)
+
+
+def _check_panel(kernel, reference):
+    # Each column of the panel result is the pandas result on the unpadded
+    # series, NaN where the series has no value yet
+    series = _series()
+    result = kernel(_panel(series))
+    for column, values in enumerate(series):
+        expected = _padded(reference(pd.Series(values)).to_numpy())
+        np.testing.assert_allclose(result[:, column], expected, rtol=1e-9)
+
+
+@pytest.mark.parametrize("window", [1, 5, 20])
+def test_sma_matches_pandas(window):
+    _check_panel(
+        lambda panel: indicators.sma(panel, window),
+        lambda close: pandas_sma(close, window),
+    )
+
+
+@pytest.mark.parametrize("span", [2, 12, 26])
+def test_ema_matches_pandas(span):
+    _check_panel(
+        lambda panel: indicators.ema(panel, span),
+        lambda close: pandas_ema(close, span),
+    )
+
+
+@pytest.mark.parametrize("window", [2, 14])
+def test_rsi_matches_pandas(window):
+    def reference(close):
+        values = pandas_rsi(close, window)
+        # The kernel leaves out values before a full window of closes
+        values[: window - 1] = np.nan
+        return values
+
+    _check_panel(lambda panel: indicators.rsi(panel, window), reference)
+
+
+@pytest.mark.parametrize("line", [0, 1])
+def test_macd_matches_pandas(line):
+    _check_panel(
+        lambda panel: indicators.macd(panel)[line],
+        lambda close: pandas_macd(close)[line],
+    )
+
+
+def test_one_series_matches_its_panel_column():
+    values = _series()[0]
+    np.testing.assert_array_equal(
+        indicators.rsi(values), indicators.rsi(_panel([values]))[:, 0]
+    )
+
+
+def test_sma_window_with_a_gap_is_nan():
+    values = np.arange(10.0)
+    values[4] = np.nan
+    result = indicators.sma(values, 3)
+    assert np.isnan(result[4:7]).all()
+    assert result[7] == pytest.approx(6.0)
+
+
+def test_kernels_leave_inputs_and_fill_out():
+    panel = _panel(_series())
+    before = panel.copy()
+    out = np.empty(panel.shape)
+    result = indicators.ema(panel, 12, out=out)
+    np.testing.assert_array_equal(result, out)
+    assert np.shares_memory(result, out)
+    np.testing.assert_array_equal(panel, before)
+    with pytest.raises(ValueError):
+        indicators.sma(panel, 5, out=np.empty(3))
@@ -0,0 +1,88 @@
+import asyncio
+
+import pandas as pd
+import pytest
+import yfinance
+from yfinance.exceptions import YFPricesMissingError, YFRateLimitError
+
+from services.market_data import YFinanceProvider
+from services.stock_service import StockService
+from utils.fetch_scheduler import CircuitOpenError, FetchScheduler
+
+
+class _Ticker:
+    """Stands in for yfinance.Ticker; history() raises error"""
+
+    error: Exception = None
+    calls = 0
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+
+    def history(self, **kwargs):
+        type(self).calls += 1
+        raise self.error
+
+
+class _UnknownTicker(_Ticker):
+    error = YFPricesMissingError("TYPO", "")
+
+
+class _ThrottledTicker(_Ticker):
+    error = YFRateLimitError()
+
+
+def _scheduler() -> FetchScheduler:
+    return FetchScheduler(
+        max_attempts=2, backoff_base=0.0, backoff_max=0.0, failure_threshold=2
+    )
+
+
+def _fetch(fetcher: FetchScheduler, provider: YFinanceProvider, symbol: str):
+    async def fetch():
+        return await fetcher.submit(provider.host, provider.history, symbol)
+
+    return asyncio.run(fetch())
+
+
+def test_unknown_symbols_do_not_open_the_circuit(monkeypatch):
+    monkeypatch.setattr(yfinance, "Ticker", _UnknownTicker)
+    provider = YFinanceProvider()
+    fetcher = _scheduler()
+
+    for _ in range(3):
+        assert _fetch(fetcher, provider, "TYPO").empty
+    # Answered at the first attempt, without retries or breaker failures
+    assert _UnknownTicker.calls == 3
+    assert fetcher.is_available(provider.host)
+
+
+def test_throttling_opens_the_circuit(monkeypatch):
+    monkeypatch.setattr(yfinance, "Ticker", _ThrottledTicker)
+    provider = YFinanceProvider()
+    fetcher = _scheduler()
+
+    with pytest.raises(YFRateLimitError):
+        _fetch(fetcher, provider, "AAPL")
+    assert not fetcher.is_available(provider.host)
+    with pytest.raises(CircuitOpenError):
+        _fetch(fetcher, provider, "AAPL")
+
+
+def test_unknown_quotes_are_cached(monkeypatch):
+    downloads = []
+
+    def download(symbols, **kwargs):
+        downloads.append(symbols)
+        return pd.DataFrame()
+
+    monkeypatch.setattr(yfinance, "download", download)
+    service = StockService(fetcher=_scheduler())
+
+    async def lookups():
+        for _ in range(2):
+            quotes = await service.fetch_quotes(["TYPO"])
+            assert quotes.loc["TYPO"].isna().all()
+
+    asyncio.run(lookups())
+    assert downloads == [["TYPO"]]
@@ -0,0 +1,109 @@
+import asyncio
+
+import playwright.async_api
+import pytest
+
+from services.news_service import NewsService
+
+HTML = "<html><head><title>Headline</title></head><body><p>Text</p></body></html>"
+
+
+class _Page:
+    def __init__(self):
+        self.url = None
+
+    async def goto(self, url, timeout):
+        self.url = url
+
+    async def wait_for_load_state(self, state, timeout):
+        pass
+
+    async def content(self):
+        return HTML
+
+
+class _Context:
+    def __init__(self):
+        self.closed = False
+
+    async def new_page(self):
+        return _Page()
+
+    async def close(self):
+        self.closed = True
+
+
+class _Browser:
+    def __init__(self):
+        self.contexts = []
+        self.connected = True
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_context(self, locale):
+        self.contexts.append(_Context())
+        return self.contexts[-1]
+
+    async def close(self):
+        self.connected = False
+
+
+class _Playwright:
+    """Stands in for async_playwright(); records the browsers launched"""
+
+    def __init__(self):
+        self.browsers = []
+        self.stopped = False
+        self.chromium = self
+
+    def __call__(self):
+        return self
+
+    async def start(self):
+        return self
+
+    async def launch(self, headless):
+        self.browsers.append(_Browser())
+        return self.browsers[-1]
+
+    async def stop(self):
+        self.stopped = True
+
+
+@pytest.fixture
+def fake_playwright(monkeypatch):
+    fake = _Playwright()
+    monkeypatch.setattr(playwright.async_api, "async_playwright", fake)
+    return fake
+
+
+@pytest.fixture
+def service(tmp_path):
+    return NewsService(cache_file=str(tmp_path / "returned_news.txt"))
+
+
+def test_extractions_share_the_warmed_up_browser(fake_playwright, service):
+    async def run():
+        await service.warm_up()
+        for url in ("https://a.example/1", "https://a.example/2"):
+            assert (await service.extract_article(url))[2] == url
+        await service.close()
+
+    asyncio.run(run())
+    [browser] = fake_playwright.browsers
+    # Each article had a context of its own, closed after it
+    assert [context.closed for context in browser.contexts] == [True, True]
+    assert not browser.connected
+    assert fake_playwright.stopped
+
+
+def test_disconnected_browser_is_relaunched(fake_playwright, service):
+    async def run():
+        await service.extract_article("https://a.example/1")
+        fake_playwright.browsers[0].connected = False
+        await service.extract_article("https://a.example/2")
+        await service.close()
+
+    asyncio.run(run())
+    assert len(fake_playwright.browsers) == 2
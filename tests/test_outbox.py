@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+from telegram.error import Forbidden, TimedOut
+
+from bot.outbox import MESSAGE_LIMIT, TelegramOutbox
+
+CHAT_ID = 1
+
+
+class _Bot:
+    """Stands in for telegram.Bot; send_message raises the queued errors"""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.texts = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.texts.append(text)
+
+
+@pytest.fixture
+def outbox():
+    return TelegramOutbox(global_rate=1000, chat_rate=1000, chat_burst=1000)
+
+
+def test_failed_messages_are_sent_by_the_next_flush(outbox):
+    bot = _Bot(TimedOut())
+    outbox.add_message(CHAT_ID, "first")
+    asyncio.run(outbox.flush(bot))
+    assert bot.texts == [] and outbox.pending() == 1
+
+    outbox.add_message(CHAT_ID, "second")
+    asyncio.run(outbox.flush(bot))
+    assert bot.texts == ["first\n\nsecond"]
+    assert outbox.pending() == 0
+
+
+def test_messages_are_dropped_after_max_resends():
+    outbox = TelegramOutbox(chat_burst=10, max_resends=1)
+    bot = _Bot(TimedOut(), TimedOut())
+    outbox.add_message(CHAT_ID, "text")
+    for _ in range(2):
+        asyncio.run(outbox.flush(bot))
+    assert outbox.pending() == 0
+
+
+def test_rejected_messages_are_not_resent(outbox):
+    bot = _Bot(Forbidden("bot was blocked by the user"))
+    outbox.add_message(CHAT_ID, "text")
+    asyncio.run(outbox.flush(bot))
+    assert outbox.pending() == 0
+
+
+def test_digests_fit_one_telegram_message(outbox):
+    bot = _Bot()
+    line = "x" * 99 + "\n"
+    texts = ["short", line * 100, "y" * (MESSAGE_LIMIT + 10), "last"]
+    for text in texts:
+        outbox.add_message(CHAT_ID, text, alert_type="NEWS")
+    asyncio.run(outbox.flush(bot))
+
+    assert all(len(text) <= MESSAGE_LIMIT for text in bot.texts)
+    # Long messages were cut at line breaks where there were any
+    assert "".join(bot.texts).replace("\n", "") == "".join(texts).replace("\n", "")
+    lines = "\n".join(bot.texts).split("\n")
+    assert {len(line) for line in lines if "x" in line} == {99}
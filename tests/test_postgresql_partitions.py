@@ -0,0 +1,82 @@
+import os
+from datetime import date, datetime
+
+import pytest
+
+from db.postgresql import PostgreSQLDB
+from db.retention import PARTITION_PREFIX, month_table
+from db.rows import AlertRow
+
+# A scratch database to run against, e.g. "dbname=alerts_test user=postgres"
+DSN = os.environ.get("TEST_POSTGRES_DSN")
+MARCH = month_table(PARTITION_PREFIX, date(2026, 3, 1))
+APRIL = month_table(PARTITION_PREFIX, date(2026, 4, 1))
+
+
+class _Cursor:
+    """Records statements; answers the partition and default-row lookups"""
+
+    def __init__(self, existing=(), default_rows=()):
+        self.existing = set(existing)
+        self.default_rows = set(default_rows)
+        self.statements = []
+        self._row = None
+
+    def execute(self, sql, params=()):
+        sql = " ".join(sql.split())
+        self.statements.append(sql)
+        if sql.startswith("SELECT to_regclass"):
+            self._row = {"found": params[0] in self.existing}
+        elif sql.startswith("SELECT 1 FROM alert_history_default"):
+            self._row = {"?column?": 1} if params[0] in self.default_rows else None
+
+    def fetchone(self):
+        return self._row
+
+
+def test_partitions_are_created_for_missing_months():
+    cursor = _Cursor(existing={MARCH})
+    PostgreSQLDB._ensure_partitions(cursor, date(2026, 3, 1), date(2026, 4, 1))
+    created = [sql for sql in cursor.statements if sql.startswith("CREATE")]
+    assert created == [
+        f"CREATE TABLE {APRIL} PARTITION OF alert_history "
+        "FOR VALUES FROM (%s) TO (%s)"
+    ]
+
+
+def test_rows_in_the_default_partition_are_moved_first():
+    cursor = _Cursor(default_rows={date(2026, 4, 1)})
+    PostgreSQLDB._ensure_partitions(cursor, date(2026, 4, 1), date(2026, 4, 1))
+    changes = [sql for sql in cursor.statements if not sql.startswith("SELECT")]
+    assert changes[0].startswith(f"CREATE TABLE {APRIL} (LIKE")
+    assert "DELETE FROM alert_history_default" in changes[1]
+    assert f"INSERT INTO {APRIL}" in changes[1]
+    assert changes[2].startswith(f"ALTER TABLE alert_history ATTACH PARTITION {APRIL}")
+    assert len(changes) == 3
+
+
+@pytest.mark.skipif(DSN is None, reason="TEST_POSTGRES_DSN is not set")
+def test_partition_setup_after_rows_landed_in_default():
+    db = PostgreSQLDB({"dsn": DSN})
+    try:
+        with db.transaction() as cursor:
+            cursor.execute("DROP TABLE IF EXISTS alert_history CASCADE")
+        db.setup_database()
+        # Beyond the partitions created ahead, so it lands in the default
+        later = datetime(2099, 5, 10, 12, 0)
+        db.add_alerts([AlertRow(None, "AAPL", "BUY", 100.0, later)])
+
+        db.apply_retention(hot_days=7, retention_days=90, now=later)
+        db.setup_database()
+
+        with db.transaction() as cursor:
+            cursor.execute("SELECT COUNT(*) AS count FROM alert_history_default")
+            assert cursor.fetchone()["count"] == 0
+            may = month_table(PARTITION_PREFIX, date(2099, 5, 1))
+            cursor.execute(f"SELECT COUNT(*) AS count FROM {may}")
+            assert cursor.fetchone()["count"] == 1
+        assert [alert.timestamp for alert in db.iter_alerts()] == [later]
+    finally:
+        with db.transaction() as cursor:
+            cursor.execute("DROP TABLE IF EXISTS alert_history CASCADE")
+        db.close()
@@ -0,0 +1,83 @@
+import pandas as pd
+import pytest
+
+from services.rules import ExpressionPool, RuleSet, RuleSyntaxError, lookback
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "RSI(14) < 25 AND close > SMA(200)",
+        "MACD CROSSES ABOVE SIGNAL",
+        "not rsi < 30",
+        "(close - SMA(20)) / SMA(20) > 0.05",
+        "SMA(20, volume) > volume * 2",
+        "close > open OR -close < -100",
+    ],
+)
+def test_parse_accepts(text):
+    assert ExpressionPool().parse(text).kind == "boolean"
+
+
+@pytest.mark.parametrize(
+    "text, message",
+    [
+        ("", "Empty rule"),
+        ("RSI", "must be a comparison"),
+        ("30 < 40", "must compare a price series"),
+        ("SMA(0) < close", "whole numbers from 1 to 1000"),
+        ("SMA(1.5) < close", "whole numbers from 1 to 1000"),
+        ("SMA(20, 5) < close", "averages a series"),
+        ("RSI(14, 2) < 30", "RSI takes no arguments or 1 window"),
+        ("close >", "ends unexpectedly"),
+        ("close < 3 AND", "ends unexpectedly"),
+        ("close < 3)", r"Unexpected '\)'"),
+        ("price < 3", "Unexpected 'PRICE'"),
+        ("close ; 1", "Unexpected character"),
+        ("close < " + "1" * 300, "longer than 256 characters"),
+    ],
+)
+def test_parse_rejects(text, message):
+    with pytest.raises(RuleSyntaxError, match=message):
+        ExpressionPool().parse(text)
+
+
+@pytest.mark.parametrize(
+    "text, bars",
+    [
+        ("close > open", 1),
+        ("close > SMA(200)", 200),
+        ("RSI < 30", 15),
+        ("RSI(14) < 25 AND close > SMA(200)", 200),
+        ("close > EMA(10)", 31),
+        ("MACD > 0", 79),
+        ("MACD CROSSES ABOVE SIGNAL", 107),
+        ("SMA(5, SMA(10)) < close", 14),
+    ],
+)
+def test_lookback(text, bars):
+    assert lookback(ExpressionPool().parse(text)) == bars
+
+
+def test_equal_subexpressions_are_interned():
+    pool = ExpressionPool()
+    first = pool.parse("close > SMA(200)")
+    second = pool.parse("sma(200) < CLOSE AND RSI < 30")
+    assert first.args[1] is second.args[0].args[0]
+
+
+def test_ruleset_keeps_invalid_rules_out():
+    rules = RuleSet([(1, "close > SMA(2)"), (2, "close >")])
+    assert set(rules.roots) == {1}
+    assert rules.invalid == {2: "Rule ends unexpectedly"}
+    assert rules.lookbacks == {1: 2}
+
+
+def test_ruleset_evaluates_latest_bar():
+    panel = {
+        "Close": pd.DataFrame(
+            {"UP": [1.0, 2.0, 3.0], "DOWN": [3.0, 2.0, 1.0], "NEW": [None, None, 5.0]}
+        )
+    }
+    results = RuleSet([(1, "close > SMA(2)")]).evaluate(panel)
+    assert results[1].to_dict() == {"UP": True, "DOWN": False, "NEW": False}
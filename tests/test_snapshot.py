@@ -0,0 +1,138 @@
+import os
+import struct
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.timeframes import BarStore
+from utils import snapshot
+from utils.snapshot import Section, SnapshotError, read_snapshot, write_snapshot
+
+
+def _frame(bars: int, start: float) -> pd.DataFrame:
+    index = pd.date_range(
+        "2026-03-02 14:30", periods=bars, freq="5min", tz="UTC", name="Datetime"
+    )
+    close = start + np.arange(bars, dtype=float)
+    return pd.DataFrame(
+        {
+            "Open": close,
+            "High": close + 1,
+            "Low": close - 1,
+            "Close": close,
+            "Volume": np.full(bars, 1000.0),
+        },
+        index=index,
+    )
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "state.snapshot")
+
+
+def test_round_trip(path):
+    parts = [np.arange(3, dtype=np.int64), np.arange(10, 12, dtype=np.int64)]
+    size = write_snapshot(
+        path,
+        {
+            "one": Section(
+                {"name": "one", "ages": {"AAPL": 1.5}},
+                {
+                    "matrix": np.arange(6, dtype=np.float32).reshape(2, 3),
+                    "parts": parts,
+                    "empty": np.empty(0),
+                },
+            ),
+            "two": Section({"flag": True}),
+        },
+    )
+    assert size == os.path.getsize(path)
+
+    sections = read_snapshot(path)
+    assert sections["one"].state == {"name": "one", "ages": {"AAPL": 1.5}}
+    assert sections["two"].state == {"flag": True}
+    assert sections["two"].arrays == {}
+    arrays = sections["one"].arrays
+    assert arrays["matrix"].dtype == np.float32
+    np.testing.assert_array_equal(arrays["matrix"], [[0, 1, 2], [3, 4, 5]])
+    np.testing.assert_array_equal(arrays["parts"], [0, 1, 2, 10, 11])
+    assert arrays["empty"].shape == (0,)
+    assert not arrays["matrix"].flags.writeable
+    # Arrays start at aligned offsets
+    for array in (arrays["matrix"], arrays["parts"]):
+        assert array.ctypes.data % snapshot.ALIGN == 0
+
+
+def test_rewrite_leaves_no_temporary_files(path):
+    write_snapshot(path, {"a": Section({"n": 1})})
+    mapped = read_snapshot(path)
+    write_snapshot(path, {"a": Section({"n": 2}, {"x": np.arange(4.0)})})
+    assert read_snapshot(path)["a"].state == {"n": 2}
+    assert mapped["a"].state == {"n": 1}
+    assert os.listdir(os.path.dirname(path)) == ["state.snapshot"]
+
+
+def test_rejects_other_version(path):
+    write_snapshot(path, {"a": Section({"n": 1})})
+    with open(path, "r+b") as f:
+        f.seek(len(snapshot.MAGIC))
+        f.write(struct.pack("<I", snapshot.VERSION + 1))
+    with pytest.raises(SnapshotError, match="format version"):
+        read_snapshot(path)
+
+
+def test_rejects_truncated_file(path):
+    write_snapshot(path, {"a": Section({}, {"x": np.arange(100.0)})})
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 8)
+    with pytest.raises(SnapshotError, match="truncated"):
+        read_snapshot(path)
+
+
+@pytest.mark.parametrize("content", [b"", b"not a snapshot at all"])
+def test_rejects_other_files(path, content):
+    with open(path, "wb") as f:
+        f.write(content)
+    with pytest.raises(SnapshotError, match="not a snapshot"):
+        read_snapshot(path)
+
+
+def test_missing_file(path):
+    with pytest.raises(FileNotFoundError):
+        read_snapshot(path)
+
+
+@pytest.mark.parametrize("dtype", ["float64", "float32"])
+def test_bar_store_round_trip(path, dtype):
+    store = BarStore("5m", max_age=3600, dtype=dtype)
+    store.merge("AAPL", _frame(100, 100.0))
+    store.merge("MSFT", _frame(100, 200.0))
+    store.merge("SPY", _frame(60, 300.0))
+    store.bars("AAPL", "1h")
+    write_snapshot(path, {"bars": store.snapshot()})
+
+    restored = BarStore("5m", max_age=3600, dtype=dtype)
+    assert restored.restore(read_snapshot(path)["bars"]) == 3
+    for symbol in ("AAPL", "MSFT", "SPY"):
+        pd.testing.assert_frame_equal(
+            restored.bars(symbol, "5m").to_frame(), store.bars(symbol, "5m").to_frame()
+        )
+        assert restored.refresh_period(symbol) is None
+    pd.testing.assert_frame_equal(
+        restored.bars("AAPL", "1h").to_frame(), store.bars("AAPL", "1h").to_frame()
+    )
+    # Symbols with the same bar times still share one timestamp array
+    assert (
+        restored.bars("AAPL", "5m").timestamps is restored.bars("MSFT", "5m").timestamps
+    )
+
+
+def test_bar_store_ignores_other_settings(path):
+    store = BarStore("5m")
+    store.merge("AAPL", _frame(10, 100.0))
+    write_snapshot(path, {"bars": store.snapshot()})
+    section = read_snapshot(path)["bars"]
+    assert BarStore("5m", dtype="float32").restore(section) == 0
+    assert BarStore("15m").restore(section) == 0
@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.bars import Bars
+from services.market_calendar import exchange_for
+from services.timeframes import BarStore, resample, resample_bars
+
+TIMEFRAMES = ("15m", "1h", "1d", "1wk")
+
+
+def _session_bars(days: int, seed: int = 0) -> pd.DataFrame:
+    """5m bars of the regular US session over days weekdays"""
+    index = pd.date_range("2026-01-05", periods=days * 7 // 5 * 288, freq="5min")
+    index = index[index.dayofweek < 5]
+    index = index[(index.time >= pd.Timestamp("09:30").time())]
+    index = index[(index.time <= pd.Timestamp("15:55").time())]
+    index = index.tz_localize("America/New_York")
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.1, len(index)))
+    return pd.DataFrame(
+        {
+            "Open": close + rng.normal(0, 0.05, len(index)),
+            "High": close + 0.2,
+            "Low": close - 0.2,
+            "Close": close,
+            "Volume": rng.integers(100, 1000, len(index)).astype(float),
+        },
+        index=index,
+    )
+
+
+def _store(history: pd.DataFrame, *symbols: str) -> BarStore:
+    store = BarStore("5m", max_age=3600)
+    for symbol in symbols:
+        store.merge(symbol, history)
+        for timeframe in TIMEFRAMES:
+            store.bars(symbol, timeframe)
+    return store
+
+
+def _assert_bars(bars: Bars, expected: pd.DataFrame) -> None:
+    frame = bars.to_frame()
+    assert frame.index.equals(expected.index)
+    np.testing.assert_allclose(frame.to_numpy(float), expected.to_numpy(float))
+
+
+def test_resample_bars_matches_resample():
+    frame = _session_bars(12)
+    exchange = exchange_for("AAPL")
+    for timeframe in TIMEFRAMES:
+        _assert_bars(
+            resample_bars(Bars.from_frame(frame), timeframe, exchange),
+            resample(frame, timeframe, exchange),
+        )
+
+
+def test_incremental_merges_match_a_full_rebuild():
+    frame = _session_bars(15)
+    exchange = exchange_for("AAPL")
+    store = _store(frame.iloc[:1000], "AAPL")
+    done = 1000
+    # Each refresh refetches the last, partial bar and adds some new ones,
+    # enough over time for the buffers to grow several times
+    for end in (1001, 1040, 1200, 1500, len(frame)):
+        store.merge("AAPL", frame.iloc[done - 1 : end])
+        done = end
+
+    _assert_bars(store.bars("AAPL", "5m"), frame)
+    for timeframe in TIMEFRAMES:
+        _assert_bars(
+            store.bars("AAPL", timeframe), resample(frame, timeframe, exchange)
+        )
+
+
+def test_merge_appends_without_changing_earlier_bars():
+    frame = _session_bars(10)
+    store = _store(frame.iloc[:-78], "AAPL")
+    store.merge("AAPL", frame.iloc[-78:-70])
+    before = store.bars("AAPL", "5m")
+    copy = before.to_frame().copy()
+
+    store.merge("AAPL", frame.iloc[-70:])
+    after = store.bars("AAPL", "5m")
+    assert len(after) == len(frame)
+    # The new bars went into spare room after the old ones
+    assert np.shares_memory(after.values, before.values)
+    pd.testing.assert_frame_equal(before.to_frame(), copy)
+
+
+def test_symbols_keep_sharing_timestamps_across_merges():
+    frame = _session_bars(10)
+    store = _store(frame.iloc[:-78], "AAPL", "MSFT")
+    assert store.bars("AAPL", "5m").timestamps is store.bars("MSFT", "5m").timestamps
+
+    for start, end in ((-78, -40), (-41, None)):
+        store.merge("AAPL", frame.iloc[start:end])
+        store.merge("MSFT", frame.iloc[start:end] * 2)
+        for timeframe in ("5m",) + TIMEFRAMES:
+            aapl = store.bars("AAPL", timeframe)
+            msft = store.bars("MSFT", timeframe)
+            assert aapl.timestamps is msft.timestamps
+    # Only the merged bars were doubled
+    np.testing.assert_allclose(
+        store.bars("MSFT", "5m").close[-78:], 2 * store.bars("AAPL", "5m").close[-78:]
+    )
+
+
+def test_other_bar_times_are_not_shared():
+    frame = _session_bars(10)
+    store = _store(frame.iloc[:-78], "AAPL", "MSFT")
+    store.merge("AAPL", frame.iloc[-78:])
+    # MSFT misses a bar in the middle of the day
+    store.merge("MSFT", frame.iloc[-78:].drop(frame.index[-40]))
+
+    aapl, msft = store.bars("AAPL", "5m"), store.bars("MSFT", "5m")
+    assert len(msft) == len(aapl) - 1
+    assert frame.index[-40].value not in msft.timestamps
+    _assert_bars(aapl, frame)
+
+
+@pytest.mark.parametrize("dtype", ["float64", "float32"])
+def test_merge_after_full_download_starts_over(dtype):
+    frame = _session_bars(5)
+    store = BarStore("5m", max_age=3600, dtype=dtype)
+    store.merge("AAPL", frame.iloc[:200])
+    store.merge("AAPL", frame.iloc[200:][["Close"]])
+    assert store.bars("AAPL", "5m").fields == ("Close",)
+    assert store.bars("AAPL", "5m").values.dtype == dtype
@@ -0,0 +1,161 @@
+import asyncio
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+from utils.logger import setup_logger
+from utils.metrics import CIRCUIT_OPEN, FETCH_ATTEMPTS
+from utils.rate_limit import CircuitBreaker, PrioritySlots, TokenBucket, backoff_delay
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream host whose circuit is open"""
+
+    def __init__(self, host: str):
+        super().__init__(f"Circuit open for {host}, skipping request")
+        self.host = host
+
+
+@dataclass
+class HostLimits:
+    rate: float = 2.0
+    burst: int = 5
+    concurrency: int = 4
+
+
+@dataclass
+class _Host:
+    bucket: TokenBucket
+    breaker: CircuitBreaker
+    slots: PrioritySlots
+
+
+class FetchScheduler:
+    """
+    Central gate for requests to upstream hosts (yfinance, Google News, ...)
+
+    Every request to a host waits for one of the host's concurrency slots,
+    served interactive-first, then for a token from the host's bucket.
+    Blocking callables run in a worker thread so the event loop keeps
+    serving commands. Failures are retried with jittered exponential
+    backoff, and a host that keeps failing is skipped for a cool-off period.
+
+    Hosts are plain keys; besides network hosts the news service uses
+    "browser" for its headless browser extractions.
+    """
+
+    def __init__(
+        self,
+        limits: Optional[HostLimits] = None,
+        host_limits: Optional[Dict[str, HostLimits]] = None,
+        max_attempts: int = 3,
+        backoff_base: float = 1.0,
+        backoff_max: float = 30.0,
+        failure_threshold: int = 5,
+        cool_off: float = 300.0,
+        retry_on: Tuple[Type[BaseException], ...] = (Exception,),
+    ):
+        self.limits = limits or HostLimits()
+        self.host_limits = host_limits or {}
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.failure_threshold = failure_threshold
+        self.cool_off = cool_off
+        self.retry_on = retry_on
+        self._hosts: Dict[str, _Host] = {}
+        self.logger = setup_logger("fetch_scheduler")
+
+    def _host(self, host: str) -> _Host:
+        state = self._hosts.get(host)
+        if state is None:
+            limits = self.host_limits.get(host, self.limits)
+            state = _Host(
+                TokenBucket(limits.rate, limits.burst),
+                CircuitBreaker(self.failure_threshold, self.cool_off),
+                PrioritySlots(limits.concurrency),
+            )
+            self._hosts[host] = state
+        return state
+
+    def is_available(self, host: str) -> bool:
+        """False while the host's circuit is open"""
+        state = self._hosts.get(host)
+        return state is None or not state.breaker.is_open
+
+    async def submit(
+        self,
+        host: str,
+        fn: Callable[..., Any],
+        *args,
+        priority: Priority = Priority.BACKGROUND,
+        attempts: Optional[int] = None,
+        **kwargs,
+    ) -> Any:
+        """
+        Call fn(*args, **kwargs) against host under its limits
+
+        Args:
+            host: Upstream host the call talks to
+            fn: Blocking function or coroutine function
+            priority: Priority.INTERACTIVE for user commands
+            attempts: Overrides max_attempts for this call
+
+        Returns:
+            Whatever fn returns
+
+        Raises:
+            CircuitOpenError: The host is cooling off after repeated failures
+            Exception: The last error once all attempts have failed
+        """
+        state = self._host(host)
+        attempts = attempts or self.max_attempts
+        for attempt in range(attempts):
+            if not state.breaker.allow():
+                FETCH_ATTEMPTS.inc(host=host, result="rejected")
+                raise CircuitOpenError(host)
+            # Let through while open: this attempt is the half-open trial
+            trial = state.breaker.is_open
+
+            try:
+                async with state.slots.slot(priority):
+                    await state.bucket.acquire()
+                    try:
+                        if asyncio.iscoroutinefunction(fn):
+                            result = await fn(*args, **kwargs)
+                        else:
+                            result = await asyncio.to_thread(fn, *args, **kwargs)
+                    except self.retry_on as e:
+                        error = e
+                    else:
+                        state.breaker.record_success()
+                        CIRCUIT_OPEN.set(0, host=host)
+                        FETCH_ATTEMPTS.inc(host=host, result="success")
+                        return result
+            except BaseException:
+                # Cancelled, or an error that is not retried: without this the
+                # breaker would wait for the trial's outcome forever
+                if trial:
+                    state.breaker.cancel_trial()
+                raise
+
+            FETCH_ATTEMPTS.inc(host=host, result="failure")
+            state.breaker.record_failure()
+            if state.breaker.is_open:
+                CIRCUIT_OPEN.set(1, host=host)
+                self.logger.warning(
+                    f"Opening circuit for {host} for {self.cool_off:g}s: {error}"
+                )
+                raise error
+            if attempt + 1 < attempts:
+                delay = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+                self.logger.info(
+                    f"Request to {host} failed ({error}), retry {attempt + 1} "
+                    f"in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+        raise error
@@ -0,0 +1,54 @@
+import bisect
+import hashlib
+from typing import Dict, Iterable, List, Optional
+
+
+def stable_hash(key: str) -> int:
+    """64-bit hash that is identical across processes and hosts"""
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+def shard_for(key: str, shards: int) -> int:
+    """Fixed shard of a symbol or keyword"""
+    return stable_hash(key) % shards
+
+
+class HashRing:
+    """
+    Consistent hash ring
+
+    Every node is placed on the ring replicas times; a key belongs to the
+    first node clockwise from its hash. Adding or removing a node only moves
+    the keys of that node, about 1/N of the total.
+    """
+
+    def __init__(self, nodes: Iterable[str] = (), replicas: int = 100):
+        self.replicas = replicas
+        self._points: List[int] = []
+        self._owners: Dict[int, str] = {}
+        for node in nodes:
+            self.add(node)
+
+    @property
+    def nodes(self) -> List[str]:
+        return sorted(set(self._owners.values()))
+
+    def add(self, node: str) -> None:
+        for replica in range(self.replicas):
+            point = stable_hash(f"{node}#{replica}")
+            if point not in self._owners:
+                bisect.insort(self._points, point)
+                self._owners[point] = node
+
+    def remove(self, node: str) -> None:
+        for replica in range(self.replicas):
+            point = stable_hash(f"{node}#{replica}")
+            if self._owners.get(point) == node:
+                del self._owners[point]
+                self._points.pop(bisect.bisect_left(self._points, point))
+
+    def node_for(self, key: str) -> Optional[str]:
+        if not self._points:
+            return None
+        index = bisect.bisect(self._points, stable_hash(key)) % len(self._points)
+        return self._owners[self._points[index]]
@@ -1,19 +1,24 @@
-from playwright.async_api import async_playwright
+from utils.metrics import BROWSER_POOL_SIZE
 
 
 async def get_final_url(start_url):
+    from playwright.async_api import async_playwright
+
     async with async_playwright() as p:
         # Chromium 브라우저를 실행
         browser = await p.chromium.launch(headless=True)
-        context = await browser.new_context(locale="ko-KR")
-        page = await context.new_page()
-
-        # URL 열기
-        await page.goto(start_url, timeout=5000)
+        BROWSER_POOL_SIZE.inc()
+        try:
+            context = await browser.new_context(locale="ko-KR")
+            page = await context.new_page()
 
-        # 최종 URL 가져오기
-        final_url = page.url
+            # URL 열기
+            await page.goto(start_url, timeout=5000)
 
-        # 브라우저 종료
-        await browser.close()
+            # 최종 URL 가져오기
+            final_url = page.url
+        finally:
+            # 브라우저 종료
+            await browser.close()
+            BROWSER_POOL_SIZE.dec()
         return final_url
@@ -0,0 +1,109 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Hashable, Iterable, List, Optional
+from utils.logger import setup_logger
+from utils.metrics import JOB_DURATION, JOB_SKIPPED, QUEUE_DEPTH
+
+
+@dataclass
+class CycleResult:
+    processed: int
+    carried_over: int
+    duration: float
+
+
+class JobRunner:
+    """
+    Run the work items of a repeating job
+
+    - Single flight: a cycle that starts while the previous one is still
+      running is skipped instead of processing the same items twice.
+    - Time budget: once budget seconds have passed no new item is started;
+      at least one item is always processed so a cycle makes progress.
+    - Priority: items are processed in ascending priority(item) order.
+    - Carry-over: items left when the budget ran out go first next cycle,
+      as long as they are still part of that cycle's work.
+    """
+
+    def __init__(self, name: str, budget: Optional[float] = None):
+        self.name = name
+        self.budget = budget
+        self.carry_over: List[Hashable] = []
+        self._lock = asyncio.Lock()
+        self.logger = setup_logger("job_runner")
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    async def run(
+        self,
+        collect: Callable[[], Iterable[Hashable]],
+        process: Callable[[Hashable], Awaitable[None]],
+        priority: Optional[Callable[[Hashable], float]] = None,
+    ) -> Optional[CycleResult]:
+        """
+        Run one cycle
+
+        Args:
+            collect: Returns this cycle's work items; called only when the
+                cycle is not skipped
+            process: Handles one item; should deal with its own errors
+            priority: Sort key for new items, lower runs first
+
+        Returns:
+            Cycle summary, or None if the previous cycle was still running
+        """
+        if self._lock.locked():
+            JOB_SKIPPED.inc(job=self.name)
+            self.logger.warning(f"{self.name} still running, skipping this cycle")
+            return None
+
+        async with self._lock:
+            started = time.monotonic()
+            with JOB_DURATION.time(job=self.name):
+                items = self._order(collect(), priority)
+                next_index = 0
+                try:
+                    for index, item in enumerate(items):
+                        if (
+                            self.budget is not None
+                            and index
+                            and time.monotonic() - started >= self.budget
+                        ):
+                            break
+                        # An item that raises is not retried next cycle
+                        next_index = index + 1
+                        await process(item)
+                finally:
+                    self.carry_over = items[next_index:]
+                    QUEUE_DEPTH.set(
+                        len(self.carry_over), queue=f"{self.name}_carry_over"
+                    )
+
+            result = CycleResult(
+                processed=next_index,
+                carried_over=len(self.carry_over),
+                duration=time.monotonic() - started,
+            )
+            if self.carry_over:
+                self.logger.warning(
+                    f"{self.name} used its {self.budget:g}s budget after "
+                    f"{result.processed} items, carrying over {result.carried_over}"
+                )
+            return result
+
+    def _order(
+        self,
+        items: Iterable[Hashable],
+        priority: Optional[Callable[[Hashable], float]],
+    ) -> List[Hashable]:
+        items = list(dict.fromkeys(items))
+        current = set(items)
+        carried = [item for item in self.carry_over if item in current]
+        seen = set(carried)
+        fresh = [item for item in items if item not in seen]
+        if priority is not None:
+            fresh.sort(key=priority)
+        return carried + fresh
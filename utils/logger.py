@@ -1,21 +1,184 @@
+import atexit
+import contextvars
+import copy
+import json
 import logging
-from logging.handlers import RotatingFileHandler
 import os
+import queue
+import random
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, Optional
+
+# Correlation ID of the job cycle or command currently being handled
+correlation_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "correlation_id", default=None
+)
+
+_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_listener: Optional[QueueListener] = None
+_config: dict = {}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "component": record.component,
+            "correlation_id": record.correlation_id,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False)
+
+
+class ContextQueueHandler(QueueHandler):
+    """
+    Enqueue records for the background listener
+
+    Only the message arguments are merged on the calling thread; formatting
+    and file I/O happen on the listener thread. The correlation ID is
+    captured here because context variables do not cross threads.
+    """
+
+    def __init__(self, log_queue, component: str, debug_sample_rate: float):
+        super().__init__(log_queue)
+        self.component = component
+        self.debug_sample_rate = debug_sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # Keep only a sample of high-volume debug records
+        if record.levelno <= logging.DEBUG and self.debug_sample_rate < 1.0:
+            if random.random() >= self.debug_sample_rate:
+                return False
+        return super().filter(record)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        record.component = self.component
+        record.correlation_id = correlation_id.get() or "-"
+        return record
+
+
+class ComponentFileHandler(logging.Handler):
+    """Route records to logs/<component>.log, opening files on first use"""
+
+    def __init__(
+        self,
+        log_dir: str,
+        formatter: logging.Formatter,
+        max_bytes: int,
+        backup_count: int,
+    ):
+        super().__init__()
+        self.log_dir = log_dir
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.setFormatter(formatter)
+        self._handlers: Dict[str, RotatingFileHandler] = {}
+
+    def emit(self, record: logging.LogRecord) -> None:
+        handler = self._handlers.get(record.component)
+        if handler is None:
+            handler = RotatingFileHandler(
+                os.path.join(self.log_dir, f"{record.component}.log"),
+                maxBytes=self.max_bytes,
+                backupCount=self.backup_count,
+                encoding="utf-8",
+            )
+            handler.setFormatter(self.formatter)
+            self._handlers[record.component] = handler
+        handler.emit(record)
+
+    def close(self) -> None:
+        for handler in self._handlers.values():
+            handler.close()
+        super().close()
+
+
+def configure_logging(
+    log_dir: str = "logs",
+    level: str = "INFO",
+    json_format: bool = False,
+    max_bytes: int = 10 * 1024 * 1024,
+    backup_count: int = 5,
+    debug_sample_rate: float = 1.0,
+) -> None:
+    """
+    Start the background log listener
+
+    Call once at startup before the first setup_logger; otherwise
+    setup_logger starts it with the defaults.
+
+    Args:
+        log_dir: Directory for per-component log files
+        level: Level applied to loggers created by setup_logger
+        json_format: Write JSON lines to the log files instead of plain text
+        max_bytes: Size at which a component log file rotates
+        backup_count: Rotated files kept per component
+        debug_sample_rate: Fraction of DEBUG records kept (0.0 - 1.0)
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    # Create logs directory if it doesn't exist
+    os.makedirs(log_dir, exist_ok=True)
+
+    file_formatter = (
+        JsonFormatter()
+        if json_format
+        else logging.Formatter(
+            "%(asctime)s - %(name)s - %(levelname)s - [%(correlation_id)s] %(message)s"
+        )
+    )
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter("%(levelname)s: %(message)s"))
+
+    _config.update(level=level.upper(), debug_sample_rate=debug_sample_rate)
+    _listener = QueueListener(
+        _queue,
+        ComponentFileHandler(log_dir, file_formatter, max_bytes, backup_count),
+        console_handler,
+    )
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Write out queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
 
 
 def setup_logger(name: str = __name__) -> logging.Logger:
     """
     Create and configure a logger instance
 
+    Records are queued and written by a background thread to
+    logs/<component>.log, where the component is the first dotted part of
+    the logger name.
+
     Args:
         name: Logger name (defaults to module name)
 
     Returns:
         Configured logger instance
     """
-    # Create logs directory if it doesn't exist
-    if not os.path.exists("logs"):
-        os.makedirs("logs")
+    configure_logging()
 
     # Create logger instance
     logger = logging.getLogger(name)
@@ -24,26 +187,20 @@ def setup_logger(name: str = __name__) -> logging.Logger:
     if logger.handlers:
         return logger
 
-    logger.setLevel(logging.INFO)
-
-    # Create formatters
-    file_formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    logger.setLevel(_config["level"])
+    logger.propagate = False
+    logger.addHandler(
+        ContextQueueHandler(_queue, name.split(".")[0], _config["debug_sample_rate"])
     )
-    console_formatter = logging.Formatter("%(levelname)s: %(message)s")
 
-    # Create and configure file handler
-    file_handler = RotatingFileHandler(
-        "logs/news_service.log", maxBytes=1024 * 1024, backupCount=5  # 1MB
-    )
-    file_handler.setFormatter(file_formatter)
-
-    # Create and configure console handler
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(console_formatter)
+    return logger
 
-    # Add handlers to logger
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
 
-    return logger
+@contextmanager
+def log_context(prefix: str):
+    """Tag every record logged inside the block with a fresh correlation ID"""
+    token = correlation_id.set(f"{prefix}-{uuid.uuid4().hex[:8]}")
+    try:
+        yield correlation_id.get()
+    finally:
+        correlation_id.reset(token)
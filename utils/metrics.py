@@ -0,0 +1,250 @@
+"""
+In-process metrics with a Prometheus text-format endpoint
+
+Updates are plain in-memory arithmetic; text is only rendered when the
+endpoint is scraped, so instrumentation costs next to nothing when no one
+is watching.
+"""
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _format_labels(
+    names: Sequence[str], values: Tuple[str, ...], extra: str = ""
+) -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric(ABC):
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        return lines + self._samples()
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        """Sample lines of the metric in the text exposition format"""
+        pass
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+            for key, value in values
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: bucket counts (last slot is +Inf), sum, count
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][bisect_left(self.buckets, value)] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = [
+                (key, list(state[0]), state[1], state[2])
+                for key, state in self._values.items()
+            ]
+        lines = []
+        for key, counts, total, count in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                labels = _format_labels(self.labelnames, key, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+JOB_DURATION = REGISTRY.histogram(
+    "stockbot_job_duration_seconds", "Duration of a full job cycle", ["job"]
+)
+STAGE_DURATION = REGISTRY.histogram(
+    "stockbot_stage_duration_seconds",
+    "Duration of one stage of a job (fetch, indicator, render, db, send)",
+    ["job", "stage"],
+)
+JOB_SKIPPED = REGISTRY.counter(
+    "stockbot_job_skipped_total",
+    "Job cycles skipped because the previous cycle was still running",
+    ["job"],
+)
+ALERTS_SENT = REGISTRY.counter(
+    "stockbot_alerts_sent_total", "Alert messages delivered", ["alert_type"]
+)
+TELEGRAM_REQUESTS = REGISTRY.counter(
+    "stockbot_telegram_requests_total",
+    "Outbound Telegram API calls by outcome (success, retry_after, failure)",
+    ["method", "result"],
+)
+ARTICLES_EXTRACTED = REGISTRY.counter(
+    "stockbot_articles_extracted_total", "News article extractions", ["result"]
+)
+CACHE_HITS = REGISTRY.counter(
+    "stockbot_cache_hits_total", "Lookups answered from an in-process cache", ["cache"]
+)
+BROWSER_POOL_SIZE = REGISTRY.gauge(
+    "stockbot_browser_pool_size", "Headless browsers currently running"
+)
+QUEUE_DEPTH = REGISTRY.gauge(
+    "stockbot_queue_depth", "Items waiting in an in-process queue", ["queue"]
+)
+FETCH_ATTEMPTS = REGISTRY.counter(
+    "stockbot_fetch_attempts_total",
+    "Upstream requests by outcome (success, failure, rejected by open circuit)",
+    ["host", "result"],
+)
+CIRCUIT_OPEN = REGISTRY.gauge(
+    "stockbot_circuit_open", "1 while an upstream host's circuit is open", ["host"]
+)
+SCHEDULER_DEFERRED = REGISTRY.counter(
+    "stockbot_scheduler_deferred_total",
+    "Symbol checks deferred by the market-hours scheduler",
+    ["exchange"],
+)
+
+
+def start_metrics_server(
+    port: int, host: str = "127.0.0.1", registry: Optional[Registry] = None
+) -> ThreadingHTTPServer:
+    """Serve registry in Prometheus text format at /metrics from a daemon thread"""
+    registry = registry or REGISTRY
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            data = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics").start()
+    return server
@@ -0,0 +1,146 @@
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import List, Optional, Tuple
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter
+
+    Holds up to capacity tokens and refills at rate tokens per second;
+    acquire() waits until a token is available.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """
+        Take tokens if available
+
+        Returns:
+            0.0 on success, otherwise seconds until enough tokens refill
+        """
+        self._refill()
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return 0.0
+        return (tokens - self.tokens) / self.rate
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        while True:
+            wait = self.try_acquire(tokens)
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    Stop calling a failing dependency for a cool-off period
+
+    Opens after failure_threshold consecutive failures. Once cool_off seconds
+    have passed a single trial call is let through (half-open); its success
+    closes the breaker, its failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, cool_off: float = 300.0):
+        self.failure_threshold = failure_threshold
+        self.cool_off = cool_off
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if self._trial or time.monotonic() - self.opened_at < self.cool_off:
+            return False
+        self._trial = True
+        return True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._trial or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self._trial = False
+
+    def cancel_trial(self) -> None:
+        """Give the trial back when the trial call ended without an outcome"""
+        self._trial = False
+
+
+class PrioritySlots:
+    """
+    Concurrency limit whose waiters are served lowest priority value first
+
+    Waiters with equal priority are served in arrival order.
+    """
+
+    def __init__(self, limit: int):
+        self.free = limit
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, priority: int) -> None:
+        if self.free and not self._waiters:
+            self.free -= 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # A cancelled waiter is skipped by release(); if the slot was
+            # handed over just before the cancellation, pass it on
+            if not future.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.free += 1
+
+    @asynccontextmanager
+    async def slot(self, priority: int):
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 30.0) -> float:
+    """Exponential backoff with full jitter for a zero-based retry attempt"""
+    return random.uniform(0, min(cap, base * 2**attempt))
@@ -0,0 +1,85 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+from utils.metrics import CACHE_HITS
+
+T = TypeVar("T")
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Values kept for ttl seconds
+
+    Holds at most maxsize values; setting one more evicts the least
+    recently set.
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 256):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._items: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._items.get(key)
+        if item is None:
+            return default
+        expires, value = item
+        if expires <= time.monotonic():
+            del self._items[key]
+            return default
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._items[key] = (time.monotonic() + self.ttl, value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls with the same key into one
+
+    The first caller of a key runs the call; callers arriving while it is in
+    flight await the same result or exception. With a cache, results are
+    also reused until they expire; failures are never cached.
+
+    Args:
+        name: Cache label for the hit metrics
+        cache: Where results are kept after the call completes
+    """
+
+    def __init__(self, name: str, cache: Optional[TTLCache] = None):
+        self.name = name
+        self.cache = cache
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        if self.cache is not None:
+            value = self.cache.get(key, _MISSING)
+            if value is not _MISSING:
+                CACHE_HITS.inc(cache=self.name)
+                return value
+
+        call = self._calls.get(key)
+        if call is None:
+            call = self._calls[key] = asyncio.ensure_future(self._run(key, fn))
+        else:
+            CACHE_HITS.inc(cache=f"{self.name}_inflight")
+        # A caller giving up must not cancel the call for the others
+        return await asyncio.shield(call)
+
+    async def _run(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        try:
+            value = await fn()
+            if self.cache is not None:
+                self.cache.set(key, value)
+            return value
+        finally:
+            del self._calls[key]
@@ -0,0 +1,154 @@
+"""
+Versioned binary snapshots of in-process state
+
+A snapshot holds named sections, each with a small JSON state and any
+number of NumPy arrays. The file is an 8 byte magic, the format version and
+manifest length as little-endian uint32, the JSON manifest, then the array
+data with every array at a 64 byte aligned offset. Loading maps the file
+and wraps the arrays in place, so a snapshot of many megabytes of bars opens
+in milliseconds and pages in only as the arrays are read; the arrays are
+read-only.
+
+Files are written to a temporary name and renamed over the old snapshot, so
+a crash mid-write leaves the previous snapshot intact, and arrays still
+mapped from the previous file stay valid.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import struct
+import tempfile
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List, Union
+
+if TYPE_CHECKING:
+    import numpy as np
+
+MAGIC = b"SABSNAP\x00"
+# Bump when the layout or any section's state changes incompatibly; older
+# snapshots are then ignored and the bot starts cold
+VERSION = 1
+ALIGN = 64
+_HEADER = struct.Struct("<II")
+
+
+class SnapshotError(Exception):
+    """The file is not a snapshot this version can read"""
+
+
+@dataclass
+class Section:
+    """
+    State of one component
+
+    Args:
+        state: JSON-serializable values
+        arrays: Arrays by name; a list of arrays is written as the
+            concatenation of their flattened values, without building it in
+            memory
+    """
+
+    state: dict = field(default_factory=dict)
+    arrays: Dict[str, Union["np.ndarray", List["np.ndarray"]]] = field(
+        default_factory=dict
+    )
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGN) * ALIGN
+
+
+def write_snapshot(path: str, sections: Dict[str, Section]) -> int:
+    """Write sections to path, replacing it atomically; returns the file size"""
+    import numpy as np
+
+    layout = []
+    manifest = {}
+    offset = 0
+    for name, section in sections.items():
+        arrays = {}
+        for key, array in section.arrays.items():
+            parts = array if isinstance(array, list) else [array]
+            parts = [np.ascontiguousarray(part) for part in parts]
+            if isinstance(array, list):
+                dtype = parts[0].dtype if parts else np.dtype("float64")
+                shape = [sum(part.size for part in parts)]
+            else:
+                dtype, shape = parts[0].dtype, list(parts[0].shape)
+            offset = _aligned(offset)
+            arrays[key] = {"dtype": dtype.str, "shape": shape, "offset": offset}
+            layout.append((offset, parts))
+            offset += sum(part.nbytes for part in parts)
+        manifest[name] = {"state": section.state, "arrays": arrays}
+
+    encoded = json.dumps(manifest, separators=(",", ":")).encode()
+    data_start = _aligned(len(MAGIC) + _HEADER.size + len(encoded))
+    # A unique temporary name, so concurrent writers of the same path never
+    # write into each other's file; the last rename wins
+    fd, temporary = tempfile.mkstemp(
+        prefix=f".{os.path.basename(path)}.", dir=os.path.dirname(path) or "."
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC)
+            f.write(_HEADER.pack(VERSION, len(encoded)))
+            f.write(encoded)
+            for offset, parts in layout:
+                f.write(b"\x00" * (data_start + offset - f.tell()))
+                for part in parts:
+                    f.write(memoryview(part.reshape(-1)).cast("B"))
+            size = f.tell()
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+    return size
+
+
+def read_snapshot(path: str) -> Dict[str, Section]:
+    """
+    Map a snapshot file; arrays are read-only views of the mapping
+
+    Raises:
+        FileNotFoundError: No snapshot at path
+        SnapshotError: Not a snapshot, another format version or truncated
+    """
+    import mmap
+
+    import numpy as np
+
+    with open(path, "rb") as f:
+        head = f.read(len(MAGIC) + _HEADER.size)
+        if len(head) < len(MAGIC) + _HEADER.size or head[: len(MAGIC)] != MAGIC:
+            raise SnapshotError(f"{path} is not a snapshot")
+        version, length = _HEADER.unpack(head[len(MAGIC) :])
+        if version != VERSION:
+            raise SnapshotError(
+                f"{path} has format version {version}, expected {VERSION}"
+            )
+        try:
+            manifest = json.loads(f.read(length))
+        except ValueError as e:
+            raise SnapshotError(f"{path} has a corrupt manifest: {str(e)}")
+        data_start = _aligned(len(MAGIC) + _HEADER.size + length)
+        size = os.fstat(f.fileno()).st_size
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    sections = {}
+    for name, entry in manifest.items():
+        arrays = {}
+        for key, spec in entry["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"]))
+            start = data_start + spec["offset"]
+            if start + count * dtype.itemsize > size:
+                raise SnapshotError(f"{path} is truncated")
+            if count:
+                array = np.frombuffer(mapped, dtype, count, start)
+            else:
+                array = np.empty(0, dtype)
+            arrays[key] = array.reshape(spec["shape"])
+        sections[name] = Section(entry["state"], arrays)
+    return sections
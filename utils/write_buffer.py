@@ -0,0 +1,73 @@
+import time
+from typing import Callable, Generic, List, TypeVar
+from utils.logger import setup_logger
+from utils.metrics import QUEUE_DEPTH
+
+T = TypeVar("T")
+
+
+class WriteBehindBuffer(Generic[T]):
+    """
+    Collect writes in memory and hand them to flush_fn in bulk
+
+    A flush happens when max_items writes are pending, when flush_if_due is
+    called after the oldest pending write has waited max_delay seconds, or
+    on an explicit flush/close. Items stay visible through pending() until
+    flush_fn has returned, and are re-queued if it raises.
+    """
+
+    def __init__(
+        self,
+        flush_fn: Callable[[List[T]], None],
+        max_items: int = 100,
+        max_delay: float = 5.0,
+        name: str = "write_buffer",
+    ):
+        self.flush_fn = flush_fn
+        self.max_items = max_items
+        self.max_delay = max_delay
+        self.name = name
+        self.logger = setup_logger("write_buffer")
+        self._items: List[T] = []
+        self._inflight: List[T] = []
+        self._oldest: float = 0.0
+
+    def add(self, item: T) -> None:
+        if not self._items:
+            self._oldest = time.monotonic()
+        self._items.append(item)
+        QUEUE_DEPTH.set(len(self._items), queue=self.name)
+        if len(self._items) >= self.max_items:
+            self.flush()
+
+    def pending(self) -> List[T]:
+        """Writes accepted but not yet committed, including an in-progress flush"""
+        return self._inflight + self._items
+
+    def flush_if_due(self) -> int:
+        if self._items and time.monotonic() - self._oldest >= self.max_delay:
+            return self.flush()
+        return 0
+
+    def flush(self) -> int:
+        if not self._items:
+            return 0
+
+        self._inflight, self._items = self._items, []
+        try:
+            self.flush_fn(self._inflight)
+            flushed = len(self._inflight)
+            self.logger.debug(f"Flushed {flushed} writes from {self.name}")
+            return flushed
+        except Exception as e:
+            # Keep failed writes for the next flush
+            self.logger.error(f"Failed to flush {self.name}: {str(e)}")
+            self._items = self._inflight + self._items
+            self._oldest = time.monotonic()
+            return 0
+        finally:
+            self._inflight = []
+            QUEUE_DEPTH.set(len(self._items), queue=self.name)
+
+    def close(self) -> None:
+        self.flush()